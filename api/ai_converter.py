@@ -2,9 +2,14 @@ import logging
 import ollama
 import re
 import os
+import time
+import threading
+from contextlib import contextmanager
 from typing import Optional, List
 import json # Moved json import to the top
 
+from . import llm_metrics
+
 logging.basicConfig(level=logging.INFO)
 
 def get_running_model_name():
@@ -65,6 +70,107 @@ def get_running_model_name():
 #         raise RuntimeError(f"Error communicating with Ollama: {e}") from e
 
 
+# Bump whenever the conversion prompt below changes, so cached conversions made with the old prompt are not reused
+CONVERSION_PROMPT_VERSION = "1"
+
+
+# Generations one process may have in flight per model; a worker converting several objects at once
+# waits here instead of queueing unbounded requests on the Ollama server. Per-model overrides, e.g.
+# {"codellama:34b": 1, "qwen2.5-coder:7b": 6}. OLLAMA_NUM_PARALLEL on the server should be at least as high.
+MODEL_CONCURRENCY = int(os.getenv("OLLAMA_MODEL_CONCURRENCY", "4"))
+MODEL_CONCURRENCY_LIMITS = json.loads(os.getenv("OLLAMA_MODEL_CONCURRENCY_LIMITS", "{}"))
+
+_generation_slots = {}
+_generation_slots_lock = threading.Lock()
+
+
+@contextmanager
+def _generation_slot(model_name: str):
+    """Holds one of the model's concurrent generation slots."""
+    with _generation_slots_lock:
+        slots = _generation_slots.get(model_name)
+        if slots is None:
+            slots = threading.BoundedSemaphore(max(1, int(MODEL_CONCURRENCY_LIMITS.get(model_name, MODEL_CONCURRENCY))))
+            _generation_slots[model_name] = slots
+    with slots:
+        yield
+
+
+# Per-generation usage from the final chunk of the Ollama stream, in tokens and milliseconds. server_ms
+# is Ollama's total_duration, wall_ms the client-side time, slot_wait_ms the wait for _generation_slot.
+USAGE_FIELDS = ("requests", "prompt_tokens", "output_tokens", "load_ms", "prompt_eval_ms", "eval_ms",
+                "server_ms", "wall_ms", "slot_wait_ms")
+
+_usage = threading.local()
+
+
+def _empty_usage() -> dict:
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+@contextmanager
+def track_usage():
+    """Sums the usage of the generations this thread runs inside the block into the yielded dict."""
+    previous = getattr(_usage, "totals", None)
+    _usage.totals = _empty_usage()
+    try:
+        yield _usage.totals
+    finally:
+        _usage.totals = previous
+
+
+def add_usage(usage: dict):
+    """Adds usage, e.g. a share of a generation run on another thread, to this thread's tracked totals."""
+    totals = getattr(_usage, "totals", None)
+    if totals is None:
+        return
+    for field in USAGE_FIELDS:
+        totals[field] += usage[field]
+    if "model" in usage:
+        totals["model"] = usage["model"]
+
+
+def _record_usage(model_name: str, operation: str, final_chunk, wall_seconds: float, slot_wait_seconds: float):
+    usage = {
+        "requests": 1,
+        "prompt_tokens": final_chunk.get('prompt_eval_count') or 0,
+        "output_tokens": final_chunk.get('eval_count') or 0,
+        "load_ms": (final_chunk.get('load_duration') or 0) / 1e6,
+        "prompt_eval_ms": (final_chunk.get('prompt_eval_duration') or 0) / 1e6,
+        "eval_ms": (final_chunk.get('eval_duration') or 0) / 1e6,
+        "server_ms": (final_chunk.get('total_duration') or 0) / 1e6,
+        "wall_ms": wall_seconds * 1000,
+        "slot_wait_ms": slot_wait_seconds * 1000,
+        "model": model_name,
+    }
+    try:
+        llm_metrics.observe(model_name, operation, usage)
+    except Exception as e:
+        logging.warning(f"Could not record LLM metrics: {e}")
+    add_usage(usage)
+
+
+def _generate(model_name: str, prompt: str, operation: str):
+    """Streams the response text of one generation, holding a slot of the model and recording its usage."""
+    requested = time.monotonic()
+    with _generation_slot(model_name):
+        started = time.monotonic()
+        for chunk in ollama.generate(model=model_name, prompt=prompt, stream=True):
+            if chunk.get('done'):
+                _record_usage(model_name, operation, chunk, time.monotonic() - started, started - requested)
+            yield chunk['response']
+
+
+def get_conversion_model_name() -> str:
+    """Returns OLLAMA_MODEL_NAME, or the first running Ollama model."""
+    model_name = os.getenv("OLLAMA_MODEL_NAME")
+    if not model_name:
+        model_name = get_running_model_name()
+        if not model_name:
+            raise RuntimeError("No Ollama model is currently running. Please run a model to start it.")
+    return model_name
+
+
 def convert_oracle_to_postgres(oracle_sql: str, suggestions: Optional[List[str]] = None):
     print("####### Starting conversion using Ollama from convert_oracle_to_postgres def ####### ...")
     """Converts a block of Oracle SQL (DDL, DML, or PL/SQL) to PostgreSQL syntax.
@@ -74,12 +180,7 @@ def convert_oracle_to_postgres(oracle_sql: str, suggestions: Optional[List[str]]
         suggestions: Optional list of strings with conversion suggestions.
     """
     # --- Model Setup ---
-    model_name = os.getenv("OLLAMA_MODEL_NAME")
-    if not model_name:
-        # Assuming get_running_model_name() is defined
-        model_name = get_running_model_name()
-        if not model_name:
-            raise RuntimeError("No Ollama model is currently running. Please run a model to start it.")
+    model_name = get_conversion_model_name()
 
     # --- Input Sanitization ---
     # The SQL is already sanitized by the caller (sanitize_for_execution)
@@ -111,10 +212,9 @@ def convert_oracle_to_postgres(oracle_sql: str, suggestions: Optional[List[str]]
 
     # --- Ollama Generation and Lowercase Enforcement ---
     try:
-        stream = ollama.generate(model=model_name, prompt=prompt, stream=True)
-        for chunk in stream:
+        for response_text in _generate(model_name, prompt, "convert"):
             # THIS IS WHERE THE CRITICAL ENFORCEMENT HAPPENS
-            response_text = chunk['response'].lower()
+            response_text = response_text.lower()
             yield response_text
             print(response_text, end='', flush=True)  # Print to console as it streams
     except Exception as e:
@@ -123,6 +223,54 @@ def convert_oracle_to_postgres(oracle_sql: str, suggestions: Optional[List[str]]
 
 
 
+# Marker line that introduces each statement of a packed prompt and each result in the response
+_UNIT_MARKER = re.compile(r"^[ \t]*-- unit (\d+)[ \t]*$", re.M)
+
+
+def convert_oracle_to_postgres_batch(oracle_statements: List[str]) -> List[Optional[str]]:
+    """Converts several small Oracle statements with a single Ollama request.
+
+    Args:
+        oracle_statements: The Oracle statements, each converted independently.
+
+    Returns:
+        The PostgreSQL conversions in input order; None for a statement whose result could not be
+        found in the response.
+    """
+    model_name = get_conversion_model_name()
+    units = "\n".join(f"-- unit {number}\n{sql.strip()}" for number, sql in enumerate(oracle_statements, 1))
+    prompt = f"""
+        you are an oracle sql and postgresql expert. convert each of the numbered oracle sql statements below into equivalent, idiomatic postgresql syntax. the statements are independent of each other.
+
+        for every statement, in the same order, write its marker line exactly as given (for example `-- unit 1`) followed by **only** the converted psql code. do not include any other comments, explanations, apologies, leading text, or anything that is not valid postgresql.
+
+        pay special attention to these common conversions:
+        1. handle `uuidd`, `to_date`, `nvl`, `sysdate`, and other built-in function differences.
+        2. replace oracle data types (e.g., `varchar2`, `number`) with their postgres equivalents (e.g., `varchar`, `numeric` or `int`).
+
+        oracle sql statements to convert:
+        {units}
+
+        postgresql results:
+    """
+    prompt = prompt.strip().lower()
+
+    try:
+        response = "".join(_generate(model_name, prompt, "convert_batch"))
+    except Exception as e:
+        raise RuntimeError(f"error communicating with ollama: {e}") from e
+
+    parts = _UNIT_MARKER.split(re.sub(r"^[ \t]*```\w*[ \t]*$", "", response.lower(), flags=re.M))
+    # parts is [preamble, number, code, number, code, ...]; a unit answered twice is ambiguous
+    answers = {}
+    for number, code in zip(parts[1::2], parts[2::2]):
+        answers.setdefault(int(number), []).append(code.strip())
+    return [
+        answers[number][0] if len(answers.get(number, [])) == 1 and answers[number][0] else None
+        for number in range(1, len(oracle_statements) + 1)
+    ]
+
+
 def compare_schemas_with_ollama_ai(oracle_ddl: str, postgres_ddl: str, data_migration_mode: bool = False) -> tuple[bool, list[str]]:
     """Compares Oracle and PostgreSQL DDLs for migration compatibility using Ollama.
 
@@ -188,9 +336,8 @@ def compare_schemas_with_ollama_ai(oracle_ddl: str, postgres_ddl: str, data_migr
 
     try:
         full_response = ""
-        stream = ollama.generate(model=model_name, prompt=prompt, stream=True)
-        for chunk in stream:
-            full_response += chunk['response']
+        for response_text in _generate(model_name, prompt, "compare_schemas"):
+            full_response += response_text
 
         # Attempt to parse the JSON response
 
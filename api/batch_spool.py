@@ -0,0 +1,215 @@
+import os
+import mmap
+import time
+import shutil
+import struct
+import logging
+import tempfile
+import threading
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+import msgpack
+
+from .row_batches import _encode_value
+
+logger = logging.getLogger(__name__)
+
+# Spill-to-disk buffer between the Oracle reader and the row batch publisher. A background thread
+# drains the extraction into append-only segment files, so the Oracle sessions are released as soon
+# as the table is read even while the loaders are behind; the publisher reads the segments through
+# mmap and each segment is deleted once all of its batches have been handed on. Extraction only
+# waits when the job's segments reach the disk quota. A quota of 0 disables the spool.
+SPOOL_DIR = os.getenv("DATA_MIGRATION_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "data_migration_spool"))
+SPOOL_QUOTA_MB = int(os.getenv("DATA_MIGRATION_SPOOL_QUOTA_MB", "1024"))
+SEGMENT_MB = int(os.getenv("DATA_MIGRATION_SPOOL_SEGMENT_MB", "64"))
+
+_LENGTH = struct.Struct("<I")
+
+
+class _SpoolClosed(Exception):
+    pass
+
+
+class _Segment:
+    """One append-only segment file of length-prefixed msgpack records."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0  # bytes of complete, flushed records
+        self.sealed = False
+        self._file = open(path, "wb")
+        self._map = None
+
+    def append(self, payload: bytes):
+        self._file.write(_LENGTH.pack(len(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self.size += _LENGTH.size + len(payload)
+
+    def seal(self):
+        self._file.close()
+        self.sealed = True
+
+    def read(self, offset: int) -> tuple[bytes, int]:
+        """Returns the record at offset and the offset of the next one."""
+        if self._map is None or len(self._map) < self.size:
+            # The segment grew since it was mapped
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (length,) = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        return self._map[start:start + length], start + length
+
+    def delete(self):
+        if self._map is not None:
+            self._map.close()
+        if not self.sealed:
+            self._file.close()
+        os.remove(self.path)
+
+
+class BatchSpool:
+    """
+    Buffers the Oracle fetch batches of one job on disk. Use buffer() to wrap the batch
+    iterator and close() (or a with block) once publishing has finished or failed.
+    """
+
+    def __init__(self, job_id: str, quota_bytes: Optional[int] = None, segment_bytes: Optional[int] = None,
+                 directory: str = SPOOL_DIR):
+        """
+        Args:
+            job_id: The data migration job.
+            quota_bytes: Disk the job's segments may use. Defaults to DATA_MIGRATION_SPOOL_QUOTA_MB.
+            segment_bytes: Size at which a segment is sealed. Defaults to DATA_MIGRATION_SPOOL_SEGMENT_MB,
+                at most a quarter of the quota so space is freed while the quota fills.
+            directory: Parent directory of the per-job spool directories.
+        """
+        self.job_id = str(job_id)
+        self.quota = SPOOL_QUOTA_MB * 1024 * 1024 if quota_bytes is None else quota_bytes
+        self.segment_bytes = min(segment_bytes or SEGMENT_MB * 1024 * 1024, max(1, self.quota // 4))
+        self.directory = os.path.join(directory, self.job_id)
+        self.peak_bytes = 0
+        self.extraction_seconds = None
+        self.quota_wait_seconds = 0.0
+        self._segments = deque()  # segments not yet fully handed on, oldest first
+        self._segment_count = 0
+        self._offset = 0  # read position in the oldest segment
+        self._bytes = 0
+        self._done = False
+        self._closed = False
+        self._error = None
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def buffer(self, batches: Iterable[list]) -> Iterator[list]:
+        """
+        Starts draining batches into the spool and returns an iterator over the spooled batches.
+        A batch counts as acknowledged, and its space may be reclaimed, once the next one is
+        requested. Errors raised by the extraction are re-raised from the returned iterator.
+        """
+        if self.quota <= 0:
+            return iter(batches)
+        # Segments left behind by a crashed attempt of the same job
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        self._thread = threading.Thread(target=self._extract, args=(batches,), name=f"spool-{self.job_id}", daemon=True)
+        self._thread.start()
+        return self._read()
+
+    def _extract(self, batches: Iterable[list]):
+        started = time.monotonic()
+        try:
+            for rows in batches:
+                self._put(msgpack.packb([list(row) for row in rows], default=_encode_value, use_bin_type=True))
+        except _SpoolClosed:
+            pass
+        except Exception as e:
+            with self._cond:
+                self._error = e
+                self._cond.notify_all()
+        else:
+            self.extraction_seconds = time.monotonic() - started
+            with self._cond:
+                self._done = True
+                if self._segments and not self._segments[-1].sealed:
+                    self._segments[-1].seal()
+                self._cond.notify_all()
+            logger.info(f"Job {self.job_id}: extraction finished in {self.extraction_seconds:.1f}s; "
+                        f"{self._bytes / 1024 / 1024:.1f} MB still spooled for publishing.")
+        finally:
+            # Closes the Oracle cursors and sessions even when publishing stopped early
+            if hasattr(batches, "close"):
+                batches.close()
+
+    def _put(self, payload: bytes):
+        record_bytes = _LENGTH.size + len(payload)
+        with self._cond:
+            if self._bytes and self._bytes + record_bytes > self.quota:
+                # Seal the active segment so it can be deleted once read, then wait for space
+                if self._segments and not self._segments[-1].sealed:
+                    self._segments[-1].seal()
+                    self._cond.notify_all()
+                started = time.monotonic()
+                while not self._closed and self._bytes and self._bytes + record_bytes > self.quota:
+                    self._cond.wait()
+                self.quota_wait_seconds += time.monotonic() - started
+            if self._closed:
+                raise _SpoolClosed()
+            active = self._segments[-1] if self._segments else None
+            if active is None or active.sealed or active.size >= self.segment_bytes:
+                if active is not None and not active.sealed:
+                    active.seal()
+                self._segment_count += 1
+                active = _Segment(os.path.join(self.directory, f"{self._segment_count:08d}.seg"))
+                self._segments.append(active)
+            active.append(payload)
+            self._bytes += record_bytes
+            self.peak_bytes = max(self.peak_bytes, self._bytes)
+            self._cond.notify_all()
+
+    def _read(self) -> Iterator[list]:
+        while True:
+            with self._cond:
+                while True:
+                    if self._error is not None:
+                        raise self._error
+                    head = self._segments[0] if self._segments else None
+                    if head is not None and self._offset >= head.size and head.sealed:
+                        # Every batch in it was handed on
+                        head.delete()
+                        self._segments.popleft()
+                        self._bytes -= head.size
+                        self._offset = 0
+                        self._cond.notify_all()
+                        continue
+                    if head is not None and self._offset < head.size:
+                        payload, self._offset = head.read(self._offset)
+                        break
+                    if self._done:
+                        return
+                    self._cond.wait()
+            yield msgpack.unpackb(payload, raw=False)
+
+    def close(self):
+        """Stops the extraction if it is still running and deletes the job's segments."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is None:
+            return
+        self._thread.join()
+        for segment in self._segments:
+            segment.delete()
+        self._segments.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        logger.info(f"Job {self.job_id}: batch spool closed; peak {self.peak_bytes / 1024 / 1024:.1f} MB on disk, "
+                    f"extraction waited {self.quota_wait_seconds:.1f}s for the {self.quota / 1024 / 1024:.0f} MB quota.")
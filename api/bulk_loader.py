@@ -0,0 +1,385 @@
+import os
+import json
+import uuid
+import logging
+import itertools
+import threading
+from contextlib import closing, contextmanager
+from typing import Callable, Iterable, Optional
+
+from . import models
+from . import oracle_helper
+from . import table_splitter
+from . import delta_sync
+from . import type_mapping
+from . import staging_swap
+from . import extraction_throttle
+from .ddl_phases import MAINTENANCE_WORK_MEM
+from .db_config import get_target_db_connection, valkey_client
+from .job_repository import (
+    get_data_migration_job,
+    update_data_migration_job_status,
+    record_data_migration_chunk,
+    save_data_migration_chunk_plan,
+    get_data_migration_chunks,
+)
+from .postgres_utils import get_postgres_column_types, map_source_columns_to_target, copy_rows_into_table
+
+logger = logging.getLogger(__name__)
+
+# 'copy' streams table data with COPY ... FROM STDIN; 'row_inserts' publishes rows to the
+# DATA_MIGRATION_ROW_INSERTS queue for the per-row insert consumer.
+DEFAULT_LOAD_MODE = os.getenv("DATA_MIGRATION_LOAD_MODE", "copy")
+DEFAULT_CHUNK_SIZE = int(os.getenv("DATA_MIGRATION_CHUNK_SIZE", "50000"))
+# Guards against two workers loading the same job; refreshed after every committed chunk and
+# periodically while the staging table's indexes and constraints are built
+JOB_LOCK_TTL = int(os.getenv("DATA_MIGRATION_JOB_LOCK_TTL", "1800"))
+# 'in_place' copies into the target table; 'staging_swap' loads an UNLOGGED staging copy and
+# swaps it in when complete (see api/staging_swap.py)
+LOAD_STRATEGIES = ('in_place', 'staging_swap')
+
+
+def _compile_copy_plan(job_id: str, description: list, pg_column_types: dict[str, str]) -> tuple[list[str], Callable, list[str]]:
+    """Builds the target column list, the compiled row converter and the per-column COPY formatters once per table."""
+    column_mapping = map_source_columns_to_target([col[0] for col in description], list(pg_column_types))
+    if not column_mapping:
+        raise ValueError(f"No matching columns found between source and target for job {job_id}.")
+    target_columns = [target_col for target_col, _ in column_mapping]
+    source_indexes = [index for _, index in column_mapping]
+    converters = type_mapping.build_mapped_converters(description, column_mapping, pg_column_types, stream_lobs=True)
+    return (
+        target_columns,
+        type_mapping.compile_row_converter(source_indexes, converters),
+        type_mapping.copy_value_kinds(description, source_indexes, converters),
+    )
+
+
+def _commit_checkpointed(pg_conn, job_id: str, chunk_id: int, row_count: int):
+    """
+    Commits the target transaction after recording its xid with the chunk, so a resume can tell
+    whether the rows up to row_count were committed even if the worker dies right after the commit.
+    """
+    cursor = pg_conn.cursor()
+    cursor.execute("SELECT txid_current()")
+    target_xid = cursor.fetchone()[0]
+    cursor.close()
+    record_data_migration_chunk(job_id, chunk_id, "IN_PROGRESS", pending_row_count=row_count, target_xid=target_xid)
+    pg_conn.commit()
+
+
+def _copy_chunk(pg_conn, job_id: str, chunk: dict, target_schema: str, target_table: str,
+                copy_plan: tuple[list[str], Callable, list[str]], rows: Iterable, commit_rows: int) -> int:
+    """
+    Copies one chunk in one target transaction. An unsplit table ('none' chunk) is committed every
+    commit_rows rows instead; rows holds the rows after those committed by earlier runs (its row_count).
+
+    Returns:
+        The rows copied by this call.
+    """
+    target_columns, convert_row, value_kinds = copy_plan
+    chunk_id = chunk["chunk_id"]
+    committed = chunk.get("row_count") or 0
+    rows = iter(rows)
+    record_data_migration_chunk(job_id, chunk_id, "IN_PROGRESS")
+    try:
+        while True:
+            step = itertools.islice(rows, commit_rows) if chunk["method"] == 'none' else rows
+            copied = copy_rows_into_table(
+                pg_conn, target_schema, target_table, target_columns, map(convert_row, step), value_kinds
+            )
+            _commit_checkpointed(pg_conn, job_id, chunk_id, committed + copied)
+            committed += copied
+            if chunk["method"] != 'none' or copied < commit_rows:
+                break
+            record_data_migration_chunk(job_id, chunk_id, "IN_PROGRESS", row_count=committed)
+            _refresh_job_lock(job_id)
+            logger.info(f"Job {job_id}: committed {committed} rows of unsplit table chunk {chunk_id}.")
+    except Exception as e:
+        pg_conn.rollback()
+        record_data_migration_chunk(job_id, chunk_id, "FAILED", error_message=str(e))
+        raise
+    record_data_migration_chunk(job_id, chunk_id, "COMPLETED", row_count=committed)
+    return committed - (chunk.get("row_count") or 0)
+
+
+def _settle_in_flight_commit(pg_conn, job_id: str, checkpoint: dict) -> dict:
+    """
+    Resolves a checkpoint whose last target commit may or may not have happened, using the
+    target's record of the transaction (txid_status).
+    """
+    if checkpoint["target_xid"] is None or checkpoint["pending_row_count"] is None \
+            or checkpoint["pending_row_count"] == (checkpoint["row_count"] or 0):
+        return checkpoint
+    cursor = pg_conn.cursor()
+    cursor.execute("SELECT txid_status(%s)", (checkpoint["target_xid"],))
+    status = cursor.fetchone()[0]
+    cursor.close()
+    if status == 'aborted':
+        return checkpoint
+    if status != 'committed':
+        raise RuntimeError(f"Job {job_id}: cannot tell whether chunk {checkpoint['chunk_id']} was committed "
+                           f"(target transaction {checkpoint['target_xid']} is {status or 'unknown'}); retry later.")
+    row_count = checkpoint["pending_row_count"]
+    # An unsplit table continues after the committed rows; any other chunk was committed whole
+    checkpoint_status = "IN_PROGRESS" if checkpoint["split_method"] == 'none' else "COMPLETED"
+    logger.info(f"Job {job_id}: chunk {checkpoint['chunk_id']} was committed ({row_count} rows) before the checkpoint was updated.")
+    record_data_migration_chunk(job_id, checkpoint["chunk_id"], checkpoint_status, row_count=row_count)
+    return {**checkpoint, "status": checkpoint_status, "row_count": row_count}
+
+
+def _load_chunk_plan(pg_conn, job_id: str, source_details, source_schema: str, source_table: str,
+                     chunk_size: int, concurrency: int, delta_column: Optional[str]) -> tuple[list[dict], int]:
+    """
+    Returns the job's chunk plan and the rows already committed by it. The plan is computed and
+    stored on the first run; a restarted job reuses it so chunk boundaries stay the same.
+    """
+    checkpoints = get_data_migration_chunks(job_id)
+    if not checkpoints:
+        delta_sync.record_baseline_watermark(job_id, source_details, source_schema, source_table, delta_column)
+        chunks = table_splitter.split_table(source_details, source_schema, source_table, chunk_size, concurrency)
+        save_data_migration_chunk_plan(job_id, chunks)
+        return chunks, 0
+
+    if any(row["split_method"] is None for row in checkpoints):
+        raise RuntimeError(f"Job {job_id} has chunk records without a stored chunk plan and cannot be resumed.")
+    checkpoints = [_settle_in_flight_commit(pg_conn, job_id, row) for row in checkpoints]
+    pending = [
+        {**table_splitter.chunk_from_checkpoint(row), "row_count": row["row_count"] if row["split_method"] == 'none' else 0}
+        for row in checkpoints if row["status"] != "COMPLETED"
+    ]
+    # Includes the rows an unsplit table committed before the restart
+    committed_rows = sum(row["row_count"] or 0 for row in checkpoints if row["status"] == "COMPLETED" or row["split_method"] == 'none')
+    logger.info(f"Job {job_id}: resuming with {len(checkpoints) - len(pending)} of {len(checkpoints)} chunks already committed ({committed_rows} rows).")
+    return pending, committed_rows
+
+
+class JobLockedError(RuntimeError):
+    """Another worker holds the job's load lock (or held it and died within JOB_LOCK_TTL)."""
+
+
+# The lock value is a token unique to the holder, so an expired holder never extends or deletes
+# the lock that another worker took over
+_REFRESH_LOCK_SCRIPT = valkey_client.register_script(
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('EXPIRE', KEYS[1], ARGV[2]) end return 0"
+)
+_RELEASE_LOCK_SCRIPT = valkey_client.register_script(
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+)
+# job_id -> token of the locks held by this process
+_job_lock_tokens = {}
+
+
+def _acquire_job_lock(job_id: str) -> bool:
+    token = uuid.uuid4().hex
+    if not valkey_client.set(f"data_migration:{job_id}:lock", token, nx=True, ex=JOB_LOCK_TTL):
+        return False
+    _job_lock_tokens[job_id] = token
+    return True
+
+
+def _refresh_job_lock(job_id: str):
+    if not _REFRESH_LOCK_SCRIPT(keys=[f"data_migration:{job_id}:lock"], args=[_job_lock_tokens[job_id], JOB_LOCK_TTL]):
+        raise JobLockedError(f"Data migration job {job_id} lost its load lock (expired after {JOB_LOCK_TTL}s); "
+                             f"another worker may be loading it.")
+
+
+def _release_job_lock(job_id: str):
+    token = _job_lock_tokens.pop(job_id, None)
+    if token is not None:
+        _RELEASE_LOCK_SCRIPT(keys=[f"data_migration:{job_id}:lock"], args=[token])
+
+
+@contextmanager
+def _job_lock_kept_alive(job_id: str):
+    """Refreshes the job lock every third of JOB_LOCK_TTL while a long step without chunk commits runs."""
+    done = threading.Event()
+    lost = []
+
+    def keep_alive():
+        while not done.wait(JOB_LOCK_TTL / 3):
+            try:
+                _refresh_job_lock(job_id)
+            except Exception as e:
+                lost.append(e)
+                return
+
+    refresher = threading.Thread(target=keep_alive, name=f"job-lock-{job_id}", daemon=True)
+    refresher.start()
+    try:
+        yield
+    finally:
+        done.set()
+        refresher.join()
+    if lost:
+        raise lost[0]
+
+
+def _chunk_committed(job_id: str, chunk: dict, done: int, total: int, copied: int, migrated_rows: int):
+    _refresh_job_lock(job_id)
+    update_data_migration_job_status(job_id, "IN_PROGRESS", migrated_rows=migrated_rows)
+    logger.info(f"Job {job_id}: chunk {chunk['chunk_id']} ({done}/{total}) committed ({copied} rows, {migrated_rows} total).")
+
+
+def migrate_table_data(
+    job_id: str,
+    source_details: models.OracleConnectionDetails,
+    source_schema: str,
+    source_table: str,
+    target_details: dict,
+    target_schema: str,
+    target_table: str,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    delta_column: Optional[str] = None,
+    lob_threshold: Optional[int] = None,
+    load_strategy: str = 'in_place'
+) -> int:
+    """
+    Copies an Oracle table into PostgreSQL with COPY ... FROM STDIN, one transaction per chunk.
+
+    The table is split into ROWID, partition or primary key ranges that are read by up to
+    `concurrency` parallel Oracle sessions and loaded in the order they finish. The chunk plan
+    and every committed chunk are checkpointed in migration_jobs.data_migration_chunks, so
+    calling this again for the same job skips the chunks that were already committed.
+
+    Args:
+        job_id: The data migration job ID.
+        source_details: The Oracle connection details.
+        source_schema: The Oracle schema name.
+        source_table: The Oracle table name.
+        target_details: The PostgreSQL credentials (dbname, user, password, host, port).
+        target_schema: The PostgreSQL schema name.
+        target_table: The PostgreSQL table name.
+        chunk_size: Target rows per chunk/transaction. Defaults to DATA_MIGRATION_CHUNK_SIZE.
+        concurrency: Oracle sessions used for extraction. Defaults to DATA_MIGRATION_EXTRACTION_CONCURRENCY.
+        delta_column: Change-tracking column for later delta syncs; the baseline watermark is
+            recorded when the load starts. Defaults to ORA_ROWSCN.
+        lob_threshold: LOBs up to this size are fetched inline; larger ones are streamed into
+            COPY in chunks. Tables with LOB columns are extracted one chunk at a time.
+            Defaults to DATA_MIGRATION_LOB_INLINE_THRESHOLD.
+        load_strategy: 'in_place', or 'staging_swap' for full reloads: chunks are copied into an
+            UNLOGGED staging table that gets the target's indexes and constraints, is set LOGGED
+            and replaces the target in one short transaction once every chunk is committed.
+
+    Returns:
+        The number of rows migrated, including rows committed by earlier runs.
+    """
+    if load_strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unsupported load strategy: {load_strategy}")
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    concurrency = concurrency or table_splitter.DEFAULT_EXTRACTION_CONCURRENCY
+    if not _acquire_job_lock(job_id):
+        raise JobLockedError(f"Data migration job {job_id} is already being loaded by another worker.")
+
+    migrated_rows = 0
+    try:
+        update_data_migration_job_status(job_id, "IN_PROGRESS")
+        fresh_start = not get_data_migration_chunks(job_id)
+
+        with get_target_db_connection(target_details) as pg_conn:
+            chunks, migrated_rows = _load_chunk_plan(pg_conn, job_id, source_details, source_schema, source_table,
+                                                     chunk_size, concurrency, delta_column)
+            pg_column_types = get_postgres_column_types(target_schema, target_table, pg_conn)
+            if not pg_column_types:
+                raise ValueError(f"No columns found for target table {target_schema}.{target_table}")
+
+            load_table = target_table
+            if load_strategy == 'staging_swap':
+                if not fresh_start and not staging_swap.staging_table_exists(pg_conn, target_schema, target_table):
+                    if chunks:
+                        raise RuntimeError(f"Job {job_id}: staging table for {target_schema}.{target_table} is gone; start a new job.")
+                    # Every chunk was committed and the staging table swapped in before the job was marked completed
+                    load_table = None
+                else:
+                    staging_swap.check_swappable(pg_conn, target_schema, target_table)
+                    load_table = staging_swap.create_staging_table(pg_conn, target_schema, target_table, recreate=fresh_start)
+                    if migrated_rows and staging_swap.staging_table_is_empty(pg_conn, target_schema, target_table):
+                        # UNLOGGED tables are truncated by crash recovery, taking the committed chunks with them
+                        raise RuntimeError(f"Job {job_id}: staging table lost its committed chunks (PostgreSQL crash recovery); start a new job.")
+
+            lob_columns = oracle_helper.get_lob_columns(source_details, source_schema, source_table) if chunks else []
+            throttle = extraction_throttle.for_source(job_id, source_details, concurrency, oracle_helper.DEFAULT_FETCH_BATCH_SIZE)
+            copy_plan = None
+            if lob_columns or (len(chunks) == 1 and chunks[0]["method"] == 'none'):
+                # Chunks are streamed one at a time on their own cursor: an unsplit table is read in ROWID
+                # order and committed every chunk_size rows, resuming after the committed ones, and large
+                # LOBs are read in pieces through their locators while the session that fetched them is open.
+                for done, chunk in enumerate(chunks, start=1):
+                    with closing(oracle_helper.stream_oracle_table_batches(
+                            source_details, source_schema, source_table, chunk=chunk, lob_threshold=lob_threshold,
+                            throttle=throttle)) as batches:
+                        description = next(batches)
+                        if copy_plan is None:
+                            copy_plan = _compile_copy_plan(job_id, description, pg_column_types)
+                        rows = itertools.chain.from_iterable(batches)
+                        if chunk.get("row_count"):
+                            rows = itertools.islice(rows, chunk["row_count"], None)
+                        copied = _copy_chunk(pg_conn, job_id, chunk, target_schema, load_table,
+                                             copy_plan, rows, chunk_size)
+                    migrated_rows += copied
+                    _chunk_committed(job_id, chunk, done, len(chunks), copied, migrated_rows)
+            elif chunks:
+                with closing(table_splitter.read_chunks_parallel(
+                        source_details, source_schema, source_table, chunks, concurrency, throttle=throttle)) as chunk_results:
+                    for done, (chunk, description, batches) in enumerate(chunk_results, start=1):
+                        if copy_plan is None:
+                            copy_plan = _compile_copy_plan(job_id, description, pg_column_types)
+                        copied = _copy_chunk(pg_conn, job_id, chunk, target_schema, load_table,
+                                             copy_plan, itertools.chain.from_iterable(batches), chunk_size)
+                        migrated_rows += copied
+                        _chunk_committed(job_id, chunk, done, len(chunks), copied, migrated_rows)
+
+            if throttle:
+                throttle.flush()
+            swap_errors = []
+            if load_strategy == 'staging_swap' and load_table is not None:
+                logger.info(f"Job {job_id}: building indexes on {target_schema}.{load_table} and swapping it in.")
+                _refresh_job_lock(job_id)
+                with _job_lock_kept_alive(job_id):
+                    staging_swap.prepare_staging_table(pg_conn, target_schema, target_table, MAINTENANCE_WORK_MEM)
+                # Only swap while still holding the lock
+                _refresh_job_lock(job_id)
+                swap_errors = staging_swap.swap_staging_table(pg_conn, target_schema, target_table)
+
+        update_data_migration_job_status(job_id, "COMPLETED", total_rows=migrated_rows, migrated_rows=migrated_rows,
+                                         error_details="; ".join(swap_errors) if swap_errors else None)
+        logger.info(f"Job {job_id}: copied {migrated_rows} rows from {source_schema}.{source_table}.")
+        return migrated_rows
+    except JobLockedError:
+        # The job's status now belongs to the worker that holds the lock
+        raise
+    except Exception as e:
+        logger.error(f"Bulk load failed for job {job_id} after {migrated_rows} rows: {e}", exc_info=True)
+        update_data_migration_job_status(job_id, "FAILED", migrated_rows=migrated_rows, error_details=str(e))
+        raise
+    finally:
+        _release_job_lock(job_id)
+
+
+def resume_table_data(job_id: str) -> int:
+    """
+    Restarts a data migration job from its stored connection details and chunk checkpoints.
+
+    Returns:
+        The number of rows migrated.
+    """
+    job = get_data_migration_job(job_id)
+    if not job:
+        raise ValueError(f"Data migration job {job_id} not found.")
+    if job["status"] == "COMPLETED":
+        logger.info(f"Job {job_id} is already completed; nothing to resume.")
+        return job["migrated_rows"]
+
+    return migrate_table_data(
+        job_id,
+        models.OracleConnectionDetails(**json.loads(job["source_connection_string"])),
+        job["source_schema_name"],
+        job["source_table_name"],
+        json.loads(job["target_connection_string"]),
+        job["target_schema_name"],
+        job["target_table_name"],
+        concurrency=job["extraction_concurrency"],
+        delta_column=job["delta_column"],
+        lob_threshold=job["lob_inline_threshold"],
+        load_strategy=job["load_strategy"] or 'in_place'
+    )
@@ -0,0 +1,129 @@
+import os
+import re
+import hashlib
+import logging
+from typing import Optional
+
+from . import ai_converter
+from .db_config import valkey_client
+from .job_repository import get_cached_conversion, save_cached_conversion
+
+logger = logging.getLogger(__name__)
+
+# Verified conversions are stored in migration_jobs.conversion_cache under a hash of the normalized
+# Oracle SQL, the model and the prompt version, with recently used entries also kept in Valkey.
+# Normalization folds case and whitespace outside string literals, drops comments and replaces the
+# source schema with a placeholder, so the same object converted from another schema is a hit.
+CACHE_ENABLED = os.getenv("CONVERSION_CACHE_ENABLED", "true").lower() == "true"
+VALKEY_TTL = int(os.getenv("CONVERSION_CACHE_VALKEY_TTL", str(24 * 3600)))
+
+_STATS_KEY = "conversion_cache:stats"
+_STATS = ("hits_valkey", "hits_postgres", "misses", "bypassed", "stored")
+_SCHEMA_PLACEHOLDER = "__source_schema__"
+_TOKEN = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/|\s+|\"[^\"]*\"|[^\s'\"\-/]+|.", re.S)
+_SIMPLE_QUOTED_IDENTIFIER = re.compile(r'"([A-Z][A-Z0-9_$#]*)"')
+_WORD_EDGE = re.compile(r"[\w$#'\"]")
+
+
+def _schema_pattern(schema: str):
+    return re.compile(rf'(?<![\w$#"])"?{re.escape(schema)}"?\.', re.IGNORECASE)
+
+
+def normalize_sql(oracle_sql: str, source_schema: Optional[str] = None) -> str:
+    """The form of oracle_sql that is hashed into the cache key."""
+    parts = []
+    separated = False
+    for token in _TOKEN.findall(oracle_sql):
+        if token.startswith("--") or token.startswith("/*") or token.isspace():
+            separated = True
+            continue
+        if token.startswith("'"):
+            pass
+        elif _SIMPLE_QUOTED_IDENTIFIER.fullmatch(token):
+            # "EMPLOYEES" and employees name the same Oracle object; "MixedCase" does not
+            token = token[1:-1].lower()
+        elif not token.startswith('"'):
+            token = token.lower()
+        # Whitespace only matters between two words, e.g. not around punctuation
+        if separated and parts and _WORD_EDGE.match(parts[-1][-1]) and _WORD_EDGE.match(token[0]):
+            parts.append(" ")
+        parts.append(token)
+        separated = False
+    normalized = "".join(parts)
+    if source_schema:
+        normalized = _schema_pattern(source_schema).sub(f"{_SCHEMA_PLACEHOLDER}.", normalized)
+    return normalized
+
+
+def _cache_key(normalized_sql: str) -> tuple[str, str]:
+    model_name = ai_converter.get_conversion_model_name()
+    digest = hashlib.sha256(
+        "\0".join((model_name, ai_converter.CONVERSION_PROMPT_VERSION, normalized_sql)).encode()
+    ).hexdigest()
+    return digest, model_name
+
+
+def _count(stat: str):
+    try:
+        valkey_client.hincrby(_STATS_KEY, stat, 1)
+    except Exception as e:
+        logger.warning(f"Could not update conversion cache stats: {e}")
+
+
+def lookup(oracle_sql: str, source_schema: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the cached PostgreSQL conversion of oracle_sql, or None on a miss. Cache errors are
+    logged and treated as misses.
+    """
+    if not CACHE_ENABLED:
+        return None
+    try:
+        key, _ = _cache_key(normalize_sql(oracle_sql, source_schema))
+        converted_sql = valkey_client.get(f"conversion_cache:{key}")
+        if converted_sql is not None:
+            converted_sql = converted_sql.decode()
+            _count("hits_valkey")
+        else:
+            converted_sql = get_cached_conversion(key)
+            if converted_sql is None:
+                _count("misses")
+                return None
+            valkey_client.set(f"conversion_cache:{key}", converted_sql, ex=VALKEY_TTL)
+            _count("hits_postgres")
+    except Exception as e:
+        logger.warning(f"Conversion cache lookup failed; converting with the model: {e}")
+        return None
+    if source_schema:
+        converted_sql = converted_sql.replace(_SCHEMA_PLACEHOLDER, source_schema.lower())
+    return converted_sql
+
+
+def store(oracle_sql: str, converted_sql: str, source_schema: Optional[str] = None):
+    """Caches a verified conversion of oracle_sql."""
+    if not CACHE_ENABLED:
+        return
+    try:
+        normalized_sql = normalize_sql(oracle_sql, source_schema)
+        key, model_name = _cache_key(normalized_sql)
+        if source_schema:
+            converted_sql = _schema_pattern(source_schema).sub(f"{_SCHEMA_PLACEHOLDER}.", converted_sql)
+        save_cached_conversion(key, model_name, ai_converter.CONVERSION_PROMPT_VERSION, normalized_sql, converted_sql)
+        valkey_client.set(f"conversion_cache:{key}", converted_sql, ex=VALKEY_TTL)
+        _count("stored")
+    except Exception as e:
+        logger.warning(f"Could not store conversion in the cache: {e}")
+
+
+def record_bypass():
+    """Counts a conversion that skipped the cache on request."""
+    _count("bypassed")
+
+
+def get_stats() -> dict:
+    """Hit, miss, bypass and store counts across all workers, and the hit ratio of lookups."""
+    counts = {key.decode(): int(value) for key, value in valkey_client.hgetall(_STATS_KEY).items()}
+    stats = {stat: counts.get(stat, 0) for stat in _STATS}
+    lookups = stats["hits_valkey"] + stats["hits_postgres"] + stats["misses"]
+    stats["hit_ratio"] = round((stats["hits_valkey"] + stats["hits_postgres"]) / lookups, 3) if lookups else None
+    stats["enabled"] = CACHE_ENABLED
+    return stats
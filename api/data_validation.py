@@ -0,0 +1,378 @@
+import os
+import re
+import math
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from . import models
+from . import oracle_helper
+from . import table_splitter
+from .db_config import get_target_db_connection
+from .job_repository import get_data_migration_job, record_data_migration_validation
+from .postgres_utils import get_postgres_column_types, map_source_columns_to_target
+
+logger = logging.getLogger(__name__)
+
+# Tables are compared chunk by chunk over contiguous primary key ranges. Each side returns only a
+# row count and a sum of 60-bit MD5 row hashes per chunk; the sum does not depend on row order.
+# Differing chunks are re-split until they are small enough to compare key by key.
+VALIDATION_CHUNK_ROWS = int(os.getenv("DATA_VALIDATION_CHUNK_ROWS", "1000000"))
+VALIDATION_CONCURRENCY = int(os.getenv("DATA_VALIDATION_CONCURRENCY", "4"))
+VALIDATION_LEAF_ROWS = int(os.getenv("DATA_VALIDATION_LEAF_ROWS", "1000"))
+_SUBDIVISIONS = 16
+_MAX_REPORTED_MISMATCHES = 100
+# Columns per hashed group; keeps Oracle's concatenated row text below the 4000 byte VARCHAR2 limit
+_COLUMNS_PER_GROUP = 60
+_NULL = "'\\N'"
+
+_ORACLE_NUMBER_TYPES = ('NUMBER', 'FLOAT', 'INTEGER')
+_ORACLE_TEXT_TYPES = ('VARCHAR2', 'NVARCHAR2', 'CHAR', 'NCHAR')
+_ORACLE_LOB_TYPES = ('CLOB', 'NCLOB', 'BLOB')
+_PG_FLOAT_TYPES = ('double precision', 'real')
+
+
+def _oracle_hash(text_expr: str) -> str:
+    return f"TO_NUMBER(SUBSTR(RAWTOHEX(STANDARD_HASH({text_expr}, 'MD5')), 1, 15), 'XXXXXXXXXXXXXXX')"
+
+
+def _pg_hash(text_expr: str) -> str:
+    return f"('x' || lpad(substr(md5({text_expr}), 1, 15), 16, '0'))::bit(64)::bigint::numeric"
+
+
+def _oracle_digest(expr: str) -> str:
+    return f"CASE WHEN {expr} IS NULL THEN NULL ELSE LOWER(RAWTOHEX(STANDARD_HASH({expr}, 'MD5'))) END"
+
+
+def _pg_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_expressions(ora_column: str, oracle_type: str, pg_column: str, pg_type: str) -> Optional[tuple[str, str]]:
+    """
+    Returns an (Oracle, PostgreSQL) pair of SQL expressions that render a column value as the
+    same text on both sides, following the conversions applied by type_mapping during the load.
+    Returns None for types that are not compared.
+    """
+    o, p = f'"{ora_column}"', _pg_ident(pg_column)
+    if pg_type == 'boolean':
+        pg_expr = f"CASE WHEN {p} THEN 't' WHEN NOT {p} THEN 'f' END"
+        if oracle_type in _ORACLE_NUMBER_TYPES:
+            return f"CASE WHEN {o} <> 0 THEN 't' WHEN {o} = 0 THEN 'f' END", pg_expr
+        if oracle_type in _ORACLE_TEXT_TYPES:
+            return (f"CASE WHEN {o} IS NULL THEN NULL WHEN UPPER(TRIM({o})) IN ('Y', 'YES', 'T', 'TRUE', '1') THEN 't' ELSE 'f' END",
+                    pg_expr)
+        return None
+    if oracle_type in _ORACLE_NUMBER_TYPES or oracle_type in ('BINARY_FLOAT', 'BINARY_DOUBLE'):
+        # Oracle's TM9 format drops trailing zeros and the leading zero of fractions ('.5')
+        pg_text = "regexp_replace(trim_scale({})::text, '^(-?)0\\.', '\\1.')"
+        if oracle_type.startswith('BINARY') or pg_type in _PG_FLOAT_TYPES:
+            return f"TO_CHAR(ROUND(CAST({o} AS NUMBER), 6), 'TM9')", pg_text.format(f"round({p}::numeric, 6)")
+        return f"TO_CHAR({o}, 'TM9')", pg_text.format(f"{p}::numeric")
+    if oracle_type == 'DATE' or oracle_type.startswith('TIMESTAMP'):
+        if pg_type == 'date':
+            return f"TO_CHAR({o}, 'YYYY-MM-DD')", f"to_char({p}, 'YYYY-MM-DD')"
+        if oracle_type == 'DATE':
+            return f"TO_CHAR({o}, 'YYYY-MM-DD HH24:MI:SS')", f"to_char({p}, 'YYYY-MM-DD HH24:MI:SS')"
+        if 'TIME ZONE' in oracle_type and pg_type == 'timestamp with time zone':
+            return (f"TO_CHAR(SYS_EXTRACT_UTC({o}), 'YYYY-MM-DD HH24:MI:SS.FF6')",
+                    f"to_char({p} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.US')")
+        return f"TO_CHAR({o}, 'YYYY-MM-DD HH24:MI:SS.FF6')", f"to_char({p}, 'YYYY-MM-DD HH24:MI:SS.US')"
+    if oracle_type in _ORACLE_TEXT_TYPES:
+        # N types are converted to the database character set so both sides hash UTF-8 bytes
+        ora_text = f"TO_CHAR({o})" if oracle_type.startswith('N') else o
+        if oracle_type.endswith('CHAR') and not oracle_type.endswith('VARCHAR2'):
+            return _oracle_digest(f"RTRIM({ora_text}, ' ')"), f"md5(rtrim({p}::text, ' '))"
+        return _oracle_digest(ora_text), f"md5({p}::text)"
+    if oracle_type == 'RAW':
+        pg_hex = f"replace({p}::text, '-', '')" if pg_type == 'uuid' else f"encode({p}, 'hex')"
+        return _oracle_digest(f"LOWER(RAWTOHEX({o}))"), f"md5({pg_hex})"
+    if oracle_type in _ORACLE_LOB_TYPES:
+        # LOB contents are not hashed in SQL; their lengths (characters or bytes) are compared
+        return f"TO_CHAR(DBMS_LOB.GETLENGTH({o}))", f"length({p})::text"
+    return None
+
+
+def _row_hash_sql(expressions: list[tuple[str, str]], key_pair: tuple[str, str]) -> tuple[str, str]:
+    """Builds the per-row hash (sum of one 60-bit hash per column group) for both sides."""
+    ora_parts, pg_parts = [], []
+    for start in range(0, len(expressions), _COLUMNS_PER_GROUP):
+        group = expressions[start:start + _COLUMNS_PER_GROUP]
+        # The key ties every column group to its row, so values cannot be swapped between rows
+        ora_text = " || '|' || ".join([f"'{start}'", key_pair[0]] + [f"NVL({ora}, {_NULL})" for ora, _ in group])
+        pg_text = " || '|' || ".join([f"'{start}'", key_pair[1]] + [f"COALESCE({pg}, {_NULL})" for _, pg in group])
+        ora_parts.append(_oracle_hash(ora_text))
+        pg_parts.append(_pg_hash(pg_text))
+    return " + ".join(ora_parts), " + ".join(pg_parts)
+
+
+class _TablePair:
+    """The SQL for one source/target table pair, with the key column used for ranges."""
+
+    def __init__(self, details, source_schema, source_table, target_details, target_schema, target_table):
+        self.details = details
+        self.target_details = target_details
+        self.oracle_table = f"{source_schema.upper()}.{source_table.upper()}"
+        self.pg_table = f"{_pg_ident(target_schema)}.{_pg_ident(target_table)}"
+        self.key = None
+        self.unchecked_columns = []
+
+        owner, table = source_schema.upper(), source_table.upper()
+        with self.oracle_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT column_name, data_type FROM all_tab_columns
+                WHERE owner = :owner AND table_name = :table_name
+                ORDER BY column_id
+                """, owner=owner, table_name=table)
+            # e.g. TIMESTAMP(6) WITH TIME ZONE -> TIMESTAMP WITH TIME ZONE
+            oracle_columns = [(name, re.sub(r'\(\d+\)', '', data_type)) for name, data_type in cursor]
+            key_column = table_splitter.get_single_column_primary_key(cursor, owner, table)
+            cursor.execute("SELECT num_rows FROM all_tables WHERE owner = :owner AND table_name = :table_name",
+                           owner=owner, table_name=table)
+            row = cursor.fetchone()
+            self.num_rows = row[0] if row and row[0] else 0
+
+        with get_target_db_connection(target_details) as pg_conn:
+            pg_column_types = get_postgres_column_types(target_schema, target_table, pg_conn)
+        if not pg_column_types:
+            raise ValueError(f"No columns found for target table {target_schema}.{target_table}")
+
+        oracle_types = dict(oracle_columns)
+        mapping = map_source_columns_to_target([name for name, _ in oracle_columns], list(pg_column_types))
+        expressions = {}
+        for pg_column, index in mapping:
+            ora_column = oracle_columns[index][0]
+            pair = _column_expressions(ora_column, oracle_types[ora_column], pg_column, pg_column_types[pg_column])
+            if pair:
+                expressions[ora_column] = pair
+            else:
+                self.unchecked_columns.append(ora_column)
+        if not expressions:
+            raise ValueError(f"No comparable columns between {self.oracle_table} and {self.pg_table}")
+
+        if key_column in expressions and oracle_types[key_column] in table_splitter._PK_SPLIT_TYPES:
+            ora_key = key_column
+            pg_key = next(pg_column for pg_column, index in mapping if oracle_columns[index][0] == ora_key)
+            text_key = oracle_types[ora_key] in _ORACLE_TEXT_TYPES
+            self.key = {
+                "oracle": f'"{ora_key}"',
+                # Oracle compares strings by binary code point order; PostgreSQL must not use a linguistic collation
+                "pg": f'{_pg_ident(pg_key)} COLLATE "C"' if text_key else _pg_ident(pg_key),
+                "text": expressions[ora_key],
+                # Reported key values: the key itself for strings, the canonical text for numbers
+                "label": (f"RTRIM(\"{ora_key}\", ' ')", f"rtrim({_pg_ident(pg_key)}::text, ' ')") if text_key else expressions[ora_key],
+            }
+        key_pair = self.key["text"] if self.key else ("''", "''")
+        self.oracle_row_hash, self.pg_row_hash = _row_hash_sql(list(expressions.values()), key_pair)
+
+    def oracle_connection(self):
+        d = self.details
+        return oracle_helper.get_oracle_connection(d.user, d.password, d.host, d.port, d.service_name, d.sid)
+
+    def _range(self, side: str, lo, hi) -> tuple[str, dict]:
+        """Contiguous range lo <= key < hi; None leaves that end open."""
+        conditions, binds = ["1 = 1"], {}
+        key = self.key[side] if self.key else None
+        for op, name, value in ((">=", "lo", lo), ("<", "hi", hi)):
+            if value is not None:
+                conditions.append(f"{key} {op} :{name}" if side == "oracle" else f"{key} {op} %({name})s")
+                binds[name] = value
+        return " AND ".join(conditions), binds
+
+    def checksum(self, lo, hi) -> dict:
+        """Row counts and hash sums of a key range on both sides."""
+        predicate, binds = self._range("oracle", lo, hi)
+        with self.oracle_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT COUNT(*), NVL(SUM({self.oracle_row_hash}), 0) FROM {self.oracle_table} WHERE {predicate}", binds)
+            source_rows, source_hash = cursor.fetchone()
+        predicate, binds = self._range("pg", lo, hi)
+        with get_target_db_connection(self.target_details) as pg_conn:
+            cursor = pg_conn.cursor()
+            cursor.execute(f"SELECT count(*), COALESCE(sum({self.pg_row_hash}), 0) FROM {self.pg_table} WHERE {predicate}", binds)
+            target_rows, target_hash = cursor.fetchone()
+            pg_conn.rollback()
+            cursor.close()
+        return {
+            "lo": lo, "hi": hi,
+            "source_rows": int(source_rows), "target_rows": int(target_rows),
+            "match": int(source_rows) == int(target_rows) and int(source_hash) == int(target_hash),
+        }
+
+    def boundaries(self, count: int, lo=None, hi=None, use_target: bool = False) -> list:
+        """Start keys of `count` equal-sized ranges between lo and hi, read from one side."""
+        if use_target:
+            predicate, binds = self._range("pg", lo, hi)
+            binds["count"] = count
+            with get_target_db_connection(self.target_details) as pg_conn:
+                cursor = pg_conn.cursor()
+                cursor.execute(f"""
+                    SELECT min(k) FROM (
+                        SELECT {self.key['pg']} AS k, ntile(%(count)s) OVER (ORDER BY {self.key['pg']}) AS nt
+                        FROM {self.pg_table} WHERE {predicate}
+                    ) t GROUP BY nt ORDER BY 1
+                    """, binds)
+                starts = [row[0] for row in cursor.fetchall()]
+                pg_conn.rollback()
+                cursor.close()
+            return starts
+        predicate, binds = self._range("oracle", lo, hi)
+        binds["chunk_count"] = count
+        with self.oracle_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT MIN(k) FROM (
+                    SELECT {self.key['oracle']} AS k, NTILE(:chunk_count) OVER (ORDER BY {self.key['oracle']}) AS nt
+                    FROM {self.oracle_table} WHERE {predicate}
+                ) GROUP BY nt ORDER BY 1
+                """, binds)
+            return [row[0] for row in cursor]
+
+    def row_hashes(self, lo, hi) -> tuple[dict, dict]:
+        """{key text: row hash} for a small range on both sides."""
+        predicate, binds = self._range("oracle", lo, hi)
+        with self.oracle_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT {self.key['label'][0]}, {self.oracle_row_hash} FROM {self.oracle_table} WHERE {predicate}", binds)
+            source = {key: int(row_hash) for key, row_hash in cursor}
+        predicate, binds = self._range("pg", lo, hi)
+        with get_target_db_connection(self.target_details) as pg_conn:
+            cursor = pg_conn.cursor()
+            cursor.execute(f"SELECT {self.key['label'][1]}, {self.pg_row_hash} FROM {self.pg_table} WHERE {predicate}", binds)
+            target = {key: int(row_hash) for key, row_hash in cursor.fetchall()}
+            pg_conn.rollback()
+            cursor.close()
+        return source, target
+
+
+def _ranges(starts: list, lo, hi) -> list[tuple]:
+    # The first range keeps the parent's lower bound so keys that exist only in the target are covered
+    bounds = [lo] + list(starts[1:]) + [hi]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _drill_down(pair: _TablePair, chunk: dict, mismatches: list):
+    """Narrows a differing range down to individual keys, recording at most _MAX_REPORTED_MISMATCHES."""
+    if len(mismatches) >= _MAX_REPORTED_MISMATCHES:
+        return
+    if max(chunk["source_rows"], chunk["target_rows"]) <= VALIDATION_LEAF_ROWS:
+        source, target = pair.row_hashes(chunk["lo"], chunk["hi"])
+        for key in sorted(source.keys() | target.keys(), key=str):
+            if key not in target:
+                issue = "missing_in_target"
+            elif key not in source:
+                issue = "extra_in_target"
+            elif source[key] != target[key]:
+                issue = "different"
+            else:
+                continue
+            mismatches.append({"key": key, "issue": issue})
+            if len(mismatches) >= _MAX_REPORTED_MISMATCHES:
+                return
+        return
+
+    starts = pair.boundaries(_SUBDIVISIONS, chunk["lo"], chunk["hi"], use_target=chunk["target_rows"] > chunk["source_rows"])
+    if len(starts) <= 1:
+        # Every row has the same key; nothing left to split
+        mismatches.append({"range": [chunk["lo"], chunk["hi"]], "issue": "unsplittable"})
+        return
+    with ThreadPoolExecutor(max_workers=VALIDATION_CONCURRENCY, thread_name_prefix="validate") as executor:
+        sub_chunks = list(executor.map(lambda bounds: pair.checksum(*bounds), _ranges(starts, chunk["lo"], chunk["hi"])))
+    for sub_chunk in sub_chunks:
+        if not sub_chunk["match"]:
+            _drill_down(pair, sub_chunk, mismatches)
+
+
+def validate_table_data(
+    source_details: models.OracleConnectionDetails,
+    source_schema: str,
+    source_table: str,
+    target_details: dict,
+    target_schema: str,
+    target_table: str,
+    chunk_rows: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> dict:
+    """
+    Compares an Oracle table with its PostgreSQL copy without transferring row data: both
+    databases compute row counts and order-independent hash sums per primary key range, and
+    only ranges that differ are narrowed down to the individual keys.
+
+    Column values are rendered to the same text on both sides before hashing (numbers without
+    trailing zeros, dates/timestamps at full precision, CHAR without padding); CLOB/BLOB columns
+    are compared by length only. Tables without a single-column NUMBER/character primary key are
+    compared as one chunk and differences cannot be located.
+
+    Args:
+        source_details: The Oracle connection details.
+        source_schema: The Oracle schema name.
+        source_table: The Oracle table name.
+        target_details: The PostgreSQL credentials (dbname, user, password, host, port).
+        target_schema: The PostgreSQL schema name.
+        target_table: The PostgreSQL table name.
+        chunk_rows: Rows per top-level chunk. Defaults to DATA_VALIDATION_CHUNK_ROWS.
+        concurrency: Chunks compared at once. Defaults to DATA_VALIDATION_CONCURRENCY.
+
+    Returns:
+        A result dict with "status" (MATCH/MISMATCH), chunk and row counts, up to 100
+        mismatching keys and the columns that could not be compared.
+    """
+    started = time.monotonic()
+    chunk_rows = chunk_rows or VALIDATION_CHUNK_ROWS
+    concurrency = concurrency or VALIDATION_CONCURRENCY
+    pair = _TablePair(source_details, source_schema, source_table, target_details, target_schema, target_table)
+
+    if pair.key:
+        chunk_count = max(concurrency, math.ceil(pair.num_rows / chunk_rows))
+        ranges = _ranges(pair.boundaries(chunk_count) or [None], None, None)
+    else:
+        logger.warning(f"{pair.oracle_table} has no single-column key usable for ranges; comparing it as one chunk.")
+        ranges = [(None, None)]
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="validate") as executor:
+        chunks = list(executor.map(lambda bounds: pair.checksum(*bounds), ranges))
+    differing = [chunk for chunk in chunks if not chunk["match"]]
+
+    mismatches = []
+    for chunk in differing:
+        if pair.key:
+            _drill_down(pair, chunk, mismatches)
+    result = {
+        "status": "MISMATCH" if differing else "MATCH",
+        "chunks": len(chunks),
+        "differing_chunks": len(differing),
+        "source_rows": sum(chunk["source_rows"] for chunk in chunks),
+        "target_rows": sum(chunk["target_rows"] for chunk in chunks),
+        "mismatches": mismatches,
+        "unchecked_columns": pair.unchecked_columns,
+        "elapsed_seconds": round(time.monotonic() - started, 1),
+    }
+    logger.info(f"Validated {pair.oracle_table} against {pair.pg_table}: {result['status']} "
+                f"({result['differing_chunks']}/{result['chunks']} chunks differ, {result['elapsed_seconds']}s).")
+    return result
+
+
+def validate_data_migration_job(job_id: str) -> dict:
+    """Validates the tables of a data migration job and stores the result on the job."""
+    job = get_data_migration_job(job_id)
+    if not job:
+        raise ValueError(f"Data migration job {job_id} not found.")
+    record_data_migration_validation(job_id, "IN_PROGRESS")
+    try:
+        result = validate_table_data(
+            models.OracleConnectionDetails(**json.loads(job["source_connection_string"])),
+            job["source_schema_name"],
+            job["source_table_name"],
+            json.loads(job["target_connection_string"]),
+            job["target_schema_name"],
+            job["target_table_name"]
+        )
+    except Exception as e:
+        logger.error(f"Validation failed for job {job_id}: {e}", exc_info=True)
+        record_data_migration_validation(job_id, "FAILED", {"error": str(e)})
+        raise
+    record_data_migration_validation(job_id, result["status"], result)
+    return result
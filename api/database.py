@@ -13,6 +13,7 @@ from api.db_config import (
     get_db_connection,
     get_verification_db_connection,
     get_db_connection_by_db_name,
+    get_target_db_connection,
     _convert_uuids_to_strings,
     initialize_db_pool,
     initialize_verification_db_pool,
@@ -29,7 +30,20 @@ from api.job_repository import (
     get_verified_by_worker_jobs,
     create_data_migration_job,
     update_data_migration_job_status,
+    flush_data_migration_progress,
     log_migration_row_status,
+    record_data_migration_chunk,
+    save_data_migration_chunk_plan,
+    get_data_migration_chunks,
+    record_data_migration_sync,
+    find_latest_data_migration_job,
+    get_parent_data_migration_jobs,
+    save_deferred_ddl,
+    get_deferred_ddl,
+    record_data_migration_validation,
+    get_cached_conversion,
+    save_cached_conversion,
+    save_job_llm_usage,
 
     create_sql_execution_job,
     get_sql_execution_job,
@@ -46,8 +60,14 @@ from api.postgres_utils import (
     create_postgres_database,
     create_user_if_not_exists,
     get_postgres_table_column_names,
+    get_postgres_column_types,
     get_postgres_table_ddl,
     generate_postgres_insert_statements,
+    map_source_columns_to_target,
+    copy_rows_into_table,
+    get_postgres_primary_key_columns,
+    upsert_rows_into_table,
+    get_postgres_foreign_key_dependencies,
 )
 
 # Configure logging
@@ -3,8 +3,11 @@ import psycopg2.extras
 from psycopg2 import pool
 import uuid
 import os
+import time
 import redis
 import logging
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from typing import Optional
 
@@ -24,13 +27,17 @@ valkey_client = redis.Redis(host='localhost', port=6379, db=0)
 db_pool = None
 verification_db_pool = None
 rag_db_pool = None
+# Worker threads (concurrent conversions, parallel table loads) share the job and verification pools
+_pool_init_lock = threading.Lock()
 
 def initialize_db_pool():
     global db_pool
-    if db_pool is None:
+    with _pool_init_lock:
+        if db_pool is not None:
+            return
         logger.info("Initializing main database connection pool...")
         logger.info(f"DB_HOST: {os.getenv('POSTGRES_HOST')}, DB_PORT: {os.getenv('POSTGRES_PORT')}, DB_NAME: {os.getenv('APP_POSTGRES_DB')}")
-        db_pool = pool.SimpleConnectionPool(
+        db_pool = pool.ThreadedConnectionPool(
             1, 20, # minconn, maxconn
             dbname=os.getenv("APP_POSTGRES_DB", "migration_jobs"),
             user=os.getenv("APP_POSTGRES_USER", "migration_jobs"),
@@ -41,9 +48,11 @@ def initialize_db_pool():
 
 def initialize_verification_db_pool():
     global verification_db_pool
-    if verification_db_pool is None:
+    with _pool_init_lock:
+        if verification_db_pool is not None:
+            return
         logger.info("Initializing verification database connection pool...")
-        verification_db_pool = pool.SimpleConnectionPool(
+        verification_db_pool = pool.ThreadedConnectionPool(
             1, 5, # minconn, maxconn - verification might need fewer connections
             dbname=os.getenv("VERIFICATION_DB_NAME", "verification_db"),
             user=os.getenv("VERIFICATION_DB_USER", os.getenv("POSTGRES_USER", "postgres")),
@@ -99,9 +108,130 @@ def get_rag_db_connection():
     finally:
         rag_db_pool.putconn(conn)
 
+# --- Target database pool registry ---
+# One long-lived pool per (host, port, dbname, user), shared by every caller in the process. Up to
+# TARGET_DB_POOL_MAX_SIZE connections per target; further callers wait for one to be returned.
+TARGET_POOL_MAX_SIZE = int(os.getenv("TARGET_DB_POOL_MAX_SIZE", "10"))
+TARGET_POOL_MAX_TARGETS = int(os.getenv("TARGET_DB_POOL_MAX_TARGETS", "16"))
+TARGET_POOL_IDLE_TIMEOUT = float(os.getenv("TARGET_DB_POOL_IDLE_TIMEOUT", "300"))
+TARGET_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("TARGET_DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+TARGET_POOL_ACQUIRE_TIMEOUT = float(os.getenv("TARGET_DB_POOL_ACQUIRE_TIMEOUT", "600"))
+
+_target_pools = OrderedDict()
+_target_pools_lock = threading.Lock()
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+def _close_target_pool(key, entry):
+    logger.info(f"Closing target database pool for {key[3]}@{key[0]}:{key[1]}/{key[2]}")
+    with entry["lock"]:
+        entry["closed"] = True
+        idle, entry["idle"] = entry["idle"], []
+    for conn, _ in idle:
+        _close_quietly(conn)
+
+def _evict_target_pools():
+    """Closes idle pools past the idle timeout and trims cold targets beyond the registry size. Caller holds the lock."""
+    now = time.monotonic()
+    for key, entry in list(_target_pools.items()):
+        if entry["in_use"] == 0 and now - entry["last_used"] > TARGET_POOL_IDLE_TIMEOUT:
+            _close_target_pool(key, _target_pools.pop(key))
+    # Least recently used first; pools with checked-out connections are never evicted
+    for key, entry in list(_target_pools.items()):
+        if len(_target_pools) <= TARGET_POOL_MAX_TARGETS:
+            break
+        if entry["in_use"] == 0:
+            _close_target_pool(key, _target_pools.pop(key))
+
+def _acquire_target_pool(dbname, user, password, host, port):
+    key = (host, str(port), dbname, user)
+    with _target_pools_lock:
+        entry = _target_pools.get(key)
+        if entry is not None and entry["password"] != password and entry["in_use"] == 0:
+            # Credentials changed for this target; rebuild the pool
+            _close_target_pool(key, _target_pools.pop(key))
+            entry = None
+        if entry is None:
+            logger.info(f"Creating target database pool for {user}@{host}:{port}/{dbname}")
+            entry = {
+                "params": {"dbname": dbname, "user": user, "password": password, "host": host, "port": port},
+                "password": password,
+                "idle": [],  # (connection, returned_at), most recently returned last
+                "slots": threading.BoundedSemaphore(TARGET_POOL_MAX_SIZE),
+                "lock": threading.Lock(),
+                "closed": False,
+                "in_use": 0,
+                "last_used": time.monotonic(),
+            }
+            _target_pools[key] = entry
+        _target_pools.move_to_end(key)
+        entry["in_use"] += 1
+        entry["last_used"] = time.monotonic()
+        _evict_target_pools()
+        return entry
+
+def _checkout_healthy_connection(entry):
+    """
+    Takes an idle connection, pinging it if it sat idle past the health check interval, or opens a
+    new one. Waits while the target already has TARGET_DB_POOL_MAX_SIZE connections checked out.
+    """
+    if not entry["slots"].acquire(timeout=TARGET_POOL_ACQUIRE_TIMEOUT):
+        params = entry["params"]
+        raise pool.PoolError(f"Timed out after {TARGET_POOL_ACQUIRE_TIMEOUT:.0f}s waiting for a connection to "
+                             f"{params['user']}@{params['host']}:{params['port']}/{params['dbname']}")
+    try:
+        while True:
+            with entry["lock"]:
+                conn, returned_at = entry["idle"].pop() if entry["idle"] else (None, None)
+            if conn is None:
+                return psycopg2.connect(**entry["params"])
+            if conn.closed:
+                continue
+            if time.monotonic() - returned_at > TARGET_POOL_HEALTH_CHECK_INTERVAL:
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    conn.rollback()
+                except psycopg2.Error:
+                    logger.warning("Discarding stale pooled target database connection.")
+                    _close_quietly(conn)
+                    continue
+            return conn
+    except BaseException:
+        entry["slots"].release()
+        raise
+
+def _release_connection(entry, conn):
+    try:
+        keep = not conn.closed
+        if keep:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            # Callers run arbitrary converted SQL; committed SETs (search_path, session_replication_role,
+            # timeouts), temp tables and advisory locks must not carry over to the next job
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("DISCARD ALL")
+            conn.autocommit = False
+    except psycopg2.Error as e:
+        logger.warning(f"Discarding target database connection on release: {e}")
+        keep = False
+    try:
+        with entry["lock"]:
+            if keep and not entry["closed"]:
+                entry["idle"].append((conn, time.monotonic()))
+                return
+        _close_quietly(conn)
+    finally:
+        entry["slots"].release()
+
 @contextmanager
 def get_db_connection_by_db_name(dbname: str, user: Optional[str] = None, password: Optional[str] = None, host: Optional[str] = None, port: Optional[str] = None):
-    """Gets a connection to a specific database, creating a temporary pool if necessary."""
+    """Gets a connection to a specific database from the process-wide pool registry."""
     
     # Use provided credentials or fallback to environment variables
     db_user = user if user is not None else os.getenv("POSTGRES_USER", "migration_jobs")
@@ -109,25 +239,27 @@ def get_db_connection_by_db_name(dbname: str, user: Optional[str] = None, passwo
     db_host = host if host is not None else os.getenv("POSTGRES_HOST", "localhost")
     db_port = port if port is not None else os.getenv("POSTGRES_PORT", "5432")
 
-    temp_pool = None
+    entry = _acquire_target_pool(dbname, db_user, db_password, db_host, db_port)
     conn = None
     try:
-        # Create a simple, temporary connection pool for this specific database
-        temp_pool = psycopg2.pool.SimpleConnectionPool(
-            1, 1,
-            dbname=dbname,
-            user=db_user,
-            password=db_password,
-            host=db_host,
-            port=db_port
-        )
-        conn = temp_pool.getconn()
+        conn = _checkout_healthy_connection(entry)
         yield conn
     finally:
         if conn:
-            temp_pool.putconn(conn)
-        if temp_pool:
-            temp_pool.closeall()
+            _release_connection(entry, conn)
+        with _target_pools_lock:
+            entry["in_use"] -= 1
+            entry["last_used"] = time.monotonic()
+
+def get_target_db_connection(pg_creds: dict):
+    """Gets a pooled connection for a target PostgreSQL credentials dict (dbname, user, password, host, port)."""
+    return get_db_connection_by_db_name(
+        dbname=pg_creds["dbname"],
+        user=pg_creds.get("user"),
+        password=pg_creds.get("password"),
+        host=pg_creds.get("host"),
+        port=pg_creds.get("port")
+    )
 
 def _convert_uuids_to_strings(data):
     if isinstance(data, dict):
@@ -0,0 +1,223 @@
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import psycopg2
+import psycopg2.errors
+
+from . import sanitizer
+from .db_config import get_target_db_connection
+from .job_repository import get_deferred_ddl, record_deferred_ddl_status
+
+logger = logging.getLogger(__name__)
+
+# Converted DDL is split into a "create" phase that runs before the data load and a "post-load"
+# phase (primary keys, unique constraints, indexes, foreign keys) that runs after it, so COPY
+# does not pay for index maintenance and foreign key checks on every row.
+POST_LOAD_CONCURRENCY = int(os.getenv("DATA_MIGRATION_POST_LOAD_CONCURRENCY", "4"))
+MAINTENANCE_WORK_MEM = os.getenv("DATA_MIGRATION_MAINTENANCE_WORK_MEM", "1GB")
+
+# Indexes and key constraints are built before foreign keys, which need the referenced keys
+POST_LOAD_PHASES = ('index', 'foreign_key')
+
+_IDENTIFIER = r'(?:"[^"]+"|[\w$]+)'
+_QUALIFIED_NAME = rf'{_IDENTIFIER}(?:\.{_IDENTIFIER})?'
+_CREATE_TABLE = re.compile(
+    rf'^\s*CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({_QUALIFIED_NAME})\s*\(', re.I
+)
+_CREATE_INDEX = re.compile(
+    rf'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?:{_IDENTIFIER}\s+)?ON\s+(?:ONLY\s+)?({_QUALIFIED_NAME})', re.I
+)
+_ALTER_TABLE_ADD = re.compile(
+    rf'^\s*ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?({_QUALIFIED_NAME})\s+ADD\s+(?:CONSTRAINT\s+{_IDENTIFIER}\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|EXCLUDE)', re.I
+)
+_TABLE_CONSTRAINT = re.compile(rf'^(?:CONSTRAINT\s+{_IDENTIFIER}\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|EXCLUDE)\b', re.I)
+_REFERENCES_TAIL = (
+    r'(?:\s+MATCH\s+\w+)?'
+    r'(?:\s+ON\s+(?:DELETE|UPDATE)\s+(?:NO\s+ACTION|RESTRICT|CASCADE|SET\s+NULL|SET\s+DEFAULT))*'
+)
+_DEFERRABLE_TAIL = r'(?:\s+(?:NOT\s+)?DEFERRABLE)?(?:\s+INITIALLY\s+(?:DEFERRED|IMMEDIATE))?'
+_COLUMN_CONSTRAINT = re.compile(
+    rf'\s+(CONSTRAINT\s+{_IDENTIFIER}\s+)?'
+    rf'(PRIMARY\s+KEY\b|UNIQUE\b|REFERENCES\s+{_QUALIFIED_NAME}(?:\s*\([^)]*\))?{_REFERENCES_TAIL})'
+    rf'{_DEFERRABLE_TAIL}', re.I
+)
+_NAMED_FOREIGN_KEY = re.compile(rf'\sADD\s+CONSTRAINT\s+({_IDENTIFIER})\s+FOREIGN\s+KEY\b', re.I)
+
+
+def _split_top_level(body: str) -> list[str]:
+    """Splits the element list of a CREATE TABLE on commas outside parentheses and quotes."""
+    elements, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(body):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            elements.append(body[start:i].strip())
+            start = i + 1
+    elements.append(body[start:].strip())
+    return [element for element in elements if element]
+
+
+def _closing_paren(statement: str, open_index: int) -> Optional[int]:
+    depth, quote = 0, None
+    for i in range(open_index, len(statement)):
+        char = statement[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def _phase_of(statement: str) -> str:
+    return 'foreign_key' if re.search(r'\b(FOREIGN\s+KEY|REFERENCES)\b', statement, re.I) else 'index'
+
+
+def _split_create_table(statement: str) -> tuple[str, list[dict]]:
+    """Moves key, unique and foreign key constraints out of a CREATE TABLE into ALTER TABLE statements."""
+    match = _CREATE_TABLE.match(statement)
+    close = _closing_paren(statement, match.end() - 1)
+    if close is None:
+        return statement, []
+    table = match.group(1)
+    kept, deferred = [], []
+    for element in _split_top_level(statement[match.end():close]):
+        if _TABLE_CONSTRAINT.match(element):
+            deferred.append(f"ALTER TABLE {table} ADD {element}")
+            continue
+        column = re.match(_IDENTIFIER, element).group(0)
+        for constraint in _COLUMN_CONSTRAINT.finditer(element):
+            name, kind = constraint.group(1) or '', constraint.group(2)
+            if kind.upper().startswith('REFERENCES'):
+                clause = f"FOREIGN KEY ({column}) {constraint.group(0)[constraint.start(2) - constraint.start():].strip()}"
+            else:
+                clause = f"{kind} ({column})"
+            deferred.append(f"ALTER TABLE {table} ADD {name}{clause}")
+        kept.append(_COLUMN_CONSTRAINT.sub('', element))
+    create = f"{statement[:match.end()]}\n    " + ",\n    ".join(kept) + f"\n{statement[close:]}"
+    return create, [{"table_name": table, "phase": _phase_of(sql), "statement": sql} for sql in deferred]
+
+
+def split_ddl_phases(sql_content: str) -> dict:
+    """
+    Splits converted PostgreSQL DDL into the statements to run before the data load and the
+    ones to run after it.
+
+    Args:
+        sql_content: The converted DDL script.
+
+    Returns:
+        {"create": [statements], "post_load": [{"table_name", "phase", "statement"}]}. Primary
+        key, unique and foreign key constraints are moved out of CREATE TABLE statements into
+        ALTER TABLE statements; CREATE INDEX and ALTER TABLE ... ADD <key constraint> statements
+        are deferred as they are. CHECK and NOT NULL constraints stay in the table definition.
+    """
+    create, post_load = [], []
+    for statement in sanitizer.sanitize_for_execution(sql_content):
+        statement = statement.rstrip().rstrip(';')
+        if _CREATE_TABLE.match(statement):
+            table_ddl, deferred = _split_create_table(statement)
+            create.append(table_ddl)
+            post_load.extend(deferred)
+            continue
+        match = _CREATE_INDEX.match(statement) or _ALTER_TABLE_ADD.match(statement)
+        if match:
+            post_load.append({"table_name": match.group(1), "phase": _phase_of(statement), "statement": statement})
+        else:
+            create.append(statement)
+    return {"create": create, "post_load": post_load}
+
+
+def _execute_post_load(conn, cursor, statement: str):
+    foreign_key = _NAMED_FOREIGN_KEY.search(statement)
+    if foreign_key and not re.search(r'\bNOT\s+VALID\s*$', statement, re.I):
+        # ADD ... NOT VALID holds SHARE ROW EXCLUSIVE on both tables only until its commit; VALIDATE
+        # scans under locks that let foreign keys to the same referenced table be checked in parallel.
+        try:
+            cursor.execute(f"{statement} NOT VALID")
+            conn.commit()
+        except psycopg2.errors.DuplicateObject:
+            # Added by an earlier run whose VALIDATE failed
+            conn.rollback()
+        table = _ALTER_TABLE_ADD.match(statement).group(1)
+        cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {foreign_key.group(1)}")
+    else:
+        cursor.execute(statement)
+
+
+def _build_table(parent_job_id: str, target_details: dict, statements: list[dict], maintenance_work_mem: str) -> int:
+    failed = 0
+    with get_target_db_connection(target_details) as conn:
+        cursor = conn.cursor()
+        # Committed on its own so it survives the rollback of a failed statement
+        cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+        conn.commit()
+        for statement in statements:
+            try:
+                _execute_post_load(conn, cursor, statement["statement"])
+                conn.commit()
+                record_deferred_ddl_status(parent_job_id, statement["statement_id"], "COMPLETED")
+            except psycopg2.Error as e:
+                conn.rollback()
+                failed += 1
+                logger.error(f"Post-load DDL failed for {statement['table_name']}: {e}")
+                record_deferred_ddl_status(parent_job_id, statement["statement_id"], "FAILED", error_message=str(e))
+        cursor.close()
+    return failed
+
+
+def build_post_load_ddl(
+    parent_job_id: str,
+    target_details: dict,
+    concurrency: Optional[int] = None,
+    maintenance_work_mem: Optional[str] = None
+) -> dict:
+    """
+    Builds the deferred indexes and constraints of a parent migration job once its data is
+    loaded. Tables are built in parallel, each on its own connection with a raised
+    maintenance_work_mem; all indexes and key constraints are built before any foreign key.
+    Statements that already completed are skipped, so this can be re-run after a failure.
+
+    Args:
+        parent_job_id: The parent migration job the statements were saved for.
+        target_details: The PostgreSQL credentials.
+        concurrency: Tables built at once. Defaults to DATA_MIGRATION_POST_LOAD_CONCURRENCY.
+        maintenance_work_mem: Memory per index build. Defaults to DATA_MIGRATION_MAINTENANCE_WORK_MEM.
+
+    Returns:
+        {"statements", "failed"} counts for this run.
+    """
+    concurrency = concurrency or POST_LOAD_CONCURRENCY
+    maintenance_work_mem = maintenance_work_mem or MAINTENANCE_WORK_MEM
+    pending = [statement for statement in get_deferred_ddl(parent_job_id) if statement["status"] != "COMPLETED"]
+    failed = 0
+    for phase in POST_LOAD_PHASES:
+        by_table = {}
+        for statement in pending:
+            if statement["phase"] == phase:
+                by_table.setdefault(statement["table_name"], []).append(statement)
+        if not by_table:
+            continue
+        logger.info(f"Parent job {parent_job_id}: building {phase} DDL for {len(by_table)} tables.")
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"post-load-{phase}") as executor:
+            failed += sum(executor.map(
+                lambda statements: _build_table(parent_job_id, target_details, statements, maintenance_work_mem),
+                by_table.values()
+            ))
+    return {"statements": len(pending), "failed": failed}
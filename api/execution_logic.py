@@ -85,7 +85,13 @@ async def initiate_migration_pipeline(migration_details: MigrationDetails) -> st
                 'target_schema': migration_details.target_schema,
                 'object_type': object_type,
                 'object_name': object_name,
-                'data_migration_enabled': migration_details.data_migration_enabled and (object_type == 'TABLE')
+                'data_migration_enabled': migration_details.data_migration_enabled and (object_type == 'TABLE'),
+                'extraction_concurrency': migration_details.extraction_concurrency,
+                'data_sync_mode': migration_details.data_sync_mode,
+                'delta_column': migration_details.delta_column,
+                'lob_inline_threshold': migration_details.lob_inline_threshold,
+                'in_flight_window': migration_details.in_flight_window,
+                'load_strategy': migration_details.load_strategy
             }
 
             try:
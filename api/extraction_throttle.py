@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional
+
+from . import models
+from .db_config import valkey_client
+
+logger = logging.getLogger(__name__)
+
+# Adaptive extraction throttle: every Oracle fetch round trip is timed, and the number of chunks
+# read in parallel and the rows per fetch are adjusted AIMD-style so the smoothed fetch latency
+# stays at the target (additive increase while below it, halving above it). 0 disables it.
+TARGET_LATENCY_MS = float(os.getenv("DATA_MIGRATION_THROTTLE_TARGET_MS", "0"))
+MIN_BATCH_SIZE = int(os.getenv("DATA_MIGRATION_THROTTLE_MIN_BATCH_SIZE", "100"))
+MAX_BATCH_SIZE = int(os.getenv("DATA_MIGRATION_THROTTLE_MAX_BATCH_SIZE", "10000"))
+# Fetches between two decisions; also the EWMA smoothing window
+DECISION_INTERVAL = int(os.getenv("DATA_MIGRATION_THROTTLE_DECISION_INTERVAL", "5"))
+# Hard caps per source, keyed "host:port/service_name" (or "host:port/sid"), e.g.
+# {"erp-prod:1521/ERP": {"target_latency_ms": 150, "max_concurrency": 2, "max_batch_size": 2000}}
+SOURCE_PROFILES = json.loads(os.getenv("DATA_MIGRATION_SOURCE_PROFILES", "{}"))
+
+_HEADROOM = 0.8  # increase only while latency is below 80% of the target
+METRICS_TTL = 7 * 24 * 3600
+
+
+def source_profile(details: models.OracleConnectionDetails) -> dict:
+    """The DATA_MIGRATION_SOURCE_PROFILES entry of a source, or {}."""
+    return SOURCE_PROFILES.get(f"{details.host}:{details.port}/{details.service_name or details.sid}", {})
+
+
+class AdaptiveThrottle:
+    """
+    Shared by all reader threads of one table load. Readers call record() after every fetch and
+    read `concurrency` and `batch_size` before starting a chunk or fetch.
+    """
+
+    def __init__(self, job_id: str, target_latency_ms: float, max_concurrency: int, batch_size: int,
+                 min_batch_size: int = MIN_BATCH_SIZE, max_batch_size: int = MAX_BATCH_SIZE):
+        self.job_id = str(job_id)
+        self.target = target_latency_ms / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max(min_batch_size, max_batch_size)
+        # Start in the middle of the range and let the controller probe upwards
+        self.concurrency = max(1, self.max_concurrency // 2)
+        self.batch_size = min(max(batch_size, min_batch_size), self.max_batch_size)
+        self.latency = None
+        self.decisions = {"increase": 0, "decrease": 0}
+        self.last_decision = None
+        self._samples = 0
+        self._rows = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, rows: int):
+        """Feeds the duration of one fetch round trip that returned `rows` rows."""
+        with self._lock:
+            alpha = 2 / (DECISION_INTERVAL + 1)
+            self.latency = seconds if self.latency is None else alpha * seconds + (1 - alpha) * self.latency
+            self._rows += rows
+            self._samples += 1
+            if self._samples % DECISION_INTERVAL == 0:
+                self._decide()
+
+    def _decide(self):
+        if self.latency > self.target:
+            concurrency = max(1, self.concurrency // 2)
+            batch_size = max(self.min_batch_size, self.batch_size // 2)
+            decision = "decrease"
+        elif self.latency < self.target * _HEADROOM:
+            # One more reader first; larger fetches once the cap is reached
+            if self.concurrency < self.max_concurrency:
+                concurrency, batch_size = self.concurrency + 1, self.batch_size
+            else:
+                concurrency, batch_size = self.concurrency, min(self.max_batch_size, self.batch_size + self.min_batch_size)
+            decision = "increase"
+        else:
+            return
+        if (concurrency, batch_size) == (self.concurrency, self.batch_size):
+            return
+        logger.info(f"Job {self.job_id}: fetch latency {self.latency * 1000:.0f} ms vs target {self.target * 1000:.0f} ms; "
+                    f"{decision} to {concurrency} readers x {batch_size} rows.")
+        self.concurrency, self.batch_size = concurrency, batch_size
+        self.decisions[decision] += 1
+        self.last_decision = decision
+        self._publish()
+
+    def _publish(self):
+        key = f"data_migration:{self.job_id}:throttle"
+        valkey_client.hset(key, mapping={k: str(v) for k, v in self.metrics().items() if v is not None})
+        valkey_client.expire(key, METRICS_TTL)
+
+    def metrics(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        return {
+            "concurrency": self.concurrency,
+            "max_concurrency": self.max_concurrency,
+            "batch_size": self.batch_size,
+            "fetch_latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "target_latency_ms": round(self.target * 1000, 1),
+            "rows_per_second": round(self._rows / elapsed, 1) if elapsed else None,
+            "increases": self.decisions["increase"],
+            "decreases": self.decisions["decrease"],
+            "last_decision": self.last_decision,
+        }
+
+    def flush(self):
+        """Stores the final metrics of the load."""
+        with self._lock:
+            self._publish()
+
+
+def for_source(job_id: str, details: models.OracleConnectionDetails, concurrency: int, batch_size: int) -> Optional[AdaptiveThrottle]:
+    """
+    Builds the throttle for one table load, or None when no latency target is configured for the
+    source. The source profile's caps apply on top of the job's own concurrency.
+    """
+    profile = source_profile(details)
+    target = float(profile.get("target_latency_ms", TARGET_LATENCY_MS))
+    if target <= 0:
+        return None
+    return AdaptiveThrottle(
+        job_id,
+        target,
+        min(concurrency, int(profile.get("max_concurrency", concurrency))),
+        batch_size,
+        max_batch_size=int(profile.get("max_batch_size", MAX_BATCH_SIZE))
+    )
+
+
+def get_throttle_metrics(job_id: str) -> Optional[dict]:
+    """The last published throttle state of a job, or None if it was not throttled."""
+    metrics = valkey_client.hgetall(f"data_migration:{job_id}:throttle")
+    if not metrics:
+        return None
+    return {key.decode(): value.decode() for key, value in metrics.items()}
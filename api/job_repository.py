@@ -78,7 +78,15 @@ def create_data_migration_job(
     target_db_type: str,
     target_connection_string: str,
     target_schema_name: str,
-    target_table_name: str
+    target_table_name: str,
+    extraction_concurrency: Optional[int] = None,
+    sync_mode: str = 'full',
+    delta_column: Optional[str] = None,
+    lob_inline_threshold: Optional[int] = None,
+    parent_job_id: Optional[str] = None,
+    estimated_rows: Optional[int] = None,
+    in_flight_window: Optional[int] = None,
+    load_strategy: str = 'in_place'
 ) -> str:
     with get_db_connection() as conn:
         cursor = conn.cursor()
@@ -97,13 +105,17 @@ def create_data_migration_job(
             INSERT INTO migration_jobs.data_migration_jobs (
                 job_id, status, source_db_type, source_connection_string,
                 source_schema_name, source_table_name, target_db_type,
-                target_connection_string, target_schema_name, target_table_name
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                target_connection_string, target_schema_name, target_table_name,
+                extraction_concurrency, sync_mode, delta_column, lob_inline_threshold,
+                parent_job_id, estimated_rows, in_flight_window, load_strategy
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """,
             (
                 job_id, 'pending', source_db_type, source_connection_string,
                 source_schema_name, source_table_name, target_db_type,
-                target_connection_string, target_schema_name, target_table_name
+                target_connection_string, target_schema_name, target_table_name,
+                extraction_concurrency, sync_mode, delta_column, lob_inline_threshold,
+                parent_job_id, estimated_rows, in_flight_window, load_strategy
             )
         )
         conn.commit()
@@ -123,6 +135,8 @@ def update_data_migration_job_status(
         update_fields = ["status = %s"]
         update_values = [status]
 
+        if status == "IN_PROGRESS":
+            update_fields.append("started_at = COALESCE(started_at, now())")
         if total_rows is not None:
             update_fields.append("total_rows = %s")
             update_values.append(total_rows)
@@ -140,32 +154,283 @@ def update_data_migration_job_status(
         conn.commit()
         cursor.close()
 
-def log_migration_row_status(job_id: str, source_pk_value: str, status: str, error_message: Optional[str] = None):
+def flush_data_migration_progress(job_id: str, migrated_rows: int, failed_rows: int, failed_row_details: Optional[list] = None):
+    """
+    Writes a job's absolute row counters (never moving them backwards) and appends a batch of
+    failed-row details in a single UPDATE.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE migration_jobs.data_migration_jobs
+            SET migrated_rows = GREATEST(COALESCE(migrated_rows, 0), %s),
+                failed_rows = GREATEST(COALESCE(failed_rows, 0), %s),
+                failed_row_details = COALESCE(failed_row_details, '[]'::jsonb) || %s::jsonb
+            WHERE job_id = %s
+            """,
+            (migrated_rows, failed_rows, json.dumps(failed_row_details or [], default=str), job_id)
+        )
+        conn.commit()
+        cursor.close()
+
+def record_data_migration_chunk(
+    job_id: str,
+    chunk_id: int,
+    status: str,
+    row_count: Optional[int] = None,
+    error_message: Optional[str] = None,
+    pending_row_count: Optional[int] = None,
+    target_xid: Optional[int] = None
+):
+    """
+    Inserts or updates the status row for one chunk of a data migration job. pending_row_count and
+    target_xid record a target transaction about to commit the chunk's rows up to pending_row_count.
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        if status == "MIGRATED":
+        cursor.execute(
+            """
+            INSERT INTO migration_jobs.data_migration_chunks
+                (job_id, chunk_id, status, row_count, error_message, pending_row_count, target_xid)
+            VALUES (%s, %s, %s, COALESCE(%s, 0), %s, %s, %s)
+            ON CONFLICT (job_id, chunk_id) DO UPDATE
+            SET status = EXCLUDED.status,
+                row_count = COALESCE(%s, migration_jobs.data_migration_chunks.row_count),
+                error_message = EXCLUDED.error_message,
+                pending_row_count = COALESCE(EXCLUDED.pending_row_count, migration_jobs.data_migration_chunks.pending_row_count),
+                target_xid = COALESCE(EXCLUDED.target_xid, migration_jobs.data_migration_chunks.target_xid),
+                updated_at = now()
+            """,
+            (job_id, chunk_id, status, row_count, error_message, pending_row_count, target_xid, row_count)
+        )
+        conn.commit()
+        cursor.close()
+
+def save_data_migration_chunk_plan(job_id: str, chunks: list[dict]):
+    """Stores the chunk plan of a table load as PENDING chunks. Chunks that already exist are left untouched."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        psycopg2.extras.execute_values(
+            cursor,
+            """
+            INSERT INTO migration_jobs.data_migration_chunks
+                (job_id, chunk_id, status, split_method, predicate, binds, partition_name, key_range)
+            VALUES %s
+            ON CONFLICT (job_id, chunk_id) DO NOTHING
+            """,
+            [
+                (
+                    job_id, chunk["chunk_id"], "PENDING", chunk["method"], chunk["predicate"],
+                    json.dumps(chunk["binds"], default=str), chunk["partition"],
+                    json.dumps(chunk["key_range"], default=str) if chunk["key_range"] is not None else None
+                )
+                for chunk in chunks
+            ]
+        )
+        conn.commit()
+        cursor.close()
+
+def get_data_migration_chunks(job_id: str) -> list[dict]:
+    """Returns the chunk plan and checkpoint status of a table load, ordered by chunk_id."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(
+            """
+            SELECT chunk_id, status, row_count, error_message, split_method, predicate, binds,
+                   partition_name, key_range, pending_row_count, target_xid, updated_at
+            FROM migration_jobs.data_migration_chunks
+            WHERE job_id = %s
+            ORDER BY chunk_id
+            """,
+            (job_id,)
+        )
+        chunks = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+        return chunks
+
+def record_data_migration_sync(job_id: str, watermark: Optional[dict], synced_rows: Optional[int] = None):
+    """
+    Stores the delta sync watermark of a data migration job. synced_rows is given for completed
+    delta syncs and left out when the baseline watermark is recorded by the initial load.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if synced_rows is None:
             cursor.execute(
-                """
-                UPDATE migration_jobs.data_migration_jobs
-                SET migrated_rows = COALESCE(migrated_rows, 0) + 1
-                WHERE job_id = %s
-                """,
-                (job_id,)
+                "UPDATE migration_jobs.data_migration_jobs SET sync_watermark = %s WHERE job_id = %s",
+                (json.dumps(watermark), job_id)
             )
-        elif status == "FAILED":
-            # Append error message to error_details (JSONB array)
+        else:
             cursor.execute(
                 """
                 UPDATE migration_jobs.data_migration_jobs
-                SET failed_rows = COALESCE(failed_rows, 0) + 1,
-                    error_details = COALESCE(error_details, '[]'::jsonb) || jsonb_build_object('pk_value', %s, 'error', %s)
+                SET sync_watermark = %s, last_synced_at = now(), last_sync_rows = %s
                 WHERE job_id = %s
                 """,
-                (source_pk_value, error_message, job_id)
+                (json.dumps(watermark), synced_rows, job_id)
             )
         conn.commit()
         cursor.close()
 
+def find_latest_data_migration_job(
+    source_schema_name: str,
+    source_table_name: str,
+    target_schema_name: str,
+    target_table_name: str,
+    status: str = "COMPLETED"
+) -> Optional[dict]:
+    """Returns the most recent data migration job for a source/target table pair with the given status."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(
+            """
+            SELECT * FROM migration_jobs.data_migration_jobs
+            WHERE source_schema_name = %s AND source_table_name = %s
+              AND target_schema_name = %s AND target_table_name = %s
+              AND status = %s
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            (source_schema_name, source_table_name, target_schema_name, target_table_name, status)
+        )
+        job = cursor.fetchone()
+        cursor.close()
+        return dict(job) if job else None
+
+def get_parent_data_migration_jobs(parent_job_id: str) -> list[dict]:
+    """Returns the table-level data migration jobs scheduled under a parent migration job."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(
+            """
+            SELECT * FROM migration_jobs.data_migration_jobs
+            WHERE parent_job_id = %s
+            ORDER BY created_at
+            """,
+            (str(parent_job_id),)
+        )
+        jobs = [dict(job) for job in cursor.fetchall()]
+        cursor.close()
+        return jobs
+
+def save_deferred_ddl(parent_job_id: str, statements: list[dict]):
+    """Stores the post-load DDL statements (see ddl_phases.split_ddl_phases) of a parent migration job as PENDING."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        psycopg2.extras.execute_values(
+            cursor,
+            """
+            INSERT INTO migration_jobs.deferred_ddl (parent_job_id, statement_id, table_name, phase, statement, status)
+            VALUES %s
+            ON CONFLICT (parent_job_id, statement_id) DO NOTHING
+            """,
+            [
+                (parent_job_id, statement_id, statement["table_name"], statement["phase"], statement["statement"], "PENDING")
+                for statement_id, statement in enumerate(statements, start=1)
+            ]
+        )
+        conn.commit()
+        cursor.close()
+
+def get_deferred_ddl(parent_job_id: str) -> list[dict]:
+    """Returns the post-load DDL statements of a parent migration job in their original order."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(
+            """
+            SELECT statement_id, table_name, phase, statement, status, error_message, updated_at
+            FROM migration_jobs.deferred_ddl
+            WHERE parent_job_id = %s
+            ORDER BY statement_id
+            """,
+            (parent_job_id,)
+        )
+        statements = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+        return statements
+
+def record_deferred_ddl_status(parent_job_id: str, statement_id: int, status: str, error_message: Optional[str] = None):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE migration_jobs.deferred_ddl
+            SET status = %s, error_message = %s, updated_at = now()
+            WHERE parent_job_id = %s AND statement_id = %s
+            """,
+            (status, error_message, parent_job_id, statement_id)
+        )
+        conn.commit()
+        cursor.close()
+
+def record_data_migration_validation(job_id: str, status: str, result: Optional[dict] = None):
+    """Stores the outcome of a source/target data validation (see api/data_validation.py) on the job."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE migration_jobs.data_migration_jobs
+            SET validation_status = %s, validation_result = %s, validated_at = now()
+            WHERE job_id = %s
+            """,
+            (status, json.dumps(result, default=str) if result is not None else None, job_id)
+        )
+        conn.commit()
+        cursor.close()
+
+def get_cached_conversion(cache_key: str) -> Optional[str]:
+    """Returns the converted SQL stored under cache_key, counting the hit, or None."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE migration_jobs.conversion_cache
+            SET hit_count = hit_count + 1, last_hit_at = now()
+            WHERE cache_key = %s
+            RETURNING converted_sql
+            """,
+            (cache_key,)
+        )
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+    return row[0] if row else None
+
+def save_cached_conversion(cache_key: str, model_name: str, prompt_version: str, normalized_sql: str, converted_sql: str):
+    """Stores (or replaces) a verified conversion in the conversion cache."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO migration_jobs.conversion_cache (cache_key, model_name, prompt_version, normalized_sql, converted_sql)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE SET converted_sql = EXCLUDED.converted_sql, created_at = now()
+            """,
+            (cache_key, model_name, prompt_version, normalized_sql, converted_sql)
+        )
+        conn.commit()
+        cursor.close()
+
+def save_job_llm_usage(job_id: str, llm_usage: dict):
+    """Stores the Ollama token counts and timings a conversion job used (see ai_converter.USAGE_FIELDS)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE migration_jobs.jobs SET llm_usage = %s WHERE job_id = %s",
+            (json.dumps(llm_usage), job_id)
+        )
+        conn.commit()
+        cursor.close()
+
+def log_migration_row_status(job_id: str, source_pk_value: str, status: str, error_message: Optional[str] = None):
+    # Counted through the buffered progress counters rather than one UPDATE per row
+    from api import migration_progress
+    if status == "MIGRATED":
+        migration_progress.record_rows(job_id, 1)
+    elif status == "FAILED":
+        migration_progress.record_rows(job_id, 0, [{"pk_value": source_pk_value, "error": error_message}])
+
 
 def create_job(
     job_type: str,
@@ -0,0 +1,46 @@
+import os
+import logging
+
+from prometheus_client import Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Prometheus histograms of every Ollama generation, labelled by model and operation. The API serves
+# them on /metrics; worker.py, which runs the conversions, serves them on LLM_METRICS_PORT (0 = off).
+# Tokens per second of a model: rate(llm_output_tokens_sum) / rate(llm_eval_seconds_sum).
+METRICS_PORT = int(os.getenv("LLM_METRICS_PORT", "9108"))
+
+_LABELS = ("model", "operation")
+_TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 320, 640)
+
+PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Prompt tokens evaluated per generation", _LABELS, buckets=_TOKEN_BUCKETS)
+OUTPUT_TOKENS = Histogram("llm_output_tokens", "Tokens generated per generation", _LABELS, buckets=_TOKEN_BUCKETS)
+LOAD_SECONDS = Histogram("llm_load_seconds", "Time Ollama spent loading the model", _LABELS, buckets=_SECONDS_BUCKETS)
+PROMPT_EVAL_SECONDS = Histogram("llm_prompt_eval_seconds", "Time Ollama spent evaluating the prompt", _LABELS, buckets=_SECONDS_BUCKETS)
+EVAL_SECONDS = Histogram("llm_eval_seconds", "Time Ollama spent generating the output", _LABELS, buckets=_SECONDS_BUCKETS)
+SERVER_SECONDS = Histogram("llm_server_seconds", "Total duration reported by Ollama", _LABELS, buckets=_SECONDS_BUCKETS)
+# Wall time from the request to the last chunk; the part not covered by llm_server_seconds is queueing and transfer
+REQUEST_SECONDS = Histogram("llm_request_seconds", "Client wall time of a generation", _LABELS, buckets=_SECONDS_BUCKETS)
+SLOT_WAIT_SECONDS = Histogram("llm_slot_wait_seconds", "Time waited for a generation slot of the model in this process", _LABELS, buckets=_SECONDS_BUCKETS)
+
+
+def observe(model_name: str, operation: str, usage: dict):
+    """Records one generation; usage holds the fields of ai_converter.USAGE_FIELDS."""
+    labels = (model_name, operation)
+    PROMPT_TOKENS.labels(*labels).observe(usage["prompt_tokens"])
+    OUTPUT_TOKENS.labels(*labels).observe(usage["output_tokens"])
+    LOAD_SECONDS.labels(*labels).observe(usage["load_ms"] / 1000)
+    PROMPT_EVAL_SECONDS.labels(*labels).observe(usage["prompt_eval_ms"] / 1000)
+    EVAL_SECONDS.labels(*labels).observe(usage["eval_ms"] / 1000)
+    SERVER_SECONDS.labels(*labels).observe(usage["server_ms"] / 1000)
+    REQUEST_SECONDS.labels(*labels).observe(usage["wall_ms"] / 1000)
+    SLOT_WAIT_SECONDS.labels(*labels).observe(usage["slot_wait_ms"] / 1000)
+
+
+def start_metrics_server():
+    """Serves the metrics of this process over HTTP on LLM_METRICS_PORT."""
+    if METRICS_PORT <= 0:
+        return
+    start_http_server(METRICS_PORT)
+    logger.info(f"Serving LLM metrics on port {METRICS_PORT}.")
@@ -3,6 +3,7 @@ from fastapi import FastAPI, Response, Request, Form
 import json
 from opentelemetry.trace import get_current_span
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 
 from .routes import (conversion_routes, job_routes, oracle_routes,
                      execution_routes, migration_routes)
@@ -47,6 +48,9 @@ app.include_router(oracle_routes.router, prefix="/api/oracle")
 app.include_router(execution_routes.router, prefix="/api")
 app.include_router(migration_routes.router, prefix="/api")
 
+# Prometheus metrics of this process, e.g. the LLM histograms of schema comparisons (see llm_metrics)
+app.mount("/metrics", make_asgi_app())
+
 import os
 
 @app.get("/api/default-connection-details/{db_type}", tags=["connection"])
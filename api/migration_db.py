@@ -1,8 +1,12 @@
 import psycopg2
+import psycopg2.extras
 import os
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 import json
 from . import database # Import the database module
+from . import migration_progress
 
 load_dotenv()
 
@@ -48,7 +52,44 @@ def migrate_sql_execution_jobs(conn=None):
     else:
         print("Connection provided, skipping connection setup.")
 
-def process_row_for_insertion(job_id: str, row_data: list, column_names: list):
+# Target column types that need a Python-side adapter before psycopg2 can bind the value.
+_TYPE_ADAPTERS = {
+    'bytea': lambda value: psycopg2.Binary(value) if isinstance(value, (bytes, bytearray)) else value,
+    'json': lambda value: psycopg2.extras.Json(value) if isinstance(value, (dict, list)) else value,
+    'jsonb': lambda value: psycopg2.extras.Json(value) if isinstance(value, (dict, list)) else value,
+}
+
+INSERT_PLAN_CACHE_SIZE = int(os.getenv("DATA_MIGRATION_INSERT_PLAN_CACHE_SIZE", "64"))
+# Deliveries of a row batch before it is dead-lettered instead of requeued (kept below RabbitMQ's
+# default quorum queue delivery limit, so the consumer sees the last attempt)
+ROW_BATCH_MAX_ATTEMPTS = int(os.getenv("DATA_MIGRATION_ROW_BATCH_MAX_ATTEMPTS", "5"))
+
+class InsertPlan:
+    """
+    A compiled insert plan for one data migration job and source column layout: the target
+    connection details, the INSERT template, the source index for every target column and
+    the adapters for columns whose values need converting before binding.
+    """
+
+    def __init__(self, job_id: str, target_connection: dict, insert_sql: str, source_indexes: list[int], adapters: dict):
+        self.job_id = job_id
+        self.target_connection = target_connection
+        self.insert_sql = insert_sql
+        self.source_indexes = source_indexes
+        # position in the bound tuple -> adapter; only columns that need one
+        self.adapters = adapters
+
+    def bind(self, rows: list) -> list[tuple]:
+        values = [[row[i] for i in self.source_indexes] for row in rows]
+        for position, adapter in self.adapters.items():
+            for row_values in values:
+                row_values[position] = adapter(row_values[position])
+        return [tuple(row_values) for row_values in values]
+
+_insert_plans = OrderedDict()
+_insert_plans_lock = threading.Lock()
+
+def _compile_insert_plan(job_id: str, column_names: list) -> InsertPlan:
     job = database.get_data_migration_job(job_id)
     if not job:
         raise ValueError(f"Migration job with ID {job_id} not found.")
@@ -57,54 +98,114 @@ def process_row_for_insertion(job_id: str, row_data: list, column_names: list):
     target_schema = job["target_schema_name"]
     target_table = job["target_table_name"]
 
-    # Get actual PostgreSQL column names
-    pg_column_names = database.get_postgres_table_column_names(
-        schema_name=target_schema,
-        table_name=target_table,
-        dbname=target_connection_string["dbname"]
-    )
+    with database.get_target_db_connection(target_connection_string) as conn:
+        pg_column_types = database.get_postgres_column_types(target_schema, target_table, conn)
+        conn.rollback()
 
-    if not pg_column_names:
+    if not pg_column_types:
         raise ValueError(f"No columns found for target table {target_schema}.{target_table}")
 
-    # Create a mapping from Oracle column names (case-insensitive) to actual PostgreSQL column names
-    oracle_col_map = {col.lower(): col for col in column_names}
-    pg_col_map = {col.lower(): col for col in pg_column_names}
-
-    insert_cols_for_pg = []
-    values_for_pg = []
-
-    for oracle_col_original in column_names:
-        oracle_col_lower = oracle_col_original.lower()
-        if oracle_col_lower in pg_col_map:
-            # Use the actual PostgreSQL column name, and ensure it's quoted
-            insert_cols_for_pg.append(f'"{pg_col_map[oracle_col_lower]}"')
-            # Find the index of the original Oracle column name to get the correct value
-            original_oracle_index = column_names.index(oracle_col_original)
-            values_for_pg.append(row_data[original_oracle_index])
-        else:
-            # Log a warning if an Oracle column doesn't have a matching PostgreSQL column
-            print(f"[WARNING] Oracle column '{oracle_col_original}' not found in target PostgreSQL table '{target_schema}.{target_table}'. Skipping.")
-
-    if not insert_cols_for_pg:
+    # Map Oracle column names (case-insensitive) to actual PostgreSQL column names
+    column_mapping = database.map_source_columns_to_target(column_names, list(pg_column_types))
+    if not column_mapping:
         raise ValueError(f"No matching columns found between source and target for job {job_id}.")
 
+    insert_cols_for_pg = [f'"{pg_col}"' for pg_col, _ in column_mapping]
+    adapters = {
+        position: _TYPE_ADAPTERS[pg_column_types[pg_col]]
+        for position, (pg_col, _) in enumerate(column_mapping)
+        if pg_column_types[pg_col] in _TYPE_ADAPTERS
+    }
+
     # Construct the INSERT statement with correctly quoted PostgreSQL column names
-    insert_sql = f"INSERT INTO \"{target_schema}\".\"{target_table}\" ({', '.join(insert_cols_for_pg)}) VALUES ({', '.join(['%s'] * len(values_for_pg))})"
-
-    with database.get_db_connection_by_db_name(
-        dbname=target_connection_string["dbname"],
-        user=target_connection_string["user"],
-        password=target_connection_string["password"],
-        host=target_connection_string["host"],
-        port=target_connection_string["port"]
-    ) as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(insert_sql, tuple(values_for_pg))
-        conn.commit()
-    
-    # Increment migrated_rows count, passing the current status
-    database.update_data_migration_job_status(job_id, status=job["status"], migrated_rows=job["migrated_rows"] + 1)
+    insert_sql = f"INSERT INTO \"{target_schema}\".\"{target_table}\" ({', '.join(insert_cols_for_pg)}) VALUES %s"
+    return InsertPlan(job_id, target_connection_string, insert_sql, [index for _, index in column_mapping], adapters)
+
+def get_insert_plan(job_id: str, column_names: list) -> InsertPlan:
+    """Returns the cached insert plan for a job, compiling it on first use (LRU-evicted)."""
+    key = (str(job_id), tuple(column_names))
+    with _insert_plans_lock:
+        plan = _insert_plans.get(key)
+        if plan is not None:
+            _insert_plans.move_to_end(key)
+            return plan
+
+    plan = _compile_insert_plan(job_id, column_names)
+    with _insert_plans_lock:
+        _insert_plans[key] = plan
+        _insert_plans.move_to_end(key)
+        while len(_insert_plans) > INSERT_PLAN_CACHE_SIZE:
+            _insert_plans.popitem(last=False)
+    return plan
+
+def invalidate_insert_plans(job_id: str):
+    """Drops every cached insert plan for a job, e.g. when it finishes or fails."""
+    with _insert_plans_lock:
+        for key in [key for key in _insert_plans if key[0] == str(job_id)]:
+            del _insert_plans[key]
+
+def process_row_for_insertion(job_id: str, row_data: list, column_names: list):
+    process_row_batch_for_insertion(job_id, [row_data], column_names)
+
+def _insert_rows_individually(cursor, plan: InsertPlan, values_for_pg: list) -> list[dict]:
+    """Inserts rows one at a time under savepoints, returning the details of the rows that failed."""
+    failures = []
+    for offset, row_values in enumerate(values_for_pg):
+        cursor.execute("SAVEPOINT row_insert")
+        try:
+            psycopg2.extras.execute_values(cursor, plan.insert_sql, [row_values])
+            cursor.execute("RELEASE SAVEPOINT row_insert")
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT row_insert")
+            failures.append({"row_offset": offset, "error": str(e).strip()})
+    return failures
+
+def process_row_batch_for_insertion(job_id: str, rows: list, column_names: list, first_row_number: int = 1):
+    """
+    Inserts a batch of source rows into the job's target table in one round trip and one commit.
+    If the batch hits a data or constraint error, rows are retried one by one so that only the
+    offending rows are recorded as failed.
+    """
+    plan = get_insert_plan(job_id, column_names)
+    values_for_pg = plan.bind(rows)
+    failures = []
+
+    try:
+        with database.get_target_db_connection(plan.target_connection) as conn:
+            with conn.cursor() as cursor:
+                try:
+                    psycopg2.extras.execute_values(cursor, plan.insert_sql, values_for_pg, page_size=len(values_for_pg))
+                except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                    print(f"[WARNING] Batch insert for job {job_id} failed ({e}). Retrying rows individually.")
+                    conn.rollback()
+                    failures = _insert_rows_individually(cursor, plan, values_for_pg)
+            conn.commit()
+    except Exception:
+        # The target table may have changed underneath the plan; recompile on the next attempt
+        invalidate_insert_plans(job_id)
+        raise
+
+    for failure in failures:
+        failure["row_number"] = first_row_number + failure.pop("row_offset")
+    # The batch is committed: a bookkeeping error must not reach the consumer, which would requeue
+    # the batch and insert its rows again
+    try:
+        migration_progress.release_batch(job_id)
+        if migration_progress.record_rows(job_id, len(rows) - len(failures), failures):
+            invalidate_insert_plans(job_id)
+    except Exception as e:
+        print(f"[ERROR] Row batch for job {job_id} (rows from {first_row_number}) was committed, but its progress could not be recorded: {e}")
+
+def abandon_row_batch(job_id: str, row_count: int, first_row_number: int, error: str):
+    """
+    Gives up on a row batch that is being dead-lettered: frees its in-flight window slot and
+    counts its rows as failed, so the job can still complete.
+    """
+    migration_progress.release_batch(job_id)
+    failures = [{"row_number": first_row_number + offset, "error": f"Row batch dead-lettered: {error}"}
+                for offset in range(row_count)]
+    if migration_progress.record_rows(job_id, 0, failures):
+        invalidate_insert_plans(job_id)
 
 def create_main_jobs_table():
     """Ensures the main migration_jobs.jobs table exists."""
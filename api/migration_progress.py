@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+from .db_config import valkey_client
+from .job_repository import flush_data_migration_progress, update_data_migration_job_status
+
+logger = logging.getLogger(__name__)
+
+# Live row counters for data migration jobs are kept in Valkey (INCRBY from every consumer) and
+# written to migration_jobs.data_migration_jobs at most every FLUSH_INTERVAL seconds or FLUSH_ROWS
+# rows per worker, instead of one UPDATE on the job row per inserted row. Failed-row details are
+# queued on a Valkey list shared by all workers, so whichever worker flushes writes every worker's
+# failures and a crashed worker loses none.
+FLUSH_INTERVAL = float(os.getenv("DATA_MIGRATION_PROGRESS_FLUSH_INTERVAL", "5"))
+FLUSH_ROWS = int(os.getenv("DATA_MIGRATION_PROGRESS_FLUSH_ROWS", "10000"))
+COUNTER_TTL = 7 * 24 * 3600
+# Row batch messages a job may have published but not yet loaded; the extractor waits while the
+# window is full so the row insert queue cannot outgrow the broker's memory.
+DEFAULT_IN_FLIGHT_BATCHES = int(os.getenv("DATA_MIGRATION_IN_FLIGHT_BATCHES", "50"))
+IN_FLIGHT_POLL_INTERVAL = float(os.getenv("DATA_MIGRATION_IN_FLIGHT_POLL_INTERVAL", "0.5"))
+# A full window that does not drain for this long means the loaders are gone or batches were dead-lettered
+IN_FLIGHT_STALL_TIMEOUT = float(os.getenv("DATA_MIGRATION_IN_FLIGHT_STALL_TIMEOUT", "900"))
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _key(job_id: str, counter: str) -> str:
+    return f"data_migration:{job_id}:{counter}"
+
+
+def _read_counts(job_id: str) -> tuple[int, int, Optional[int]]:
+    migrated, failed, total = valkey_client.mget(
+        _key(job_id, "migrated_rows"), _key(job_id, "failed_rows"), _key(job_id, "total_rows")
+    )
+    return int(migrated or 0), int(failed or 0), int(total) if total is not None else None
+
+
+def _pending_state(job_id: str) -> dict:
+    state = _pending.get(job_id)
+    if state is None:
+        state = {"unflushed_rows": 0, "last_flush": time.monotonic()}
+        _pending[job_id] = state
+    return state
+
+
+def _take_failures(job_id: str) -> list[str]:
+    pipe = valkey_client.pipeline(transaction=True)
+    pipe.lrange(_key(job_id, "failures"), 0, -1)
+    pipe.delete(_key(job_id, "failures"))
+    return pipe.execute()[0]
+
+
+def flush(job_id: str):
+    """Writes the job's current Valkey counters and every worker's queued failed-row details to Postgres."""
+    job_id = str(job_id)
+    with _pending_lock:
+        state = _pending_state(job_id)
+        state["unflushed_rows"] = 0
+        state["last_flush"] = time.monotonic()
+    queued = _take_failures(job_id)
+    migrated, failed, _ = _read_counts(job_id)
+    try:
+        flush_data_migration_progress(job_id, migrated, failed, [json.loads(detail) for detail in queued])
+    except Exception:
+        # Put them back for the next flush
+        if queued:
+            valkey_client.lpush(_key(job_id, "failures"), *reversed(queued))
+        raise
+
+
+def _maybe_flush(job_id: str, rows: int):
+    with _pending_lock:
+        state = _pending_state(job_id)
+        state["unflushed_rows"] += rows
+        due = state["unflushed_rows"] >= FLUSH_ROWS or time.monotonic() - state["last_flush"] >= FLUSH_INTERVAL
+    if due:
+        flush(job_id)
+
+
+def _complete_if_done(job_id: str, migrated: int, failed: int, total: Optional[int]) -> bool:
+    if total is None or migrated + failed < total:
+        return False
+    flush(job_id)
+    update_data_migration_job_status(job_id, "COMPLETED")
+    valkey_client.delete(_key(job_id, "in_flight_batches"))
+    with _pending_lock:
+        _pending.pop(job_id, None)
+    logger.info(f"Data migration job {job_id} completed: {migrated} rows migrated, {failed} rows failed.")
+    return True
+
+
+def record_rows(job_id: str, migrated_rows: int, failed_row_details: Optional[list[dict]] = None) -> bool:
+    """
+    Counts a processed batch for a job. Failed-row details are queued in Valkey with the counters
+    and appended to the job in one statement per flush.
+
+    Returns:
+        True if this batch completed the job (every published row is accounted for).
+    """
+    job_id = str(job_id)
+    failed_row_details = failed_row_details or []
+    pipe = valkey_client.pipeline()
+    pipe.incrby(_key(job_id, "migrated_rows"), migrated_rows)
+    pipe.incrby(_key(job_id, "failed_rows"), len(failed_row_details))
+    pipe.get(_key(job_id, "total_rows"))
+    if failed_row_details:
+        pipe.rpush(_key(job_id, "failures"), *[json.dumps(detail, default=str) for detail in failed_row_details])
+    for counter in ("migrated_rows", "failed_rows", "failures"):
+        pipe.expire(_key(job_id, counter), COUNTER_TTL)
+    migrated, failed, total = pipe.execute()[:3]
+
+    if _complete_if_done(job_id, migrated, failed, int(total) if total is not None else None):
+        return True
+    _maybe_flush(job_id, migrated_rows + len(failed_row_details))
+    return False
+
+
+def set_total_rows(job_id: str, total_rows: int) -> bool:
+    """
+    Records the job's total once every row has been published. The total is stored before the
+    counters are read, so either this call or the consumer's record_rows sees the final count.
+
+    Returns:
+        True if the consumers had already finished every row.
+    """
+    job_id = str(job_id)
+    valkey_client.set(_key(job_id, "total_rows"), total_rows, ex=COUNTER_TTL)
+    update_data_migration_job_status(job_id, "IN_PROGRESS", total_rows=total_rows)
+    migrated, failed, total = _read_counts(job_id)
+    return _complete_if_done(job_id, migrated, failed, total)
+
+
+def get_counts(job_id: str) -> dict:
+    """Returns the live (not yet flushed) counters for a job."""
+    migrated, failed, total = _read_counts(str(job_id))
+    return {
+        "migrated_rows": migrated,
+        "failed_rows": failed,
+        "total_rows": total,
+        "in_flight_batches": int(valkey_client.get(_key(str(job_id), "in_flight_batches")) or 0),
+    }
+
+
+class InFlightWindow:
+    """
+    Bounds the row batch messages of one job that are published but not yet loaded. The
+    publisher calls acquire() before every message (and release() if the publish fails); the
+    loader calls release_batch() once the batch is committed or dead-lettered. The count lives
+    in Valkey, so loaders on any worker release it.
+    """
+
+    def __init__(self, job_id: str, limit: Optional[int] = None, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            job_id: The data migration job.
+            limit: Maximum unloaded batches. Defaults to DATA_MIGRATION_IN_FLIGHT_BATCHES.
+            sleep: Called while waiting; pass the publishing BlockingConnection's sleep so it
+                keeps answering broker heartbeats.
+        """
+        self.job_id = str(job_id)
+        self.limit = limit or DEFAULT_IN_FLIGHT_BATCHES
+        self.waited_seconds = 0.0
+        self._sleep = sleep
+        self._key = _key(self.job_id, "in_flight_batches")
+
+    def in_flight(self) -> int:
+        return int(valkey_client.get(self._key) or 0)
+
+    def acquire(self):
+        """Waits until the job has fewer than `limit` batches in flight, then counts one more."""
+        in_flight = self.in_flight()
+        if in_flight >= self.limit:
+            started = last_progress = time.monotonic()
+            while in_flight >= self.limit:
+                self._sleep(IN_FLIGHT_POLL_INTERVAL)
+                current = self.in_flight()
+                if current < in_flight:
+                    last_progress = time.monotonic()
+                elif time.monotonic() - last_progress > IN_FLIGHT_STALL_TIMEOUT:
+                    raise RuntimeError(
+                        f"Data migration job {self.job_id}: {current} row batches unloaded for "
+                        f"{IN_FLIGHT_STALL_TIMEOUT:.0f}s; are the row insert consumers running?"
+                    )
+                in_flight = current
+            self.waited_seconds += time.monotonic() - started
+        pipe = valkey_client.pipeline()
+        pipe.incr(self._key)
+        pipe.expire(self._key, COUNTER_TTL)
+        pipe.execute()
+
+    def release(self):
+        """Gives back a slot taken by acquire() for a message that was not published."""
+        release_batch(self.job_id)
+
+
+def release_batch(job_id: str):
+    """Marks one row batch of a job as loaded or given up on, freeing a slot in its in-flight window."""
+    key = _key(str(job_id), "in_flight_batches")
+    # Never below zero, e.g. for batches published before the window existed
+    if valkey_client.decr(key) < 0:
+        valkey_client.set(key, 0, ex=COUNTER_TTL)
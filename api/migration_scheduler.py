@@ -0,0 +1,364 @@
+import os
+import math
+import json
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
+
+import oracledb
+
+from . import models
+from . import oracle_helper
+from . import bulk_loader
+from . import table_splitter
+from . import ddl_phases
+from .db_config import get_target_db_connection
+from .job_repository import (
+    get_job,
+    update_job_status,
+    create_data_migration_job,
+    update_data_migration_job_status,
+    get_parent_data_migration_jobs,
+)
+from .postgres_utils import get_postgres_foreign_key_dependencies
+
+logger = logging.getLogger(__name__)
+
+# Global budget shared by every table load a scheduler runs in this process: parallel extraction
+# sessions on the source and COPY connections on the target.
+ORACLE_SESSION_BUDGET = int(os.getenv("DATA_MIGRATION_ORACLE_SESSION_BUDGET", "8"))
+POSTGRES_CONNECTION_BUDGET = int(os.getenv("DATA_MIGRATION_POSTGRES_CONNECTION_BUDGET", "4"))
+_POLL_INTERVAL = 5
+
+_FINISHED_STATUSES = ("COMPLETED", "FAILED")
+
+
+class ConnectionBudget:
+    """Counts the Oracle sessions and PostgreSQL connections held by running table loads."""
+
+    def __init__(self, oracle_sessions: int, postgres_connections: int):
+        self.oracle_sessions = oracle_sessions
+        self.postgres_connections = postgres_connections
+        self._used_oracle_sessions = 0
+        self._used_postgres_connections = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self, oracle_sessions: int, postgres_connections: int = 1) -> bool:
+        with self._condition:
+            if (self._used_oracle_sessions + oracle_sessions > self.oracle_sessions
+                    or self._used_postgres_connections + postgres_connections > self.postgres_connections):
+                return False
+            self._used_oracle_sessions += oracle_sessions
+            self._used_postgres_connections += postgres_connections
+            return True
+
+    def release(self, oracle_sessions: int, postgres_connections: int = 1):
+        with self._condition:
+            self._used_oracle_sessions -= oracle_sessions
+            self._used_postgres_connections -= postgres_connections
+            self._condition.notify_all()
+
+    def wait(self, timeout: float):
+        """Blocks until some budget is released or the timeout expires."""
+        with self._condition:
+            self._condition.wait(timeout)
+
+
+connection_budget = ConnectionBudget(ORACLE_SESSION_BUDGET, POSTGRES_CONNECTION_BUDGET)
+
+
+def get_table_statistics(details: models.OracleConnectionDetails, schema_name: str, table_names: list[str]) -> dict[str, dict]:
+    """
+    Reads optimizer row counts and segment sizes for the given tables.
+
+    Returns:
+        {table name: {"num_rows", "bytes"}}; tables without statistics report 0.
+    """
+    owner = schema_name.upper()
+    wanted = {name.upper() for name in table_names}
+    with oracle_helper.get_oracle_connection(details.user, details.password, details.host, details.port, details.service_name, details.sid) as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT t.table_name, NVL(t.num_rows, 0), NVL(s.bytes, 0)
+                FROM all_tables t
+                LEFT JOIN (
+                    SELECT segment_name, SUM(bytes) AS bytes FROM dba_segments
+                    WHERE owner = :owner AND segment_type LIKE 'TABLE%'
+                    GROUP BY segment_name
+                ) s ON s.segment_name = t.table_name
+                WHERE t.owner = :owner
+                """, owner=owner)
+        except oracledb.Error as e:
+            # No SELECT on dba_segments; order by row counts alone
+            logger.warning(f"Could not read segment sizes for {owner}: {e}")
+            cursor.execute("SELECT table_name, NVL(num_rows, 0), 0 FROM all_tables WHERE owner = :owner", owner=owner)
+        statistics = {name: {"num_rows": int(num_rows), "bytes": int(size)} for name, num_rows, size in cursor if name in wanted}
+    return {name: statistics.get(name.upper(), {"num_rows": 0, "bytes": 0}) for name in table_names}
+
+
+def order_tables(tables: list[dict], dependencies: dict[str, set[str]]) -> list[dict]:
+    """
+    Returns the order tables would start in with an unlimited budget: biggest first (by segment
+    size, then row count), but never before the tables they reference.
+
+    Args:
+        tables: Dicts with "table", "num_rows" and "bytes".
+        dependencies: {lower-case table name: lower-case names of the tables it references}.
+    """
+    remaining = sorted(tables, key=lambda t: (t["bytes"], t["num_rows"]), reverse=True)
+    names = {t["table"].lower() for t in tables}
+    started = set()
+    ordered = []
+    while remaining:
+        ready = [t for t in remaining if not (dependencies.get(t["table"].lower(), set()) & names) - started]
+        # A foreign key cycle leaves nothing ready; break it at the biggest table
+        table = ready[0] if ready else remaining[0]
+        remaining.remove(table)
+        started.add(table["table"].lower())
+        ordered.append(table)
+    return ordered
+
+
+def _waits_on_dependency(table: dict, dependencies: dict[str, set[str]], statuses: dict[str, str]) -> bool:
+    """Whether table references a table of the schedule that has not completed or failed."""
+    blocking = dependencies.get(table["table"].lower(), set()) & set(statuses)
+    return any(statuses[name] not in ("COMPLETED", "FAILED") for name in blocking)
+
+
+def _sessions_for(num_rows: int, concurrency: int) -> int:
+    # Tables smaller than a couple of chunks gain nothing from more sessions
+    chunks = max(1, math.ceil(num_rows / bulk_loader.DEFAULT_CHUNK_SIZE))
+    return max(1, min(concurrency, chunks, ORACLE_SESSION_BUDGET))
+
+
+def plan_parent_migration(
+    parent_job_id: str,
+    source_details: models.OracleConnectionDetails,
+    source_schema: str,
+    target_details: dict,
+    target_schema: str,
+    statistics: dict[str, dict],
+    extraction_concurrency: Optional[int] = None,
+    load_strategy: str = 'in_place'
+) -> list[dict]:
+    """
+    Creates a data migration job per table under the parent job, with its row estimate. Tables
+    that already have a job (a redelivered or restarted schedule) keep it, so their chunk
+    checkpoints are reused.
+
+    Returns:
+        The parent's data migration jobs.
+    """
+    existing = {job["source_table_name"].upper() for job in get_parent_data_migration_jobs(parent_job_id)}
+    for table in statistics:
+        if table.upper() not in existing:
+            create_data_migration_job(
+                source_db_type="Oracle",
+                source_connection_string=json.dumps(source_details.dict()),
+                source_schema_name=source_schema,
+                source_table_name=table,
+                target_db_type="PostgreSQL",
+                target_connection_string=json.dumps(target_details),
+                target_schema_name=target_schema,
+                target_table_name=table,
+                extraction_concurrency=extraction_concurrency,
+                parent_job_id=parent_job_id,
+                estimated_rows=statistics[table]["num_rows"],
+                load_strategy=load_strategy
+            )
+    return get_parent_data_migration_jobs(parent_job_id)
+
+
+def _run_table(job: dict, source_details, target_details: dict, sessions: int) -> int:
+    try:
+        return bulk_loader.migrate_table_data(
+            str(job["job_id"]),
+            source_details,
+            job["source_schema_name"],
+            job["source_table_name"],
+            target_details,
+            job["target_schema_name"],
+            job["target_table_name"],
+            concurrency=sessions,
+            delta_column=job["delta_column"],
+            lob_threshold=job["lob_inline_threshold"],
+            load_strategy=job["load_strategy"] or 'in_place'
+        )
+    finally:
+        connection_budget.release(sessions)
+
+
+def run_parent_migration(
+    parent_job_id: str,
+    tables: list[str],
+    extraction_concurrency: Optional[int] = None,
+    respect_foreign_keys: bool = True,
+    maintenance_work_mem: Optional[str] = None,
+    load_strategy: str = 'in_place'
+) -> dict:
+    """
+    Loads many tables of a parent migration job concurrently with bulk_loader, within the global
+    budget of Oracle sessions and PostgreSQL connections.
+
+    Tables start biggest first, so the longest loads do not end up running alone at the end.
+    When the target schema has foreign keys, a table only starts once every table it references
+    has completed, and tables depending on a failed table are skipped.
+
+    Args:
+        parent_job_id: A migration_jobs.jobs job holding the connection details and schemas.
+        tables: The source table names; target tables have the same names.
+        extraction_concurrency: Oracle sessions per table. Defaults to DATA_MIGRATION_EXTRACTION_CONCURRENCY.
+        respect_foreign_keys: Follow the target's foreign key order.
+        maintenance_work_mem: Passed to ddl_phases.build_post_load_ddl, which builds the
+            parent's deferred indexes and constraints once every table is loaded.
+        load_strategy: bulk_loader load strategy of the per-table jobs ('in_place' or 'staging_swap').
+
+    Returns:
+        The parent progress (see get_parent_progress), with the post-load build counts.
+    """
+    parent_job = get_job(parent_job_id)
+    if not parent_job:
+        raise ValueError(f"Migration job {parent_job_id} not found.")
+    source_details = models.OracleConnectionDetails(**parent_job["source_connection_details"])
+    target_details = parent_job["target_connection_details"]
+    concurrency = extraction_concurrency or table_splitter.DEFAULT_EXTRACTION_CONCURRENCY
+    update_job_status(parent_job_id, 'processing')
+
+    try:
+        statistics = get_table_statistics(source_details, parent_job["source_schema"], tables)
+        jobs = plan_parent_migration(parent_job_id, source_details, parent_job["source_schema"], target_details,
+                                     parent_job["target_schema"], statistics, extraction_concurrency, load_strategy)
+        dependencies = {}
+        if respect_foreign_keys:
+            with get_target_db_connection(target_details) as pg_conn:
+                dependencies = get_postgres_foreign_key_dependencies(parent_job["target_schema"], pg_conn)
+
+        # Failed tables of an earlier run are retried
+        statuses = {job["source_table_name"].lower(): "COMPLETED" if job["status"] == "COMPLETED" else "PENDING" for job in jobs}
+        pending = order_tables([
+            {**statistics.get(job["source_table_name"], {"num_rows": job["estimated_rows"] or 0, "bytes": 0}),
+             "table": job["source_table_name"], "job": job}
+            for job in jobs if job["status"] != "COMPLETED"
+        ], dependencies)
+        logger.info(f"Parent job {parent_job_id}: loading {len(pending)} tables in order {[t['table'] for t in pending]}.")
+
+        with ThreadPoolExecutor(max_workers=max(1, POSTGRES_CONNECTION_BUDGET), thread_name_prefix=f"load-{parent_job_id[:8]}") as executor:
+            running = {}
+            while pending or running:
+                # A foreign key cycle (e.g. EMPLOYEES <-> DEPARTMENTS) leaves every pending table waiting
+                # on another pending one; break it at the first pending table, as order_tables does
+                forced = None
+                if not running and all(_waits_on_dependency(table, dependencies, statuses) for table in pending):
+                    forced = pending[0]
+                    logger.warning(f"Parent job {parent_job_id}: foreign key cycle among {[t['table'] for t in pending]}; "
+                                   f"starting {forced['table']} before the tables it references.")
+                for table in list(pending):
+                    blocking = dependencies.get(table["table"].lower(), set()) & set(statuses)
+                    failed = [name for name in blocking if statuses[name] == "FAILED"]
+                    if failed:
+                        pending.remove(table)
+                        statuses[table["table"].lower()] = "FAILED"
+                        update_data_migration_job_status(str(table["job"]["job_id"]), "FAILED",
+                                                         error_details=f"Skipped: referenced table(s) {sorted(failed)} failed to load.")
+                        continue
+                    if table is not forced and any(statuses[name] != "COMPLETED" for name in blocking):
+                        continue
+                    sessions = _sessions_for(table["num_rows"], concurrency)
+                    if not connection_budget.try_acquire(sessions):
+                        # Keep the budget for the biggest ready table instead of filling it with small ones
+                        break
+                    pending.remove(table)
+                    statuses[table["table"].lower()] = "IN_PROGRESS"
+                    future = executor.submit(_run_table, table["job"], source_details, target_details, sessions)
+                    running[future] = table
+
+                if running:
+                    done, _ = wait(running, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        table = running.pop(future)
+                        try:
+                            future.result()
+                            statuses[table["table"].lower()] = "COMPLETED"
+                        except Exception as e:
+                            # migrate_table_data already marked the table's job FAILED
+                            logger.error(f"Parent job {parent_job_id}: table {table['table']} failed: {e}")
+                            statuses[table["table"].lower()] = "FAILED"
+                elif pending:
+                    # Budget held by another parent job's loads
+                    connection_budget.wait(_POLL_INTERVAL)
+
+        post_load = ddl_phases.build_post_load_ddl(parent_job_id, target_details, maintenance_work_mem=maintenance_work_mem)
+        progress = get_parent_progress(parent_job_id)
+        progress["post_load"] = post_load
+        if progress["tables_failed"] or post_load["failed"]:
+            update_job_status(parent_job_id, 'failed', error_message=(
+                f"{progress['tables_failed']} of {progress['tables_total']} tables failed to load; "
+                f"{post_load['failed']} of {post_load['statements']} post-load DDL statements failed."
+            ))
+        else:
+            update_job_status(parent_job_id, 'completed')
+        return progress
+    except Exception as e:
+        logger.error(f"Parent migration job {parent_job_id} failed: {e}", exc_info=True)
+        update_job_status(parent_job_id, 'failed', error_message=str(e))
+        raise
+
+
+def get_parent_progress(parent_job_id: str) -> Optional[dict]:
+    """
+    Aggregates the table-level data migration jobs of a parent job into overall progress and an
+    ETA extrapolated from the row rate since the first table started.
+
+    Returns:
+        None if the parent has no data migration jobs.
+    """
+    jobs = get_parent_data_migration_jobs(parent_job_id)
+    if not jobs:
+        return None
+
+    counts = {"COMPLETED": 0, "FAILED": 0, "IN_PROGRESS": 0}
+    expected_rows = migrated_rows = 0
+    tables = []
+    for job in jobs:
+        status = job["status"]
+        counts[status] = counts.get(status, 0) + 1
+        job_migrated = job["migrated_rows"] or 0
+        # Finished tables count their actual rows; others the larger of estimate and progress
+        job_expected = job_migrated if status in _FINISHED_STATUSES else max(job["estimated_rows"] or 0, job_migrated)
+        expected_rows += job_expected
+        migrated_rows += job_migrated
+        tables.append({
+            "job_id": str(job["job_id"]),
+            "table": job["source_table_name"],
+            "status": status,
+            "estimated_rows": job["estimated_rows"],
+            "migrated_rows": job_migrated,
+        })
+
+    started = [job["started_at"] for job in jobs if job["started_at"]]
+    elapsed = (datetime.datetime.now(datetime.timezone.utc) - min(started)).total_seconds() if started else 0
+    rows_per_second = migrated_rows / elapsed if elapsed > 0 else None
+    unfinished = len(jobs) - counts["COMPLETED"] - counts["FAILED"]
+    if not unfinished:
+        eta_seconds = 0
+    elif rows_per_second:
+        eta_seconds = round(max(expected_rows - migrated_rows, 0) / rows_per_second)
+    else:
+        eta_seconds = None
+
+    return {
+        "tables_total": len(jobs),
+        "tables_completed": counts["COMPLETED"],
+        "tables_failed": counts["FAILED"],
+        "tables_in_progress": counts["IN_PROGRESS"],
+        "tables_pending": unfinished - counts["IN_PROGRESS"],
+        "estimated_rows": expected_rows,
+        "migrated_rows": migrated_rows,
+        "percent_complete": round(100.0 * migrated_rows / expected_rows, 1) if expected_rows else (100.0 if not unfinished else 0.0),
+        "rows_per_second": round(rows_per_second, 1) if rows_per_second else None,
+        "eta_seconds": eta_seconds,
+        "tables": tables,
+    }
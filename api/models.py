@@ -6,10 +6,12 @@ from uuid import UUID
 class ConversionInput(BaseModel):
     sql: str
     job_type: str = 'sql'
+    bypass_cache: bool = False # Convert with the model even if a cached or rule-based conversion exists
 
 class ReconversionInput(BaseModel):
     job_id: str
     new_original_sql: Optional[str] = None
+    bypass_cache: bool = True # A reconversion asks for a new result by default
 
 class AggregateJobsInput(BaseModel):
     job_ids: List[str]
@@ -44,6 +46,24 @@ class DataMigrationRequest(BaseModel):
     source_table: str
     destination_schema: str
     destination_table: str
+    extraction_concurrency: Optional[int] = None # Parallel Oracle sessions per table; defaults to DATA_MIGRATION_EXTRACTION_CONCURRENCY
+    delta_column: Optional[str] = None # Change-tracking column for later delta syncs; defaults to ORA_ROWSCN
+    in_flight_window: Optional[int] = None # Unloaded row batch messages before extraction pauses; defaults to DATA_MIGRATION_IN_FLIGHT_BATCHES
+
+class MultiTableMigrationRequest(BaseModel):
+    oracle_credentials: OracleConnectionDetails
+    postgres_credentials: PostgresConnectionDetails
+    source_schema: str
+    destination_schema: str
+    tables: List[str] # Target tables have the same names
+    extraction_concurrency: Optional[int] = None # Parallel Oracle sessions per table, within DATA_MIGRATION_ORACLE_SESSION_BUDGET
+    respect_foreign_keys: bool = True # Load referenced tables before the tables that reference them
+    post_load_sql: Optional[str] = None # Index/constraint DDL built after the load (post_load_sql of /ddl/phases)
+    maintenance_work_mem: Optional[str] = None # Per index build, e.g. '2GB'; defaults to DATA_MIGRATION_MAINTENANCE_WORK_MEM
+    load_strategy: str = 'in_place' # 'staging_swap' loads an UNLOGGED copy of each table and swaps it in when complete
+
+class DdlPhasesRequest(BaseModel):
+    sql: str # Converted PostgreSQL DDL
 
 class ExtractRequest(BaseModel):
     connection_details: OracleConnectionDetails
@@ -71,6 +91,12 @@ class MigrationDetails(BaseModel):
     target_schema: str # Added target_schema for clarity
     selected_objects: List[MigrationObject]
     data_migration_enabled: bool = False # New flag for data migration
+    extraction_concurrency: Optional[int] = None # Parallel Oracle sessions per table during data migration
+    data_sync_mode: str = 'full' # 'full' copies the table, 'delta' upserts rows changed since the last completed load
+    delta_column: Optional[str] = None # Timestamp/version column for delta syncs; defaults to ORA_ROWSCN
+    lob_inline_threshold: Optional[int] = None # CLOB/BLOB values above this size are streamed in chunks
+    in_flight_window: Optional[int] = None # Row insert load mode: unloaded row batch messages before extraction pauses
+    load_strategy: str = 'in_place' # COPY load mode: 'staging_swap' loads an UNLOGGED copy of the table and swaps it in when complete
 
 class OracleSchemas(BaseModel):
     schemas: list[str]
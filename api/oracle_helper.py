@@ -1,10 +1,22 @@
+import os
+import time
 import logging
 import oracledb
 from . import models
+from . import type_mapping
 from contextlib import contextmanager
+from typing import Iterator
 
 logging.basicConfig(level=logging.INFO)
 
+# Rows per round trip when streaming table data; also used for cursor.arraysize/prefetchrows.
+DEFAULT_FETCH_BATCH_SIZE = int(os.getenv("ORACLE_FETCH_BATCH_SIZE", "1000"))
+# LOBs up to this many bytes/characters are fetched inline with the row; larger ones stay LOB
+# locators that are read in LOB_READ_CHUNK_SIZE pieces by the consumer.
+DEFAULT_LOB_INLINE_THRESHOLD = int(os.getenv("DATA_MIGRATION_LOB_INLINE_THRESHOLD", "32768"))
+LOB_READ_CHUNK_SIZE = int(os.getenv("DATA_MIGRATION_LOB_CHUNK_SIZE", "1048576"))
+LOB_TYPES = ('CLOB', 'NCLOB', 'BLOB')
+
 @contextmanager
 def get_oracle_connection(user, password, host, port, service_name=None, sid=None):
     """Establishes a connection to the Oracle database and yields it.
@@ -201,48 +213,170 @@ def get_oracle_table_ddl(details: models.OracleConnectionDetails, schema_name: s
         logging.error(f"Error fetching Oracle DDL for {schema_name}.{table_name}: {e}")
         return None
 
-def fetch_oracle_table_data_batched(
+def read_lob_chunks(lob, chunk_size: int = LOB_READ_CHUNK_SIZE) -> Iterator:
+    """Reads an Oracle LOB locator in chunk_size pieces (characters for CLOBs, bytes for BLOBs)."""
+    offset = 1
+    while True:
+        data = lob.read(offset, chunk_size)
+        if not data:
+            return
+        yield data
+        offset += len(data)
+
+def get_lob_columns(details: models.OracleConnectionDetails, schema_name: str, table_name: str) -> list[str]:
+    """Returns the CLOB/NCLOB/BLOB columns of a table."""
+    with get_oracle_connection(details.user, details.password, details.host, details.port, details.service_name, details.sid) as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT column_name FROM all_tab_columns
+            WHERE owner = :owner AND table_name = :table_name AND data_type IN ('CLOB', 'NCLOB', 'BLOB')
+            ORDER BY column_id
+            """, owner=schema_name.upper(), table_name=table_name.upper())
+        return [row[0] for row in cursor]
+
+def _lob_aware_select_list(cursor, owner: str, table_name: str) -> tuple[str, list[int]]:
+    """
+    Builds a select list in which every LOB column appears twice: inline when it is at most
+    :lob_threshold long, and as a trailing "LOB#n" locator column when it is longer.
+
+    Returns:
+        The select list ('*' if the table has no LOBs) and the positions of the LOB columns.
+    """
+    cursor.execute("""
+        SELECT column_name, data_type FROM all_tab_columns
+        WHERE owner = :owner AND table_name = :table_name
+        ORDER BY column_id
+        """, owner=owner, table_name=table_name)
+    columns = cursor.fetchall()
+    lob_positions = [position for position, (_, data_type) in enumerate(columns) if data_type in LOB_TYPES]
+    if not lob_positions:
+        return "*", []
+
+    select_list = []
+    for position, (column_name, _) in enumerate(columns):
+        if position in lob_positions:
+            select_list.append(f'CASE WHEN DBMS_LOB.GETLENGTH("{column_name}") <= :lob_threshold THEN "{column_name}" END AS "{column_name}"')
+        else:
+            select_list.append(f'"{column_name}"')
+    for number, position in enumerate(lob_positions):
+        column_name = columns[position][0]
+        select_list.append(f'CASE WHEN DBMS_LOB.GETLENGTH("{column_name}") > :lob_threshold THEN "{column_name}" END AS "{type_mapping.LOB_LOCATOR_PREFIX}{number}"')
+    return ", ".join(select_list), lob_positions
+
+def _merge_lob_locators(rows: list, column_count: int, lob_positions: list[int]) -> list:
+    merged = []
+    for row in rows:
+        values = list(row[:column_count])
+        for number, position in enumerate(lob_positions):
+            if values[position] is None:
+                values[position] = row[column_count + number]
+        merged.append(values)
+    return merged
+
+def stream_oracle_table_batches(
     details: models.OracleConnectionDetails,
     schema_name: str,
     table_name: str,
-    batch_size: int = 1000
-) -> tuple[list[str], list[list]]:
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    chunk: dict | None = None,
+    lob_threshold: int | None = None,
+    throttle=None
+) -> Iterator[list]:
     """
-    Fetches data from a specified Oracle table in batches.
+    Streams data from an Oracle table in batches while keeping memory bounded by one batch.
+
+    The cursor's arraysize and prefetchrows are tuned to batch_size so every fetchmany()
+    is a single round trip. The Oracle connection stays open until the generator is
+    exhausted or closed.
 
     Args:
         details: The Oracle connection details.
         schema_name: The name of the schema the table belongs to.
         table_name: The name of the table.
         batch_size: The number of rows to fetch in each batch.
-
-    Returns:
-        A tuple containing:
-        - A list of column names.
-        - A list of lists, where each inner list represents a batch of rows.
+        chunk: Optional chunk from table_splitter.split_table; only its partition or
+            key/ROWID range is read.
+        lob_threshold: CLOB/BLOB values up to this size are fetched inline as str/bytes;
+            larger ones are returned as LOB locators, which stay valid until the generator
+            is closed. Defaults to DATA_MIGRATION_LOB_INLINE_THRESHOLD.
+        throttle: Optional extraction_throttle.AdaptiveThrottle; every fetch is timed into it
+            and its current batch_size replaces batch_size.
+
+    Yields:
+        First the column metadata (cursor.description entries; entry[0] is the column name),
+        then one list of row tuples per batch.
     """
-    all_rows = []
-    column_names = []
+    total_rows = 0
     try:
         with get_oracle_connection(details.user, details.password, details.host, details.port, details.service_name, details.sid) as connection:
             cursor = connection.cursor()
-            query = f"SELECT * FROM {schema_name.upper()}.{table_name.upper()}"
-            cursor.execute(query)
-
-            # Get column names
-            column_names = [col[0] for col in cursor.description]
+            cursor.arraysize = batch_size
+            cursor.prefetchrows = batch_size
+            cursor.outputtypehandler = type_mapping.output_type_handler
+            select_list, lob_positions = _lob_aware_select_list(cursor, schema_name.upper(), table_name.upper())
+            query = f"SELECT {select_list} FROM {schema_name.upper()}.{table_name.upper()}"
+            binds = {}
+            if chunk and chunk.get("partition"):
+                query += f' PARTITION ("{chunk["partition"]}")'
+            if chunk and chunk.get("predicate"):
+                query += f" WHERE {chunk['predicate']}"
+                binds = dict(chunk.get("binds", {}))
+            if chunk and chunk.get("method") == 'none':
+                # An unsplit table is committed in row-count steps and resumed by row offset, so the order must repeat
+                query += " ORDER BY ROWID"
+            if lob_positions:
+                binds["lob_threshold"] = lob_threshold or DEFAULT_LOB_INLINE_THRESHOLD
+            cursor.execute(query, binds)
+
+            description = list(cursor.description)
+            column_count = len(description) - len(lob_positions)
+            yield description[:column_count]
 
             while True:
-                rows = cursor.fetchmany(batch_size)
+                if throttle is None:
+                    rows = cursor.fetchmany(batch_size)
+                else:
+                    cursor.arraysize = throttle.batch_size
+                    started = time.monotonic()
+                    rows = cursor.fetchmany(cursor.arraysize)
+                    throttle.record(time.monotonic() - started, len(rows))
                 if not rows:
                     break
-                all_rows.extend(rows)
-        logging.info(f"Successfully fetched {len(all_rows)} rows from Oracle table {schema_name}.{table_name}.")
-        return column_names, all_rows
+                total_rows += len(rows)
+                yield _merge_lob_locators(rows, column_count, lob_positions) if lob_positions else rows
+        logging.info(f"Successfully streamed {total_rows} rows from Oracle table {schema_name}.{table_name}.")
     except oracledb.Error as e:
         logging.error(f"Error fetching data from Oracle table {schema_name}.{table_name}: {e}")
         raise RuntimeError(f"Error fetching data from Oracle table: {e}") from e
 
+def fetch_oracle_table_data_batched(
+    details: models.OracleConnectionDetails,
+    schema_name: str,
+    table_name: str,
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE
+) -> tuple[list[str], list[list]]:
+    """
+    Fetches all data from a specified Oracle table, reading it in batches.
+    This materialises the whole table in memory; prefer stream_oracle_table_batches for large tables.
+
+    Args:
+        details: The Oracle connection details.
+        schema_name: The name of the schema the table belongs to.
+        table_name: The name of the table.
+        batch_size: The number of rows to fetch in each batch.
+
+    Returns:
+        A tuple containing:
+        - A list of column names.
+        - A list of all rows.
+    """
+    batches = stream_oracle_table_batches(details, schema_name, table_name, batch_size)
+    column_names = [col[0] for col in next(batches)]
+    all_rows = []
+    for rows in batches:
+        all_rows.extend(rows)
+    return column_names, all_rows
+
 def test_oracle_ddl_extraction(details: models.OracleConnectionDetails):
     """
     Tests the connection and DDL extraction from an Oracle database.
@@ -1,12 +1,14 @@
 import psycopg2
 import psycopg2.extras
-import uuid
-import datetime
 import logging
+import itertools
 import sqlparse
-from typing import Optional, List
+from typing import Optional, List, Iterable, Iterator
+from psycopg2.sql import SQL, Identifier
 
 from api.db_config import get_db_connection, get_db_connection_by_db_name
+from api import type_mapping
+from api.oracle_helper import read_lob_chunks
 
 logger = logging.getLogger(__name__)
 
@@ -107,37 +109,26 @@ def create_postgres_database(host, port, user, password, dbname_to_create):
     Connects to a PostgreSQL server (using the 'postgres' database) and creates a new database.
     """
     print(f"[DEBUG] Attempting to connect to create DB with: user={user}, password={password}, host={host}, port={port}")
-    conn = None
-
-
     try:
         # Connect to the default 'postgres' database to create a new one
-        conn = psycopg2.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            dbname="postgres"  # Connect to default database
-        )
-        conn.autocommit = True  # Autocommit for CREATE DATABASE
-        cursor = conn.cursor()
+        with get_db_connection_by_db_name("postgres", user=user, password=password, host=host, port=port) as conn:
+            conn.autocommit = True  # Autocommit for CREATE DATABASE
+            cursor = conn.cursor()
 
-        # Check if the database already exists
-        cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{dbname_to_create}'")
-        if cursor.fetchone():
-            logger.info(f"Database '{dbname_to_create}' already exists. Skipping creation.")
-            return True
+            # Check if the database already exists
+            cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{dbname_to_create}'")
+            if cursor.fetchone():
+                logger.info(f"Database '{dbname_to_create}' already exists. Skipping creation.")
+                cursor.close()
+                return True
 
-        cursor.execute(f"CREATE DATABASE {dbname_to_create}")
-        logger.info(f"Database '{dbname_to_create}' created successfully.")
-        cursor.close()
-        return True
+            cursor.execute(f"CREATE DATABASE {dbname_to_create}")
+            logger.info(f"Database '{dbname_to_create}' created successfully.")
+            cursor.close()
+            return True
     except psycopg2.Error as e:
         logger.error(f"Error creating database '{dbname_to_create}': {e}", exc_info=True)
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def create_user_if_not_exists(host, port, admin_user, admin_password, user_to_create, password_for_new_user):
     """
@@ -175,25 +166,266 @@ def create_user_if_not_exists(host, port, admin_user, admin_password, user_to_cr
             conn.close()
 
 
-def get_postgres_table_column_names(schema_name: str, table_name: str, dbname: Optional[str] = None) -> List[str]:
+def get_postgres_table_column_names(schema_name: str, table_name: str, dbname: Optional[str] = None, conn=None) -> List[str]:
     """
     Retrieves the actual column names (preserving their case) for a given PostgreSQL table.
+    If conn is provided, it is used instead of opening a new connection.
+    """
+    query = """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position;
     """
+    if conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (schema_name, table_name))
+        column_names = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return column_names
+
     connection_context = get_db_connection_by_db_name(dbname) if dbname else get_db_connection()
 
     with connection_context as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position;
-        """, (schema_name, table_name))
+        cursor.execute(query, (schema_name, table_name))
 
         column_names = [row[0] for row in cursor.fetchall()]
         cursor.close()
         return column_names
 
+def get_postgres_column_types(schema_name: str, table_name: str, conn) -> dict[str, str]:
+    """Returns {column name: information_schema data_type} for a PostgreSQL table, in column order."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position;
+        """,
+        (schema_name, table_name)
+    )
+    column_types = dict(cursor.fetchall())
+    cursor.close()
+    return column_types
+
+def map_source_columns_to_target(source_column_names: list[str], target_column_names: list[str]) -> list[tuple[str, int]]:
+    """
+    Matches source (Oracle) column names to target (PostgreSQL) column names, ignoring case.
+
+    Returns:
+        A list of (target column name, source column index) pairs in source column order.
+        Source columns without a matching target column are skipped with a warning.
+    """
+    target_col_map = {col.lower(): col for col in target_column_names}
+    mapping = []
+    for index, source_col in enumerate(source_column_names):
+        target_col = target_col_map.get(source_col.lower())
+        if target_col is None:
+            logger.warning(f"Source column '{source_col}' not found in target PostgreSQL table. Skipping.")
+            continue
+        mapping.append((target_col, index))
+    return mapping
+
+# Escapes for PostgreSQL's COPY text format (backslash is the escape character).
+_COPY_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+def _copy_text_value(value) -> str:
+    """Formats a single Python value for PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex input format, with the backslash itself escaped for COPY
+        return '\\\\x' + bytes(value).hex()
+    return str(value).translate(_COPY_TEXT_ESCAPES)
+
+def _copy_escaped_text(value) -> str:
+    return value.translate(_COPY_TEXT_ESCAPES)
+
+def _copy_bytea(value) -> str:
+    return '\\\\x' + bytes(value).hex()
+
+def _copy_clob(value):
+    if isinstance(value, str):
+        return _copy_escaped_text(value)
+    # A large CLOB still behind its locator: stream it in chunks instead of reading it whole
+    return (chunk.translate(_COPY_TEXT_ESCAPES) for chunk in read_lob_chunks(value))
+
+def _copy_blob(value):
+    if isinstance(value, (bytes, bytearray)):
+        return _copy_bytea(value)
+    return itertools.chain(['\\\\x'], (chunk.hex() for chunk in read_lob_chunks(value)))
+
+# Per-column COPY formatters for non-NULL values whose Python type is known up front
+# (see type_mapping.copy_value_kinds); 'any' inspects the value. The LOB formatters return
+# an iterator of pieces instead of a string when the value is an unread LOB locator.
+COPY_TEXT_FORMATTERS = {
+    'plain': str,
+    'text': _copy_escaped_text,
+    'bytes': _copy_bytea,
+    'clob': _copy_clob,
+    'blob': _copy_blob,
+    'any': _copy_text_value,
+}
+
+class CopyRowStream:
+    """
+    A read-only file-like object that encodes rows into COPY text format lazily,
+    so psycopg2's copy_expert can stream them without building the whole payload in memory.
+    With value_kinds (one COPY_TEXT_FORMATTERS key per column) each column is formatted
+    without a per-value type check, and LOB locators are streamed chunk by chunk.
+    """
+
+    def __init__(self, rows: Iterable, value_kinds: Optional[list[str]] = None):
+        self._rows = iter(rows)
+        self._buffer = ''
+        self.row_count = 0
+        self._formatters = [COPY_TEXT_FORMATTERS[kind] for kind in value_kinds] if value_kinds else None
+        self._has_lobs = bool(value_kinds) and any(kind in ('clob', 'blob') for kind in value_kinds)
+        self._pieces = self._encode_rows()
+
+    def _encode_rows(self) -> Iterator[str]:
+        for row in self._rows:
+            self.row_count += 1
+            if self._formatters is None:
+                yield '\t'.join(_copy_text_value(value) for value in row) + '\n'
+            elif not self._has_lobs:
+                yield '\t'.join(
+                    '\\N' if value is None else formatter(value)
+                    for value, formatter in zip(row, self._formatters)
+                ) + '\n'
+            else:
+                line = []
+                for position, (value, formatter) in enumerate(zip(row, self._formatters)):
+                    if position:
+                        line.append('\t')
+                    formatted = '\\N' if value is None else formatter(value)
+                    if isinstance(formatted, str):
+                        line.append(formatted)
+                    else:
+                        yield ''.join(line)
+                        line = []
+                        yield from formatted
+                line.append('\n')
+                yield ''.join(line)
+
+    def read(self, size: int = -1) -> str:
+        pieces = [self._buffer]
+        buffered = len(self._buffer)
+        while size < 0 or buffered < size:
+            piece = next(self._pieces, None)
+            if piece is None:
+                break
+            pieces.append(piece)
+            buffered += len(piece)
+        data = ''.join(pieces)
+        if size < 0 or len(data) <= size:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+def copy_rows_into_table(conn, schema_name: str, table_name: str, column_names: list[str], rows: Iterable,
+                         value_kinds: Optional[list[str]] = None) -> int:
+    """
+    Streams rows into a PostgreSQL table with COPY ... FROM STDIN.
+    The caller owns the transaction (commit/rollback) on conn.
+    value_kinds optionally names the COPY_TEXT_FORMATTERS entry for each column.
+
+    Returns:
+        The number of rows copied.
+    """
+    copy_sql = SQL("COPY {}.{} ({}) FROM STDIN").format(
+        Identifier(schema_name),
+        Identifier(table_name),
+        SQL(', ').join(Identifier(col) for col in column_names)
+    )
+    stream = CopyRowStream(rows, value_kinds)
+    cursor = conn.cursor()
+    try:
+        cursor.copy_expert(copy_sql, stream)
+    finally:
+        cursor.close()
+    return stream.row_count
+
+def get_postgres_primary_key_columns(schema_name: str, table_name: str, conn) -> List[str]:
+    """Returns the primary key columns of a PostgreSQL table in key order (empty if it has none)."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT a.attname
+        FROM pg_index i
+        JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, position) ON true
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+        WHERE i.indrelid = (SELECT oid FROM pg_class
+                            WHERE relname = %s AND relnamespace = quote_ident(%s)::regnamespace)
+          AND i.indisprimary
+        ORDER BY k.position
+        """,
+        (table_name, schema_name)
+    )
+    key_columns = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return key_columns
+
+def get_postgres_foreign_key_dependencies(schema_name: str, conn) -> dict[str, set[str]]:
+    """
+    Returns {table: tables it references} for the foreign keys between tables of a schema.
+    Self-references are left out.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT child.relname, parent.relname
+        FROM pg_constraint k
+        JOIN pg_class child ON child.oid = k.conrelid
+        JOIN pg_class parent ON parent.oid = k.confrelid
+        WHERE k.contype = 'f'
+          AND k.conrelid <> k.confrelid
+          AND child.relnamespace = quote_ident(%s)::regnamespace
+          AND parent.relnamespace = child.relnamespace
+        """,
+        (schema_name,)
+    )
+    dependencies = {}
+    for child, parent in cursor.fetchall():
+        dependencies.setdefault(child, set()).add(parent)
+    cursor.close()
+    return dependencies
+
+def upsert_rows_into_table(conn, schema_name: str, table_name: str, column_names: list[str],
+                           key_columns: list[str], rows: list, page_size: int = 1000) -> int:
+    """
+    Inserts rows with INSERT ... ON CONFLICT (key_columns) DO UPDATE, page_size rows per statement.
+    The caller owns the transaction (commit/rollback) on conn.
+
+    Returns:
+        The number of rows upserted.
+    """
+    update_columns = [col for col in column_names if col not in key_columns]
+    if update_columns:
+        conflict_action = SQL("DO UPDATE SET {}").format(
+            SQL(', ').join(SQL("{0} = EXCLUDED.{0}").format(Identifier(col)) for col in update_columns)
+        )
+    else:
+        conflict_action = SQL("DO NOTHING")
+    upsert_sql = SQL("INSERT INTO {}.{} ({}) VALUES %s ON CONFLICT ({}) {}").format(
+        Identifier(schema_name),
+        Identifier(table_name),
+        SQL(', ').join(Identifier(col) for col in column_names),
+        SQL(', ').join(Identifier(col) for col in key_columns),
+        conflict_action
+    )
+    cursor = conn.cursor()
+    try:
+        psycopg2.extras.execute_values(cursor, upsert_sql.as_string(conn), rows, page_size=page_size)
+    finally:
+        cursor.close()
+    return len(rows)
+
 def get_postgres_table_ddl(schema_name: str, table_name: str, dbname: Optional[str] = None) -> Optional[str]:
     """
     Constructs the DDL for a specific PostgreSQL table.
@@ -256,9 +488,11 @@ def get_postgres_table_ddl(schema_name: str, table_name: str, dbname: Optional[s
 def generate_postgres_insert_statements(
     oracle_column_names: list[str],
     oracle_rows: list[tuple],
-    postgres_ddl: str,
+    postgres_ddl: Optional[str],
     target_schema: str,
-    target_table: str
+    target_table: str,
+    oracle_description: Optional[list] = None,
+    postgres_column_types: Optional[dict[str, str]] = None
 ) -> list[tuple[str, tuple]]:
     """
     Generates PostgreSQL INSERT statements from Oracle data.
@@ -266,68 +500,46 @@ def generate_postgres_insert_statements(
     Args:
         oracle_column_names: List of column names from the Oracle source table.
         oracle_rows: List of tuples, where each tuple is a row of data from Oracle.
-        postgres_ddl: The DDL of the target PostgreSQL table.
+        postgres_ddl: The DDL of the target PostgreSQL table. Only parsed for column names
+            when postgres_column_types is not given.
         target_schema: The target PostgreSQL schema name.
         target_table: The target PostgreSQL table name.
+        oracle_description: Optional Oracle cursor.description of the source rows, used to
+            build per-column type converters (see type_mapping).
+        postgres_column_types: Optional {column name: data_type} of the target table
+            (see get_postgres_column_types).
 
     Returns:
         A list of tuples, where each tuple contains:
         - The INSERT statement string with placeholders.
         - A tuple of values to be inserted.
     """
-    insert_statements = []
-
-    # Parse PostgreSQL DDL to get target column names and types
-    # This is a simplified parsing. A more robust solution might use a proper SQL parser.
-    postgres_columns = []
-    for line in postgres_ddl.splitlines():
-        if '    "' in line and '"' in line:
-            try:
+    if postgres_column_types:
+        postgres_columns = list(postgres_column_types)
+    else:
+        # Fallback when only DDL text is available: pick the quoted column names out of it
+        postgres_columns = []
+        for line in (postgres_ddl or '').splitlines():
+            if '    "' in line and '"' in line:
                 col_name_start = line.find('"') + 1
                 col_name_end = line.find('"', col_name_start)
-                column_name = line[col_name_start:col_name_end]
-                postgres_columns.append(column_name)
-            except Exception as e:
-                logger.warning(f"Could not parse column from DDL line: {line}. Error: {e}")
+                postgres_columns.append(line[col_name_start:col_name_end])
 
     if not postgres_columns:
         raise ValueError("Could not extract column names from PostgreSQL DDL.")
 
-    # Ensure column names are case-insensitive for mapping
-    oracle_col_map = {name.lower(): i for i, name in enumerate(oracle_column_names)}
-    postgres_col_map = {name.lower(): name for name in postgres_columns}
-
-    # Determine the columns to insert and their order
-    # We assume a 1:1 mapping of column names (case-insensitive) for now.
-    # More complex scenarios (e.g., different column names, transformations) would require a mapping configuration.
-    insert_cols = []
-    value_placeholders = []
-    oracle_indices_for_insert = []
-
-    for pg_col_lower, pg_col_original in postgres_col_map.items():
-        if pg_col_lower in oracle_col_map:
-            insert_cols.append(f'"{pg_col_original}"')
-            value_placeholders.append('%s')
-            oracle_indices_for_insert.append(oracle_col_map[pg_col_lower])
-        else:
-            logger.warning(f"PostgreSQL column {pg_col_original} not found in Oracle source. Skipping.")
-
-    if not insert_cols:
+    column_mapping = map_source_columns_to_target(oracle_column_names, postgres_columns)
+    if not column_mapping:
         raise ValueError("No matching columns found between Oracle and PostgreSQL for INSERT statements.")
 
-    insert_sql_template = f"INSERT INTO \"{target_schema}\".\"{target_table}\" ({', '.join(insert_cols)}) VALUES ({', '.join(value_placeholders)})"
-
-    for row in oracle_rows:
-        values_for_insert = []
-        for idx in oracle_indices_for_insert:
-            value = row[idx]
-            # Basic type handling: convert UUIDs to string, datetime to ISO format
-            if isinstance(value, uuid.UUID):
-                values_for_insert.append(str(value))
-            elif isinstance(value, datetime.datetime):
-                values_for_insert.append(value.isoformat())
-            else:
-                values_for_insert.append(value)
-        insert_statements.append((insert_sql_template, tuple(values_for_insert)))
+    insert_cols = [f'"{pg_col}"' for pg_col, _ in column_mapping]
+    source_indexes = [index for _, index in column_mapping]
+    insert_sql_template = f"INSERT INTO \"{target_schema}\".\"{target_table}\" ({', '.join(insert_cols)}) VALUES ({', '.join(['%s'] * len(insert_cols))})"
+
+    # psycopg2 binds datetime, Decimal and bytes natively; only type changes need a converter
+    converters = [None] * len(source_indexes)
+    if oracle_description:
+        converters = type_mapping.build_mapped_converters(oracle_description, column_mapping, postgres_column_types or {})
+    convert_row = type_mapping.compile_row_converter(source_indexes, converters)
 
-    return insert_statements
\ No newline at end of file
+    return [(insert_sql_template, tuple(convert_row(row))) for row in oracle_rows]
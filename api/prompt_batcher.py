@@ -0,0 +1,145 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from . import ai_converter
+
+logger = logging.getLogger(__name__)
+
+# Prompt packing for small conversion units: GRANTs, sequences, simple indexes and the like are
+# collected for up to MAX_WAIT_MS and sent to Ollama together under numbered markers, so they share
+# the prompt evaluation of the instructions. A batch is sent as soon as TOKEN_BUDGET is reached.
+# Statements whose result cannot be parsed out of the response are converted on their own.
+# A budget of 0 disables packing.
+TOKEN_BUDGET = int(os.getenv("CONVERSION_BATCH_TOKEN_BUDGET", "1500"))
+MAX_UNIT_TOKENS = int(os.getenv("CONVERSION_BATCH_MAX_UNIT_TOKENS", "200"))
+MAX_WAIT_MS = int(os.getenv("CONVERSION_BATCH_MAX_WAIT_MS", "150"))
+
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(sql: str) -> int:
+    """Rough token count of sql; enough to size batches without a tokenizer."""
+    return len(sql) // _CHARS_PER_TOKEN + 1
+
+
+def _convert_single(oracle_sql: str) -> str:
+    return "".join(ai_converter.convert_oracle_to_postgres(oracle_sql))
+
+
+class _Unit:
+    def __init__(self, oracle_sql: str, tokens: int):
+        self.oracle_sql = oracle_sql
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.result = Future()
+
+
+class PromptBatcher:
+    """
+    Packs the small statements converted concurrently by one process into shared Ollama requests.
+    convert() is called from the conversion threads and blocks until its statement is converted.
+    """
+
+    def __init__(self, token_budget: int = TOKEN_BUDGET, max_unit_tokens: int = MAX_UNIT_TOKENS,
+                 max_wait_ms: int = MAX_WAIT_MS):
+        """
+        Args:
+            token_budget: Estimated statement tokens packed into one request.
+            max_unit_tokens: Larger statements are always converted on their own.
+            max_wait_ms: How long the oldest statement may wait for others to join its batch.
+        """
+        self.token_budget = token_budget
+        self.max_unit_tokens = min(max_unit_tokens, token_budget)
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._pending_tokens = 0
+        self._cond = threading.Condition()
+        self._dispatcher = None
+
+    def convert(self, oracle_sql: str) -> str:
+        """Returns the PostgreSQL conversion of oracle_sql."""
+        tokens = estimate_tokens(oracle_sql)
+        if self.token_budget <= 0 or tokens > self.max_unit_tokens:
+            return _convert_single(oracle_sql)
+        unit = _Unit(oracle_sql, tokens)
+        with self._cond:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="prompt-batcher", daemon=True)
+                self._dispatcher.start()
+            self._pending.append(unit)
+            self._pending_tokens += tokens
+            self._cond.notify_all()
+        converted_sql, usage = unit.result.result()
+        if usage is not None:
+            # The packed request ran on another thread; count this statement's share against the caller's job
+            ai_converter.add_usage(usage)
+        if converted_sql is None:
+            # Not found in the packed response
+            converted_sql = _convert_single(oracle_sql)
+        return converted_sql
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Wait for the budget to fill, but no longer than the oldest statement may wait
+                deadline = self._pending[0].enqueued + self.max_wait
+                while self._pending_tokens < self.token_budget and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                batch, batch_tokens = [], 0
+                while self._pending and (not batch or batch_tokens + self._pending[0].tokens <= self.token_budget):
+                    unit = self._pending.pop(0)
+                    batch.append(unit)
+                    batch_tokens += unit.tokens
+                self._pending_tokens -= batch_tokens
+            # Send it off and start collecting the next batch; Ollama concurrency is limited in ai_converter
+            threading.Thread(target=self._send, args=(batch, batch_tokens), daemon=True).start()
+
+    def _send(self, batch: list, batch_tokens: int):
+        if len(batch) == 1:
+            # Nothing joined it; the caller converts it with the single-statement prompt
+            batch[0].result.set_result((None, None))
+            return
+        started = time.monotonic()
+        with ai_converter.track_usage() as usage:
+            try:
+                results = ai_converter.convert_oracle_to_postgres_batch([unit.oracle_sql for unit in batch])
+            except Exception as e:
+                logger.warning(f"Packed conversion of {len(batch)} statements failed; converting them one by one: {e}")
+                results = [None] * len(batch)
+        unparsed = sum(result is None for result in results)
+        logger.info(f"Packed {len(batch)} statements (~{batch_tokens} tokens) into one request in "
+                    f"{time.monotonic() - started:.1f}s; {unparsed} fall back to single conversion.")
+        for unit, result in zip(batch, results):
+            unit.result.set_result((result, _share(usage, unit.tokens / batch_tokens)))
+
+
+def _share(usage: dict, fraction: float) -> dict:
+    """
+    The part of a packed request's usage attributed to one statement: tokens and server time by its
+    share of the statement tokens, while the request count and client-side waits apply to it in full.
+    """
+    share = {field: usage[field] * fraction for field in ai_converter.USAGE_FIELDS}
+    for field in ("requests", "wall_ms", "slot_wait_ms"):
+        share[field] = usage[field]
+    if "model" in usage:
+        share["model"] = usage["model"]
+    return share
+
+
+_batcher: Optional[PromptBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def convert(oracle_sql: str) -> str:
+    """Converts oracle_sql through the process-wide batcher."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = PromptBatcher()
+    return _batcher.convert(oracle_sql)
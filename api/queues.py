@@ -2,6 +2,7 @@ import pika
 import os
 import time
 import logging
+import functools
 from opentelemetry import trace
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
@@ -55,6 +56,36 @@ QUEUE_CONFIG['DATA_MIGRATION_ROW_INSERTS_DDL'] = {
     'dlq': 'data_migration_row_inserts_ddl_dlq',
 }
 
+QUEUE_CONFIG['DATA_MIGRATION_TABLE'] = {
+    'queue': 'data_migration_table_jobs',
+    'dlx': 'data_migration_table_dlx',
+    'dlq': 'data_migration_table_dlq',
+}
+
+QUEUE_CONFIG['DATA_MIGRATION_SCHEDULE'] = {
+    'queue': 'data_migration_schedule_jobs',
+    'dlx': 'data_migration_schedule_dlx',
+    'dlq': 'data_migration_schedule_dlq',
+}
+
+class ThreadsafeChannel:
+    """
+    Lets a callback running off the connection's thread ack or reject its message; the calls
+    are handed to the connection's thread with add_callback_threadsafe.
+    """
+
+    def __init__(self, connection, channel):
+        self._connection = connection
+        self._channel = channel
+
+    def basic_ack(self, delivery_tag):
+        self._connection.add_callback_threadsafe(functools.partial(self._channel.basic_ack, delivery_tag=delivery_tag))
+
+    def basic_reject(self, delivery_tag, requeue=True):
+        self._connection.add_callback_threadsafe(
+            functools.partial(self._channel.basic_reject, delivery_tag=delivery_tag, requeue=requeue)
+        )
+
 def get_rabbitmq_connection(retries=5, delay=5):
     """
     Establishes a blocking connection to RabbitMQ with retry logic.
@@ -12,6 +12,7 @@ from opentelemetry.propagate import inject
 from .. import models
 from .. import database
 from .. import queues
+from .. import conversion_cache
 from ..sanitizer import sanitize_for_execution # Import the new sanitizer
 
 router = APIRouter()
@@ -44,7 +45,7 @@ async def convert_oracle_to_postgres(conversion_input: models.ConversionInput):
             channel.basic_publish(
                 exchange='',
                 routing_key='conversion_jobs',
-                body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': proc, 'job_type': job_type}),
+                body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': proc, 'job_type': job_type, 'bypass_cache': conversion_input.bypass_cache}),
                 properties=pika.BasicProperties(delivery_mode=2, headers=carrier)
             )
         channel.close()
@@ -60,7 +61,7 @@ async def convert_oracle_to_postgres(conversion_input: models.ConversionInput):
 # ---
 
 @router.post("/convert-file")
-async def convert_oracle_to_postgres_file(file: UploadFile = File(...)):
+async def convert_oracle_to_postgres_file(file: UploadFile = File(...), bypass_cache: bool = Form(False)):
     job_type = "sql"
     content = await file.read()
     # Use the new sanitizer for file-based conversions as well
@@ -81,7 +82,7 @@ async def convert_oracle_to_postgres_file(file: UploadFile = File(...)):
             channel.basic_publish(
                 exchange='',
                 routing_key='conversion_jobs',
-                body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': proc, 'job_type': job_type}),
+                body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': proc, 'job_type': job_type, 'bypass_cache': bypass_cache}),
                 properties=pika.BasicProperties(delivery_mode=2, headers=carrier)
             )
         channel.close()
@@ -139,7 +140,7 @@ async def reconvert_with_suggestions(reconversion_input: models.ReconversionInpu
         channel.basic_publish(
             exchange='',
             routing_key='conversion_jobs',
-            body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': original_sql, 'job_type': job_type, 'suggestions': suggestions}),
+            body=json.dumps({'job_id': job_id, 'parent_job_id': job_id, 'original_sql': original_sql, 'job_type': job_type, 'suggestions': suggestions, 'bypass_cache': reconversion_input.bypass_cache}),
             properties=pika.BasicProperties(delivery_mode=2, headers=carrier)
         )
         channel.close()
@@ -153,3 +154,12 @@ async def reconvert_with_suggestions(reconversion_input: models.ReconversionInpu
 
     json_content = json.dumps({"job_id": job_id, "status": "reconversion_initiated"}) + "\n"
     return Response(content=json_content, media_type="application/json", status_code=202)
+
+# ---
+
+@router.get("/conversion-cache/stats")
+async def get_conversion_cache_stats():
+    """
+    Returns the conversion cache's hit, miss, bypass and store counts across all workers.
+    """
+    return conversion_cache.get_stats()
@@ -18,14 +18,9 @@ router = APIRouter()
 @router.post("/test-postgres-connection")
 async def test_postgres_connection(details: models.PostgresConnectionDetails):
     try:
-        conn = psycopg2.connect(
-            dbname=details.dbname,
-            user=details.user,
-            password=details.password,
-            host=details.host,
-            port=details.port
-        )
-        conn.close()
+        with database.get_target_db_connection(details.dict()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
         return JSONResponse(content={"message": "Connection successful!"})
     except psycopg2.Error as e:
         raise HTTPException(status_code=400, detail=f"Connection failed: {e}")
@@ -1,7 +1,6 @@
 import logging
 from fastapi import APIRouter, HTTPException
 import os
-import pika
 import json
 import uuid
 from .. import models
@@ -10,6 +9,11 @@ from ..ai_converter import compare_schemas_with_ollama_ai
 from .. import database
 from .. import queues
 from .. import oracle_helper
+from .. import bulk_loader
+from .. import migration_progress
+from .. import migration_scheduler
+from .. import ddl_phases
+from .. import extraction_throttle
 from .. import job_repository # Import job_repository directly
 
 logger = logging.getLogger(__name__)
@@ -56,7 +60,13 @@ def initiate_migration_workflow(migration_details: models.MigrationDetails):
                 'object_name': obj.object_name,
                 'source_schema': migration_details.source_schema,
                 'target_schema': migration_details.target_schema,
-                'data_migration_enabled': migration_details.data_migration_enabled
+                'data_migration_enabled': migration_details.data_migration_enabled,
+                'extraction_concurrency': migration_details.extraction_concurrency,
+                'data_sync_mode': migration_details.data_sync_mode,
+                'delta_column': migration_details.delta_column,
+                'lob_inline_threshold': migration_details.lob_inline_threshold,
+                'in_flight_window': migration_details.in_flight_window,
+                'load_strategy': migration_details.load_strategy
             }
             # Use the dynamically generated queue name for the specific object type
             queues.publish_message(queues.QUEUE_CONFIG[obj.object_type]['queue'], json.dumps(extraction_message))
@@ -121,65 +131,182 @@ def start_migration(request: models.DataMigrationRequest):
             target_db_type="PostgreSQL",
             target_connection_string=json.dumps(request.postgres_credentials.dict()),
             target_schema_name=request.destination_schema,
-            target_table_name=request.destination_table
+            target_table_name=request.destination_table,
+            extraction_concurrency=request.extraction_concurrency,
+            delta_column=request.delta_column,
+            in_flight_window=request.in_flight_window
         )
     except Exception as e:
         logger.exception("Failed to create migration job during migration start.")
         raise HTTPException(status_code=500, detail=f"Failed to create migration job: {e}")
 
-    # 3. Extract data from Oracle
+    # 3. Hand the load to the data migration workers, which throttle, spool and pace the extraction
     try:
-        oracle_column_names, oracle_rows = oracle_helper.fetch_oracle_table_data_batched(
-            request.oracle_credentials,
-            request.source_schema,
-            request.source_table
-        )
-        logger.info(f"Extracted {len(oracle_rows)} rows from Oracle table {request.source_schema}.{request.source_table}")
+        queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({
+            'job_id': job_id,
+            'action': 'migrate',
+            'source_connection': request.oracle_credentials.dict(),
+            'source_schema': request.source_schema,
+            'object_name': request.source_table,
+            'pg_creds': request.postgres_credentials.dict(),
+            'target_schema': request.destination_schema,
+            'target_table': request.destination_table,
+            'extraction_concurrency': request.extraction_concurrency,
+            'delta_column': request.delta_column,
+            'in_flight_window': request.in_flight_window
+        }))
     except Exception as e:
-        logger.exception("Failed to extract data from Oracle during migration start.")
+        logger.exception("Error queueing data migration job during migration start.")
         database.update_data_migration_job_status(job_id, "FAILED", error_details=str(e))
-        raise HTTPException(status_code=500, detail=f"Failed to extract data from Oracle: {e}")
-
-    # 4. Generate PostgreSQL INSERT statements (placeholder for now)
-    # This is where we will generate the actual INSERT statements based on oracle_column_names, oracle_rows, and postgres_ddl
-    # For now, we'll just log a message.
-    logger.info("Placeholder: Generating PostgreSQL INSERT statements...")
+        raise HTTPException(status_code=500, detail=f"Error submitting migration job to queue: {e}")
+    return {"job_id": job_id, "message": "Migration job submitted; the data migration workers load the table."}
 
-    # 4. Publish each Oracle row to RabbitMQ for worker to pick up
-    print("DEBUG: Starting Publish to RabbitMQ")
+@router.post("/migrate/tables")
+def start_multi_table_migration(request: models.MultiTableMigrationRequest):
+    """Queues a parent job that loads many tables concurrently within the global connection budget."""
+    if not request.tables:
+        raise HTTPException(status_code=400, detail="At least one table is required.")
+    if request.load_strategy not in bulk_loader.LOAD_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"load_strategy must be one of {', '.join(bulk_loader.LOAD_STRATEGIES)}.")
+    post_load = []
+    if request.post_load_sql:
+        phases = ddl_phases.split_ddl_phases(request.post_load_sql)
+        if phases["create"]:
+            raise HTTPException(status_code=400, detail={
+                "message": "post_load_sql may only contain index and key/foreign key constraint DDL.",
+                "statements": phases["create"]
+            })
+        post_load = phases["post_load"]
     try:
-        connection = queues.get_rabbitmq_connection()
-        if not connection:
-            raise HTTPException(status_code=500, detail="Failed to connect to RabbitMQ.")
-        channel = connection.channel()
-
-        # Declare the queue for row-level inserts if it doesn't exist
-        row_insert_queue_name = "data_migration_row_inserts"
-        channel.queue_declare(queue=row_insert_queue_name, durable=True, arguments={'x-queue-type': 'quorum', 'x-dead-letter-exchange': 'data_migration_row_inserts_dlx'})
-
-        for i, row_data in enumerate(oracle_rows):
-            message = {
-                "job_id": str(job_id),
-                "row_number": i + 1,
-                "row_data": list(row_data), # Convert tuple to list for JSON serialization
-                "column_names": oracle_column_names
-            }
-            channel.basic_publish(
-                exchange='',
-                routing_key=row_insert_queue_name,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(delivery_mode=2) # make message persistent
-            )
-        logger.info(f"Published {len(oracle_rows)} raw row messages to RabbitMQ for job {job_id}.")
-        connection.close()
+        parent_job_id = job_repository.create_job(
+            job_type="data_migration",
+            source_db_type="Oracle",
+            target_db_type="PostgreSQL",
+            source_connection_details=request.oracle_credentials.dict(),
+            target_connection_details=request.postgres_credentials.dict(),
+            source_schema=request.source_schema,
+            target_schema=request.destination_schema,
+            data_migration_enabled=True
+        )
+        if post_load:
+            database.save_deferred_ddl(parent_job_id, post_load)
+        queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_SCHEDULE']['queue'], json.dumps({
+            'parent_job_id': parent_job_id,
+            'tables': request.tables,
+            'extraction_concurrency': request.extraction_concurrency,
+            'respect_foreign_keys': request.respect_foreign_keys,
+            'maintenance_work_mem': request.maintenance_work_mem,
+            'load_strategy': request.load_strategy
+        }))
+        return {"job_id": parent_job_id, "message": f"Data migration of {len(request.tables)} tables queued."}
+    except Exception as e:
+        logger.error(f"Error queueing multi-table data migration: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error queueing multi-table data migration: {e}")
 
-        database.update_data_migration_job_status(job_id, "IN_PROGRESS", total_rows=len(oracle_rows))
+@router.post("/ddl/phases")
+def split_ddl_phases_route(request: models.DdlPhasesRequest):
+    """Splits converted DDL into the statements to run before a bulk load and the indexes/constraints to build after it."""
+    phases = ddl_phases.split_ddl_phases(request.sql)
+    return {
+        "create_sql": ";\n".join(phases["create"]) + (";\n" if phases["create"] else ""),
+        "post_load_sql": ";\n".join(statement["statement"] for statement in phases["post_load"]) + (";\n" if phases["post_load"] else ""),
+        "post_load_statements": len(phases["post_load"])
+    }
 
-        return {"job_id": job_id, "message": "Migration job submitted and raw rows queued successfully."}
-    except Exception as e:
-        logger.exception("Error submitting migration job to queue during migration start.")
-        database.update_data_migration_job_status(job_id, "FAILED", error_details=str(e))
-        raise HTTPException(status_code=500, detail=f"Error submitting migration job to queue: {e}")
+@router.get("/migrate/status/{job_id}")
+def get_data_migration_status(job_id: str):
+    """Returns a data migration job with its live row counters and in-flight window."""
+    job = database.get_data_migration_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Data migration job not found.")
+    counts = migration_progress.get_counts(job_id)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "source_table": f"{job['source_schema_name']}.{job['source_table_name']}",
+        "target_table": f"{job['target_schema_name']}.{job['target_table_name']}",
+        "total_rows": counts["total_rows"] if counts["total_rows"] is not None else job["total_rows"],
+        "migrated_rows": max(counts["migrated_rows"], job["migrated_rows"] or 0),
+        "failed_rows": max(counts["failed_rows"], job["failed_rows"] or 0),
+        "in_flight_window": {
+            "limit": job["in_flight_window"] or migration_progress.DEFAULT_IN_FLIGHT_BATCHES,
+            "in_flight_batches": counts["in_flight_batches"]
+        },
+        "extraction_throttle": extraction_throttle.get_throttle_metrics(job_id),
+        "error_details": job["error_details"]
+    }
+
+@router.post("/migrate/resume/{job_id}")
+def resume_data_migration(job_id: str):
+    """Re-queues a data migration job; committed chunks are skipped when it runs again."""
+    job = database.get_data_migration_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Data migration job not found.")
+    if job["status"] == "COMPLETED":
+        return {"job_id": job_id, "message": "Data migration job is already completed."}
+
+    chunks = database.get_data_migration_chunks(job_id)
+    completed_chunks = sum(1 for chunk in chunks if chunk["status"] == "COMPLETED")
+    queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({'job_id': job_id}))
+    return {
+        "job_id": job_id,
+        "message": "Data migration job re-queued.",
+        "completed_chunks": completed_chunks,
+        "total_chunks": len(chunks)
+    }
+
+@router.post("/migrate/sync/{job_id}")
+def sync_data_migration(job_id: str):
+    """Queues a delta sync that upserts the rows changed since the job's last load or sync."""
+    job = database.get_data_migration_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Data migration job not found.")
+    if job["status"] != "COMPLETED":
+        raise HTTPException(status_code=409, detail=f"Delta sync needs a completed initial load; job status is {job['status']}.")
+
+    queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({'job_id': job_id, 'sync_mode': 'delta'}))
+    return {
+        "job_id": job_id,
+        "message": "Delta sync queued.",
+        "sync_watermark": job["sync_watermark"],
+        "last_synced_at": job["last_synced_at"]
+    }
+
+@router.post("/migrate/validate/{job_id}")
+def validate_data_migration(job_id: str):
+    """Queues a chunked checksum comparison of the job's source and target tables."""
+    job = database.get_data_migration_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Data migration job not found.")
+    if job["status"] != "COMPLETED":
+        raise HTTPException(status_code=409, detail=f"Validation needs a completed load; job status is {job['status']}.")
+
+    queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({'job_id': job_id, 'action': 'validate'}))
+    return {
+        "job_id": job_id,
+        "message": "Data validation queued.",
+        "validation_status": job["validation_status"],
+        "validated_at": job["validated_at"]
+    }
+
+@router.get("/migrate/validate/{job_id}")
+def get_data_migration_validation(job_id: str):
+    """Returns the result of the job's last data validation."""
+    job = database.get_data_migration_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Data migration job not found.")
+    return {
+        "job_id": job_id,
+        "validation_status": job["validation_status"],
+        "validation_result": job["validation_result"],
+        "validated_at": job["validated_at"]
+    }
+
+def _count_by_status(rows: list[dict]) -> dict:
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    return counts
 
 @router.get("/migration/status/{job_id}")
 def get_migration_status(job_id: str):
@@ -196,7 +323,9 @@ def get_migration_status(job_id: str):
             "job_id": str(parent_job["job_id"]),
             "status": parent_job["status"],
             "error_message": parent_job.get("error_message"),
-            "child_jobs": child_jobs_status
+            "child_jobs": child_jobs_status,
+            "data_migration": migration_scheduler.get_parent_progress(job_id),
+            "post_load_ddl": _count_by_status(database.get_deferred_ddl(job_id))
         }
     except Exception as e:
         logger.error(f"Error checking migration job status for {job_id}: {e}", exc_info=True)
@@ -0,0 +1,122 @@
+import os
+import json
+import decimal
+import datetime
+import logging
+import itertools
+from typing import Iterable, Optional
+
+import msgpack
+import oracledb
+import pika
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+logger = logging.getLogger(__name__)
+
+# Version 1 messages carry one JSON row each ({"job_id", "row_number", "row_data", "column_names"}).
+# Version 2 messages carry many rows per msgpack body with the column list sent once:
+#   {"format_version": 2, "job_id", "batch_number", "first_row_number", "column_names", "rows"}
+ROW_BATCH_FORMAT_VERSION = 2
+ROW_BATCH_CONTENT_TYPE = 'application/x-msgpack'
+DEFAULT_ROWS_PER_MESSAGE = int(os.getenv("DATA_MIGRATION_ROWS_PER_MESSAGE", "2000"))
+
+
+def _encode_value(value):
+    """msgpack fallback for Oracle values it cannot serialise natively."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return f"{value.total_seconds()} seconds"
+    if isinstance(value, oracledb.LOB):
+        # LOBs above the inline threshold arrive as locators; a message needs the whole value
+        return value.read()
+    raise TypeError(f"Cannot serialise value of type {type(value).__name__} into a row batch")
+
+
+def encode_row_batch(job_id: str, batch_number: int, first_row_number: int, column_names: list[str], rows: list) -> bytes:
+    """Encodes a batch of rows into a version 2 row batch message body."""
+    return msgpack.packb(
+        {
+            "format_version": ROW_BATCH_FORMAT_VERSION,
+            "job_id": str(job_id),
+            "batch_number": batch_number,
+            "first_row_number": first_row_number,
+            "column_names": column_names,
+            "rows": [list(row) for row in rows],
+        },
+        default=_encode_value,
+        use_bin_type=True,
+    )
+
+
+def decode_row_batch(body: bytes, content_type: Optional[str] = None) -> dict:
+    """
+    Decodes a DATA_MIGRATION_ROW_INSERTS message into the version 2 batch shape.
+    Version 1 (single JSON row) messages are returned as a one-row batch.
+    """
+    if content_type == ROW_BATCH_CONTENT_TYPE:
+        message = msgpack.unpackb(body, raw=False)
+        if message.get("format_version") != ROW_BATCH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported row batch format version: {message.get('format_version')}")
+        return message
+
+    data = json.loads(body)
+    return {
+        "format_version": 1,
+        "job_id": data["job_id"],
+        "batch_number": data["row_number"],
+        "first_row_number": data["row_number"],
+        "column_names": data["column_names"],
+        "rows": [data["row_data"]],
+    }
+
+
+def publish_row_batches(
+    channel,
+    queue_name: str,
+    job_id: str,
+    column_names: list[str],
+    batches: Iterable[list],
+    rows_per_message: int = DEFAULT_ROWS_PER_MESSAGE,
+    window=None
+) -> int:
+    """
+    Re-batches Oracle fetch batches into row batch messages and publishes them on channel.
+    With a window (migration_progress.InFlightWindow) every message first waits for a free
+    slot, so extraction pauses while the loaders are behind.
+
+    Returns:
+        The total number of rows published.
+    """
+    carrier = {}
+    TraceContextTextMapPropagator().inject(carrier)
+    properties = pika.BasicProperties(
+        delivery_mode=2,  # make message persistent
+        content_type=ROW_BATCH_CONTENT_TYPE,
+        headers=carrier
+    )
+
+    rows = itertools.chain.from_iterable(batches)
+    total_rows = 0
+    batch_number = 0
+    while True:
+        message_rows = list(itertools.islice(rows, rows_per_message))
+        if not message_rows:
+            break
+        batch_number += 1
+        if window is not None:
+            window.acquire()
+        try:
+            body = encode_row_batch(job_id, batch_number, total_rows + 1, column_names, message_rows)
+            channel.basic_publish(exchange='', routing_key=queue_name, body=body, properties=properties)
+        except Exception:
+            if window is not None:
+                window.release()
+            raise
+        total_rows += len(message_rows)
+
+    logger.info(f"Published {total_rows} rows in {batch_number} row batch messages to {queue_name} for job {job_id}"
+                + (f" (waited {window.waited_seconds:.1f}s for the in-flight window)." if window is not None else "."))
+    return total_rows
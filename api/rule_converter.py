@@ -0,0 +1,682 @@
+import re
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Deterministic conversion of the plain DDL DBMS_METADATA.GET_DDL produces for tables, indexes,
+# sequences and simple views (plus COMMENT ON and ALTER TABLE ... ADD CONSTRAINT). convert()
+# translates every statement or none: anything the rules do not recognise, and all PL/SQL,
+# returns None so the caller falls back to the model. The output is lowercase like the model's.
+
+_PLSQL = re.compile(
+    r'^\s*(?:CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:NON)?EDITIONABLE\s+)?(?:PROCEDURE|FUNCTION|PACKAGE|TRIGGER|TYPE)\b|DECLARE\b|BEGIN\b)',
+    re.I
+)
+_LEXER = re.compile(
+    r"(?P<space>\s+|--[^\n]*|/\*.*?\*/)"
+    r"|(?P<str>[nN]?'(?:[^']|'')*')"
+    r"|(?P<qid>\"[^\"]+\")"
+    r"|(?P<num>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)"
+    r"|(?P<word>[A-Za-z_][\w$#]*)"
+    r"|(?P<op><=|>=|<>|!=|\|\||.)",
+    re.S
+)
+
+# PostgreSQL reserved words; identifiers spelled like these stay quoted
+_PG_RESERVED = frozenset("""
+    all analyse analyze and any array as asc asymmetric authorization binary both case cast check
+    collate collation column concurrently constraint create cross current_catalog current_date
+    current_role current_schema current_time current_timestamp current_user default deferrable desc
+    distinct do else end except false fetch for foreign freeze from full grant group having ilike in
+    initially inner intersect into is isnull join lateral leading left like limit localtime
+    localtimestamp natural not notnull null offset on only or order outer overlaps placing primary
+    references returning right select session_user similar some symmetric system_user table
+    tablesample then to trailing true union unique user using variadic verbose when where window with
+""".split())
+
+# Functions with the same meaning in both databases (Oracle name -> PostgreSQL name)
+_FUNCTIONS = {
+    'upper': 'upper', 'lower': 'lower', 'trim': 'trim', 'ltrim': 'ltrim', 'rtrim': 'rtrim',
+    'length': 'length', 'substr': 'substr', 'abs': 'abs', 'round': 'round', 'floor': 'floor',
+    'ceil': 'ceil', 'mod': 'mod', 'power': 'power', 'sqrt': 'sqrt', 'coalesce': 'coalesce',
+    'nvl': 'coalesce', 'count': 'count', 'sum': 'sum', 'avg': 'avg', 'min': 'min', 'max': 'max',
+}
+# Keywords that may be followed by a parenthesis without being a function call
+_PAREN_KEYWORDS = frozenset((
+    'in', 'exists', 'any', 'all', 'some', 'and', 'or', 'not', 'as', 'from', 'join', 'on', 'where',
+    'select', 'when', 'then', 'else', 'having', 'union', 'intersect', 'using', 'by', 'is', 'between',
+    'like', 'with', 'distinct', 'over',
+))
+# Oracle-only pseudo-columns and syntax the rules do not translate
+_ORACLE_ONLY = frozenset((
+    'rownum', 'rowid', 'level', 'prior', 'connect', 'dual', 'minus', 'pivot', 'unpivot', 'model',
+    'keep', 'siblings', 'nocycle', 'listagg', 'sample',
+))
+_PSEUDO_COLUMNS = {
+    'sysdate': 'localtimestamp(0)',
+    'systimestamp': 'current_timestamp',
+    'user': 'current_user',
+}
+_DATE_PSEUDO_COLUMNS = frozenset(('sysdate', 'systimestamp'))
+
+_PHYSICAL_ATTRIBUTES_WITH_VALUE = frozenset(('pctfree', 'pctused', 'initrans', 'maxtrans'))
+_PHYSICAL_FLAGS = frozenset((
+    'nocompress', 'logging', 'nologging', 'cache', 'nocache', 'monitoring', 'nomonitoring',
+    'noparallel', 'visible',
+))
+_PG_BIGINT_MAX = 9223372036854775807
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _Tokens:
+    """A cursor over the (kind, text) tokens of one statement."""
+
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, offset: int = 0) -> tuple[str, str]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else ('end', '')
+
+    def at_end(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    def next(self) -> tuple[str, str]:
+        token = self.peek()
+        if token[0] == 'end':
+            raise _Unsupported("unexpected end of statement")
+        self.position += 1
+        return token
+
+    def is_word(self, *words: str, offset: int = 0) -> bool:
+        kind, text = self.peek(offset)
+        return kind == 'word' and text.lower() in words
+
+    def accept(self, *words: str) -> bool:
+        """Consumes the given sequence of words if it comes next."""
+        if all(self.is_word(word, offset=i) for i, word in enumerate(words)):
+            self.position += len(words)
+            return True
+        return False
+
+    def expect(self, *words: str):
+        if not self.accept(*words):
+            raise _Unsupported(f"expected {' '.join(words).upper()} near {self.peek()[1]!r}")
+
+    def accept_op(self, op: str) -> bool:
+        if self.peek() == ('op', op):
+            self.position += 1
+            return True
+        return False
+
+    def expect_op(self, op: str):
+        if not self.accept_op(op):
+            raise _Unsupported(f"expected {op!r} near {self.peek()[1]!r}")
+
+    def until_depth0(self, stop) -> list[tuple[str, str]]:
+        """Consumes tokens up to (not including) the first depth-0 token for which stop() is true."""
+        depth, start = 0, self.position
+        while not self.at_end():
+            kind, text = self.peek()
+            if depth == 0 and stop(self):
+                break
+            if (kind, text) == ('op', '('):
+                depth += 1
+            elif (kind, text) == ('op', ')'):
+                if depth == 0:
+                    break
+                depth -= 1
+            self.position += 1
+        return self.tokens[start:self.position]
+
+    def parenthesised(self) -> list[tuple[str, str]]:
+        """Consumes "( ... )" and returns the tokens inside."""
+        self.expect_op('(')
+        inner = self.until_depth0(lambda tokens: False)
+        self.expect_op(')')
+        return inner
+
+
+def _tokenize(sql: str) -> list[tuple[str, str]]:
+    return [(match.lastgroup, match.group()) for match in _LEXER.finditer(sql) if match.lastgroup != 'space']
+
+
+def _split_statements(tokens: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+    statements, current = [], []
+    for token in tokens:
+        if token == ('op', ';'):
+            statements.append(current)
+            current = []
+        else:
+            current.append(token)
+    statements.append(current)
+    # A lone "/" ends a statement in SQL*Plus scripts
+    return [statement for statement in statements if statement and statement != [('op', '/')]]
+
+
+def _identifier(token: tuple[str, str]) -> str:
+    kind, text = token
+    if kind == 'qid':
+        name = text[1:-1]
+        if not re.fullmatch(r'[A-Z][A-Z0-9_$#]*', name):
+            return text  # case-sensitive in Oracle; keep it quoted as is
+        name = name.lower()
+    elif kind == 'word':
+        name = text.lower()
+    else:
+        raise _Unsupported(f"expected an identifier near {text!r}")
+    if name in _PG_RESERVED or '$' in name or '#' in name:
+        return f'"{name}"'
+    return name
+
+
+def _qualified_name(tokens: _Tokens) -> str:
+    parts = [_identifier(tokens.next())]
+    while tokens.accept_op('.'):
+        parts.append(_identifier(tokens.next()))
+    return '.'.join(parts)
+
+
+def _name_list(inner: list[tuple[str, str]], allow_order: bool = False) -> str:
+    """Translates a parenthesised column list, e.g. the key columns of a constraint."""
+    names, tokens = [], _Tokens(inner)
+    while not tokens.at_end():
+        name = _identifier(tokens.next())
+        if allow_order and (tokens.is_word('asc') or tokens.is_word('desc')):
+            name += f" {tokens.next()[1].lower()}"
+        names.append(name)
+        if not tokens.at_end():
+            tokens.expect_op(',')
+    if not names:
+        raise _Unsupported("empty column list")
+    return f"({', '.join(names)})"
+
+
+def _join(parts: list[str]) -> str:
+    text = ""
+    for part in parts:
+        if text and not text.endswith(('(', '.')) and part not in (')', ',', '.'):
+            text += ' '
+        text += part
+    return text
+
+
+def _expression(inner: list[tuple[str, str]]) -> str:
+    """
+    Translates an expression or query, allowing only constructs that mean the same in both
+    databases. Empty strings (NULL in Oracle), "||" (NULL-propagating in PostgreSQL), "/"
+    (integer division in PostgreSQL) and outer joins with (+) are left to the model.
+    """
+    parts, tokens = [], _Tokens(inner)
+    while not tokens.at_end():
+        kind, text = tokens.next()
+        lower = text.lower()
+        if kind == 'str':
+            if text in ("''", "n''", "N''"):
+                raise _Unsupported("empty string literal")
+            if text[0] in 'nN':
+                text = text[1:]
+            parts.append(text)
+        elif kind == 'num':
+            parts.append(text)
+        elif kind == 'op':
+            if text in ('||', '/'):
+                raise _Unsupported(f"operator {text}")
+            if text == '(' and tokens.peek() == ('op', '+') and tokens.peek(1) == ('op', ')'):
+                raise _Unsupported("(+) outer join")
+            parts.append(text)
+        elif kind == 'qid' or kind == 'word':
+            # seq.NEXTVAL / schema.seq.CURRVAL
+            chain = [(kind, text)]
+            while tokens.peek() == ('op', '.') and tokens.peek(1)[0] in ('word', 'qid'):
+                tokens.next()
+                chain.append(tokens.next())
+            last = chain[-1][1].strip('"').lower()
+            if len(chain) > 1 and last in ('nextval', 'currval'):
+                sequence = '.'.join(_identifier(part) for part in chain[:-1])
+                parts.append(f"{last}('{sequence}')")
+                continue
+            if len(chain) > 1:
+                parts.append('.'.join(_identifier(part) if part[0] == 'qid' else part[1].lower() for part in chain))
+                continue
+            if kind == 'qid':
+                parts.append(_identifier((kind, text)))
+            elif lower in _ORACLE_ONLY:
+                raise _Unsupported(f"Oracle-only keyword {lower}")
+            elif lower in _PSEUDO_COLUMNS:
+                # Oracle date arithmetic counts days (sysdate - 30); PostgreSQL timestamps need intervals
+                if lower in _DATE_PSEUDO_COLUMNS and (parts[-1:] in (['+'], ['-']) or tokens.peek() in (('op', '+'), ('op', '-'))):
+                    raise _Unsupported(f"date arithmetic on {lower}")
+                parts.append(_PSEUDO_COLUMNS[lower])
+            elif tokens.peek() == ('op', '(') and lower not in _PAREN_KEYWORDS:
+                if lower not in _FUNCTIONS:
+                    raise _Unsupported(f"function {lower}")
+                tokens.next()
+                parts.append(f"{_FUNCTIONS[lower]}(")
+            else:
+                parts.append(lower)
+    return _join(parts)
+
+
+def _int_type(precision: int) -> str:
+    if precision <= 4:
+        return 'smallint'
+    if precision <= 9:
+        return 'integer'
+    if precision <= 18:
+        return 'bigint'
+    return f'numeric({precision})'
+
+
+def _type_arguments(tokens: _Tokens) -> list[str]:
+    """The arguments of a type such as NUMBER(10,2) or VARCHAR2(20 BYTE), without the BYTE/CHAR qualifier."""
+    if tokens.peek() != ('op', '('):
+        return []
+    arguments = []
+    for argument in _split_elements(tokens.parenthesised()):
+        text = ''.join(token[1] for token in argument if not (token[0] == 'word' and token[1].lower() in ('byte', 'char')))
+        if not re.fullmatch(r'\*|-?\d+', text):
+            raise _Unsupported(f"type argument {text!r}")
+        arguments.append(text)
+    return arguments
+
+
+def _data_type(tokens: _Tokens) -> str:
+    kind, text = tokens.next()
+    name = text.lower()
+    if kind != 'word':
+        raise _Unsupported(f"data type {text}")
+    if name == 'long' and tokens.accept('raw'):
+        name = 'long raw'
+    elif name == 'double' and tokens.accept('precision'):
+        name = 'double precision'
+    arguments = _type_arguments(tokens)
+
+    if name in ('varchar2', 'nvarchar2', 'varchar') and len(arguments) == 1:
+        return f'varchar({arguments[0]})'
+    if name in ('char', 'nchar'):
+        return f'char({arguments[0]})' if arguments else 'char(1)'
+    if name == 'number':
+        if not arguments:
+            return 'numeric'
+        precision = 38 if arguments[0] == '*' else int(arguments[0])
+        scale = int(arguments[1]) if len(arguments) > 1 else 0
+        if scale == 0:
+            return _int_type(precision) if arguments[0] != '*' else 'numeric(38)'
+        if scale > 0:
+            return f'numeric({precision},{scale})'
+        return f'numeric({precision - scale})'
+    if name in ('integer', 'int'):
+        return 'numeric(38)'  # Oracle INTEGER is NUMBER(38)
+    if name == 'smallint':
+        return 'numeric(38)'
+    if name == 'float':
+        return 'double precision' if arguments and int(arguments[0]) <= 53 else 'numeric'
+    if name == 'binary_float':
+        return 'real'
+    if name in ('binary_double', 'double precision'):
+        return 'double precision'
+    if name == 'date':
+        return 'timestamp'
+    if name == 'timestamp':
+        precision = f'({min(int(arguments[0]), 6)})' if arguments else ''
+        if tokens.accept('with', 'local', 'time', 'zone') or tokens.accept('with', 'time', 'zone'):
+            return f'timestamptz{precision}'
+        return f'timestamp{precision}'
+    if name == 'interval':
+        if tokens.accept('year'):
+            _type_arguments(tokens)
+            tokens.expect('to', 'month')
+            return 'interval year to month'
+        if tokens.accept('day'):
+            _type_arguments(tokens)
+            tokens.expect('to', 'second')
+            seconds = _type_arguments(tokens)
+            return f'interval day to second({min(int(seconds[0]), 6)})' if seconds else 'interval day to second'
+        raise _Unsupported("interval type")
+    if name in ('clob', 'nclob', 'long'):
+        return 'text'
+    if name in ('blob', 'raw', 'long raw'):
+        return 'bytea'
+    if name in ('rowid', 'urowid'):
+        return 'text'
+    raise _Unsupported(f"data type {name}")
+
+
+def _skip_physical_attributes(tokens: _Tokens, stop=()):
+    """Drops storage and logging clauses, which have no PostgreSQL equivalent that matters here."""
+    while not tokens.at_end() and not any(tokens.is_word(word) for word in stop):
+        if tokens.accept('segment', 'creation'):
+            tokens.next()
+        elif any(tokens.is_word(word) for word in _PHYSICAL_ATTRIBUTES_WITH_VALUE):
+            tokens.next()
+            tokens.next()
+        elif any(tokens.is_word(word) for word in _PHYSICAL_FLAGS):
+            tokens.next()
+        elif tokens.accept('compress'):
+            tokens.accept('basic')
+        elif tokens.accept('tablespace'):
+            tokens.next()
+        elif tokens.is_word('storage'):
+            tokens.next()
+            tokens.parenthesised()
+        elif tokens.accept('compute', 'statistics'):
+            pass
+        elif tokens.accept('enable', 'row', 'movement') or tokens.accept('disable', 'row', 'movement'):
+            pass
+        elif tokens.accept('lob'):
+            tokens.parenthesised()
+            tokens.expect('store', 'as')
+            tokens.accept('securefile') or tokens.accept('basicfile')
+            if tokens.peek()[0] in ('word', 'qid') and tokens.peek() != ('op', '('):
+                tokens.next()
+            if tokens.peek() == ('op', '('):
+                tokens.parenthesised()
+        else:
+            break
+
+
+def _constraint_state(tokens: _Tokens) -> str:
+    """Consumes ENABLE/VALIDATE/USING INDEX and deferrability clauses after a constraint."""
+    clauses = []
+    while not tokens.at_end():
+        if tokens.accept('using', 'index'):
+            if tokens.peek() == ('op', '('):
+                raise _Unsupported("USING INDEX (CREATE INDEX ...)")
+            _skip_physical_attributes(tokens, stop=('enable', 'disable'))
+        elif tokens.accept('enable') or tokens.accept('validate') or tokens.accept('norely') or tokens.accept('rely'):
+            pass
+        elif tokens.is_word('disable') or tokens.is_word('novalidate'):
+            raise _Unsupported("disabled or unvalidated constraint")
+        elif tokens.accept('not', 'deferrable'):
+            clauses.append('not deferrable')
+        elif tokens.accept('deferrable'):
+            clauses.append('deferrable')
+        elif tokens.accept('initially', 'deferred'):
+            clauses.append('initially deferred')
+        elif tokens.accept('initially', 'immediate'):
+            clauses.append('initially immediate')
+        else:
+            break
+    return (' ' + ' '.join(clauses)) if clauses else ''
+
+
+def _references(tokens: _Tokens) -> str:
+    clause = f"references {_qualified_name(tokens)}"
+    if tokens.peek() == ('op', '('):
+        clause += f" {_name_list(tokens.parenthesised())}"
+    if tokens.accept('on', 'delete', 'cascade'):
+        clause += " on delete cascade"
+    elif tokens.accept('on', 'delete', 'set', 'null'):
+        clause += " on delete set null"
+    return clause
+
+
+def _constraint_body(tokens: _Tokens, column: Optional[str] = None) -> str:
+    """PRIMARY KEY / UNIQUE / CHECK / FOREIGN KEY / REFERENCES, for a table or (with column) a column constraint."""
+    if tokens.accept('primary', 'key'):
+        body = 'primary key' + ('' if column else f" {_name_list(tokens.parenthesised())}")
+    elif tokens.accept('unique'):
+        body = 'unique' + ('' if column else f" {_name_list(tokens.parenthesised())}")
+    elif tokens.accept('check'):
+        body = f"check ({_expression(tokens.parenthesised())})"
+    elif not column and tokens.accept('foreign', 'key'):
+        columns = _name_list(tokens.parenthesised())
+        tokens.expect('references')
+        body = f"foreign key {columns} {_references(tokens)}"
+    elif column and tokens.accept('references'):
+        body = _references(tokens)
+    else:
+        raise _Unsupported(f"constraint near {tokens.peek()[1]!r}")
+    return body + _constraint_state(tokens)
+
+
+def _sequence_options(tokens: _Tokens, stop=()) -> list[str]:
+    options = []
+    while not tokens.at_end() and not any(tokens.is_word(word) for word in stop):
+        if tokens.accept('increment', 'by'):
+            options.append(f"increment by {_signed_number(tokens)}")
+        elif tokens.accept('start', 'with'):
+            options.append(f"start with {_signed_number(tokens)}")
+        elif tokens.accept('minvalue'):
+            value = _signed_number(tokens)
+            if abs(int(value)) <= _PG_BIGINT_MAX:
+                options.append(f"minvalue {value}")
+        elif tokens.accept('maxvalue'):
+            value = _signed_number(tokens)
+            # Oracle's default MAXVALUE (28 nines) is beyond bigint; PostgreSQL's default is the bigint maximum
+            if abs(int(value)) <= _PG_BIGINT_MAX:
+                options.append(f"maxvalue {value}")
+        elif tokens.accept('cache'):
+            options.append(f"cache {_signed_number(tokens)}")
+        elif tokens.accept('nocache'):
+            options.append("cache 1")
+        elif tokens.accept('cycle'):
+            options.append("cycle")
+        elif tokens.accept('nocycle'):
+            options.append("no cycle")
+        elif tokens.accept('nominvalue') or tokens.accept('nomaxvalue'):
+            pass
+        elif any(tokens.accept(word) for word in ('order', 'noorder', 'nokeep', 'noscale', 'global', 'noextend', 'nopartition', 'noshard')):
+            pass
+        else:
+            raise _Unsupported(f"sequence option {tokens.peek()[1]!r}")
+    return options
+
+
+def _signed_number(tokens: _Tokens) -> str:
+    sign = '-' if tokens.accept_op('-') else ''
+    kind, text = tokens.next()
+    if kind != 'num' or not text.isdigit():
+        raise _Unsupported(f"expected an integer near {text!r}")
+    return sign + text
+
+
+_COLUMN_CLAUSE_START = ('not', 'null', 'constraint', 'primary', 'unique', 'check', 'references', 'enable', 'disable', 'generated')
+
+
+def _column(tokens: _Tokens) -> str:
+    column = _identifier(tokens.next())
+    parts = [column, _data_type(tokens)]
+    while not tokens.at_end():
+        if tokens.accept('default'):
+            if tokens.is_word('on'):
+                raise _Unsupported("DEFAULT ON NULL")
+            if tokens.accept('null'):
+                parts.append('default null')
+                continue
+            expression = tokens.until_depth0(lambda t: any(t.is_word(word) for word in _COLUMN_CLAUSE_START))
+            parts.append(f"default {_expression(expression)}")
+        elif tokens.accept('generated'):
+            if tokens.accept('always'):
+                kind = 'always'
+            elif tokens.accept('by', 'default'):
+                kind = 'by default'
+            else:
+                raise _Unsupported("GENERATED column")
+            if tokens.is_word('on'):
+                raise _Unsupported("identity ON NULL")
+            tokens.expect('as')
+            if not tokens.accept('identity'):
+                raise _Unsupported("virtual column")
+            options = _sequence_options(tokens, stop=_COLUMN_CLAUSE_START)
+            if parts[1].startswith('numeric'):
+                parts[1] = 'bigint'  # identity columns must be an integer type in PostgreSQL
+            parts.append(f"generated {kind} as identity" + (f" ({' '.join(options)})" if options else ''))
+        elif tokens.accept('not', 'null'):
+            parts.append('not null')
+            _constraint_state(tokens)
+        elif tokens.accept('null'):
+            pass
+        elif tokens.accept('constraint'):
+            name = _identifier(tokens.next())
+            if tokens.accept('not', 'null'):
+                # Named NOT NULL constraints are plain NOT NULL in PostgreSQL
+                parts.append('not null')
+                _constraint_state(tokens)
+            else:
+                parts.append(f"constraint {name} {_constraint_body(tokens, column)}")
+        elif any(tokens.is_word(word) for word in ('primary', 'unique', 'check', 'references')):
+            parts.append(_constraint_body(tokens, column))
+        elif tokens.accept('enable') or tokens.accept('visible'):
+            pass
+        else:
+            raise _Unsupported(f"column clause {tokens.peek()[1]!r}")
+    return ' '.join(parts)
+
+
+def _table_constraint(tokens: _Tokens) -> str:
+    name = ''
+    if tokens.accept('constraint'):
+        name = f"constraint {_identifier(tokens.next())} "
+    return name + _constraint_body(tokens)
+
+
+def _create_table(tokens: _Tokens) -> str:
+    table = _qualified_name(tokens)
+    elements = []
+    for element in _split_elements(tokens.parenthesised()):
+        element_tokens = _Tokens(element)
+        if element_tokens.accept('supplemental', 'log'):
+            continue
+        if any(element_tokens.is_word(word) for word in ('constraint', 'primary', 'unique', 'check', 'foreign')):
+            elements.append(_table_constraint(element_tokens))
+        else:
+            elements.append(_column(element_tokens))
+        if not element_tokens.at_end():
+            raise _Unsupported(f"table element near {element_tokens.peek()[1]!r}")
+    _skip_physical_attributes(tokens)
+    if not tokens.at_end():
+        raise _Unsupported(f"table clause {tokens.peek()[1]!r}")
+    return f"create table {table} (\n    " + ",\n    ".join(elements) + "\n);"
+
+
+def _split_elements(inner: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+    elements, current, depth = [], [], 0
+    for token in inner:
+        if token == ('op', '('):
+            depth += 1
+        elif token == ('op', ')'):
+            depth -= 1
+        if token == ('op', ',') and depth == 0:
+            elements.append(current)
+            current = []
+        else:
+            current.append(token)
+    elements.append(current)
+    return [element for element in elements if element]
+
+
+def _create_index(tokens: _Tokens, unique: bool) -> str:
+    # PostgreSQL puts an index in its table's schema and rejects a schema-qualified index name
+    index = _identifier(tokens.next())
+    while tokens.accept_op('.'):
+        index = _identifier(tokens.next())
+    tokens.expect('on')
+    table = _qualified_name(tokens)
+    columns = _name_list(tokens.parenthesised(), allow_order=True)
+    _skip_physical_attributes(tokens)
+    if not tokens.at_end():
+        raise _Unsupported(f"index clause {tokens.peek()[1]!r}")
+    return f"create {'unique ' if unique else ''}index {index} on {table} {columns};"
+
+
+def _create_sequence(tokens: _Tokens) -> str:
+    sequence = _qualified_name(tokens)
+    options = _sequence_options(tokens)
+    return f"create sequence {sequence}" + (f" {' '.join(options)}" if options else '') + ";"
+
+
+def _create_view(tokens: _Tokens) -> str:
+    view = _qualified_name(tokens)
+    columns = ''
+    if tokens.peek() == ('op', '('):
+        columns = f" {_name_list(tokens.parenthesised())}"
+    tokens.expect('as')
+    body = tokens.tokens[tokens.position:]
+    tokens.position = len(tokens.tokens)
+    check_option = ''
+    if [text.lower() for _, text in body[-3:]] == ['with', 'read', 'only']:
+        body = body[:-3]
+    elif [text.lower() for _, text in body[-3:]] == ['with', 'check', 'option']:
+        body, check_option = body[:-3], '\nwith check option'
+    elif len(body) > 5 and [text.lower() for _, text in body[-5:-2]] == ['with', 'check', 'option'] and body[-2][1].lower() == 'constraint':
+        body, check_option = body[:-5], '\nwith check option'
+    if not body or body[0][1].lower() not in ('select', 'with', '('):
+        raise _Unsupported("view body")
+    return f"create or replace view {view}{columns} as\n{_expression(body)}{check_option};"
+
+
+def _comment(tokens: _Tokens) -> str:
+    if tokens.accept('table'):
+        target = f"table {_qualified_name(tokens)}"
+    elif tokens.accept('column'):
+        target = f"column {_qualified_name(tokens)}"
+    else:
+        raise _Unsupported("COMMENT target")
+    tokens.expect('is')
+    kind, text = tokens.next()
+    if kind != 'str':
+        raise _Unsupported("COMMENT text")
+    return f"comment on {target} is {text};"
+
+
+def _alter_table(tokens: _Tokens) -> str:
+    table = _qualified_name(tokens)
+    tokens.expect('add')
+    constraint = _table_constraint(tokens)
+    if not tokens.at_end():
+        raise _Unsupported(f"ALTER TABLE clause {tokens.peek()[1]!r}")
+    return f"alter table {table} add {constraint};"
+
+
+def _convert_statement(statement: list[tuple[str, str]]) -> str:
+    tokens = _Tokens(statement)
+    if tokens.accept('comment', 'on'):
+        converted = _comment(tokens)
+    elif tokens.accept('alter', 'table'):
+        converted = _alter_table(tokens)
+    else:
+        tokens.expect('create')
+        if tokens.accept('table'):
+            converted = _create_table(tokens)
+        elif tokens.accept('unique', 'index'):
+            converted = _create_index(tokens, unique=True)
+        elif tokens.accept('index'):
+            converted = _create_index(tokens, unique=False)
+        elif tokens.accept('sequence'):
+            converted = _create_sequence(tokens)
+        else:
+            tokens.accept('or', 'replace')
+            tokens.accept('no', 'force') or tokens.accept('force')
+            tokens.accept('editionable') or tokens.accept('noneditionable')
+            tokens.expect('view')
+            converted = _create_view(tokens)
+    if not tokens.at_end():
+        raise _Unsupported(f"trailing {tokens.peek()[1]!r}")
+    return converted
+
+
+def convert(oracle_sql: str) -> Optional[str]:
+    """
+    Converts plain Oracle DDL to PostgreSQL without the model.
+
+    Returns:
+        The PostgreSQL DDL, or None if any statement is PL/SQL or uses a construct the rules do
+        not translate.
+    """
+    if _PLSQL.match(oracle_sql):
+        return None
+    try:
+        statements = _split_statements(_tokenize(oracle_sql))
+        if not statements:
+            return None
+        return "\n\n".join(_convert_statement(statement) for statement in statements)
+    except (_Unsupported, ValueError, IndexError) as e:
+        logger.info(f"Rule-based conversion not applicable ({e}); using the model.")
+        return None
@@ -0,0 +1,304 @@
+import os
+import hashlib
+import logging
+from typing import Optional
+
+import psycopg2
+from psycopg2.sql import SQL, Identifier, Literal
+
+logger = logging.getLogger(__name__)
+
+# Staging/swap loads: a full reload goes into an UNLOGGED copy of the target table (no WAL while
+# loading), gets the target's indexes and constraints, is switched to LOGGED and then replaces
+# the target in one short transaction. Readers see the old rows until the swap commits.
+STAGING_SUFFIX = "_mig_staging"
+# How long the swap waits for the ACCESS EXCLUSIVE lock before giving up instead of queueing readers behind it
+SWAP_LOCK_TIMEOUT = os.getenv("DATA_MIGRATION_SWAP_LOCK_TIMEOUT", "10s")
+
+_MAX_IDENTIFIER = 63
+
+
+def staging_name(name: str) -> str:
+    """
+    The staging counterpart of a table, index or constraint name (within PostgreSQL's 63 bytes).
+    Long names are shortened with a hash of the full name, so they stay distinct.
+    """
+    if len(name) + len(STAGING_SUFFIX) <= _MAX_IDENTIFIER:
+        return name + STAGING_SUFFIX
+    digest = hashlib.md5(name.encode()).hexdigest()[:8]
+    return name[:_MAX_IDENTIFIER - len(STAGING_SUFFIX) - len(digest) - 1] + "_" + digest + STAGING_SUFFIX
+
+
+def _table_oid(cursor, schema_name: str, table_name: str) -> Optional[int]:
+    cursor.execute("SELECT to_regclass(quote_ident(%s) || '.' || quote_ident(%s))::oid", (schema_name, table_name))
+    return cursor.fetchone()[0]
+
+
+def _qualified(schema_name: str, table_name: str):
+    return SQL("{}.{}").format(Identifier(schema_name), Identifier(table_name))
+
+
+def check_swappable(conn, schema_name: str, table_name: str):
+    """
+    Raises ValueError for tables that a staging swap would silently change: partitioned tables
+    and tables with user triggers, row level security policies or dependent views.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT c.relkind,
+               (SELECT count(*) FROM pg_trigger t WHERE t.tgrelid = c.oid AND NOT t.tgisinternal),
+               (SELECT count(*) FROM pg_policy p WHERE p.polrelid = c.oid),
+               (SELECT count(DISTINCT r.ev_class) FROM pg_depend d JOIN pg_rewrite r ON r.oid = d.objid
+                WHERE d.refobjid = c.oid AND d.classid = 'pg_rewrite'::regclass AND r.ev_class <> c.oid)
+        FROM pg_class c
+        WHERE c.relname = %s AND c.relnamespace = quote_ident(%s)::regnamespace
+        """,
+        (table_name, schema_name)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        raise ValueError(f"Target table {schema_name}.{table_name} does not exist.")
+    relkind, triggers, policies, views = row
+    problems = []
+    if relkind == 'p':
+        problems.append("it is partitioned")
+    if triggers:
+        problems.append(f"it has {triggers} triggers")
+    if policies:
+        problems.append(f"it has {policies} row level security policies")
+    if views:
+        problems.append(f"{views} views depend on it")
+    if problems:
+        raise ValueError(f"{schema_name}.{table_name} cannot be loaded through a staging swap: {', '.join(problems)}.")
+
+
+def create_staging_table(conn, schema_name: str, table_name: str, recreate: bool = False) -> str:
+    """
+    Creates the UNLOGGED staging copy of a table (columns, defaults, identity, CHECK and NOT NULL
+    constraints; no indexes or keys). An existing staging table is kept for a resumed load
+    unless recreate is set.
+
+    Returns:
+        The staging table name.
+    """
+    staging = staging_name(table_name)
+    cursor = conn.cursor()
+    if recreate:
+        cursor.execute(SQL("DROP TABLE IF EXISTS {}").format(_qualified(schema_name, staging)))
+    cursor.execute(SQL(
+        "CREATE UNLOGGED TABLE IF NOT EXISTS {} (LIKE {} INCLUDING DEFAULTS INCLUDING GENERATED "
+        "INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS)"
+    ).format(_qualified(schema_name, staging), _qualified(schema_name, table_name)))
+    conn.commit()
+    cursor.close()
+    return staging
+
+
+def staging_table_exists(conn, schema_name: str, table_name: str) -> bool:
+    cursor = conn.cursor()
+    exists = _table_oid(cursor, schema_name, staging_name(table_name)) is not None
+    cursor.close()
+    return exists
+
+
+def staging_table_is_empty(conn, schema_name: str, table_name: str) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(SQL("SELECT NOT EXISTS (SELECT 1 FROM {})").format(_qualified(schema_name, staging_name(table_name))))
+    empty = cursor.fetchone()[0]
+    cursor.close()
+    return empty
+
+
+def _key_constraints(cursor, table_oid: int) -> list[tuple[str, str, str]]:
+    """(name, contype, definition) of the table's own constraints that are copied to the staging table."""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s AND (contype IN ('p', 'u', 'x') OR (contype = 'f' AND confrelid <> conrelid))
+        ORDER BY contype = 'f', conname
+        """,
+        (table_oid,)
+    )
+    return cursor.fetchall()
+
+
+def _plain_indexes(cursor, table_oid: int) -> list[tuple[str, bool, str]]:
+    """(name, unique, 'USING ...' tail of the definition) of indexes that do not back a constraint."""
+    cursor.execute(
+        """
+        SELECT c.relname, i.indisunique, substring(pg_get_indexdef(i.indexrelid) from ' USING .*$')
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conrelid = i.indrelid AND k.conindid = i.indexrelid
+                          AND k.contype IN ('p', 'u', 'x'))
+        """,
+        (table_oid,)
+    )
+    return cursor.fetchall()
+
+
+def _referencing_foreign_keys(cursor, table_oid: int) -> list[tuple[str, str, str]]:
+    """(constraint name, referencing table, definition) of foreign keys that point at the table, including self-references."""
+    cursor.execute(
+        """
+        SELECT conname, conrelid::regclass::text, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = %s
+        """,
+        (table_oid,)
+    )
+    return cursor.fetchall()
+
+
+def prepare_staging_table(conn, schema_name: str, table_name: str, maintenance_work_mem: str):
+    """
+    Makes a loaded staging table ready to replace its target: builds the target's indexes, key
+    and outgoing foreign key constraints, copies its grants, moves identity sequences past the
+    loaded values and switches the table to LOGGED. Steps that already ran are skipped.
+    """
+    staging = staging_name(table_name)
+    cursor = conn.cursor()
+    target_oid = _table_oid(cursor, schema_name, table_name)
+    staging_oid = _table_oid(cursor, schema_name, staging)
+    staging_table = _qualified(schema_name, staging)
+
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s", (staging_oid,))
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s", (staging_oid,))
+    existing.update(row[0] for row in cursor.fetchall())
+
+    # Committed on its own so it survives the rollback of a failed build; the pool resets it on release
+    cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+    conn.commit()
+    for name, unique, using in _plain_indexes(cursor, target_oid):
+        if staging_name(name) in existing:
+            continue
+        cursor.execute(SQL("CREATE {}INDEX {} ON {}").format(
+            SQL("UNIQUE ") if unique else SQL(""), Identifier(staging_name(name)), staging_table
+        ) + SQL(using))
+        conn.commit()
+    for name, contype, definition in _key_constraints(cursor, target_oid):
+        if staging_name(name) in existing:
+            continue
+        add = SQL("ALTER TABLE {} ADD CONSTRAINT {} ").format(staging_table, Identifier(staging_name(name))) + SQL(definition)
+        if contype == 'f':
+            # Validated separately so the referenced table is only locked briefly
+            cursor.execute(add + SQL(" NOT VALID"))
+            conn.commit()
+            cursor.execute(SQL("ALTER TABLE {} VALIDATE CONSTRAINT {}").format(staging_table, Identifier(staging_name(name))))
+        else:
+            cursor.execute(add)
+        conn.commit()
+
+    cursor.execute(
+        """
+        SELECT CASE WHEN grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(grantee)) END, privilege_type, is_grantable
+        FROM pg_class, aclexplode(relacl)
+        WHERE oid = %s AND grantee <> relowner
+        """,
+        (target_oid,)
+    )
+    for grantee, privilege, grantable in cursor.fetchall():
+        cursor.execute(SQL("GRANT {} ON {} TO {}{}").format(
+            SQL(privilege), staging_table, SQL(grantee), SQL(" WITH GRANT OPTION") if grantable else SQL("")
+        ))
+
+    cursor.execute("SELECT attname FROM pg_attribute WHERE attrelid = %s AND attidentity <> '' AND NOT attisdropped", (staging_oid,))
+    for (column,) in cursor.fetchall():
+        cursor.execute(SQL(
+            "SELECT setval(pg_get_serial_sequence(quote_ident({}) || '.' || quote_ident({}), {}), COALESCE(max({}), 0) + 1, false) FROM {}"
+        ).format(Literal(schema_name), Literal(staging), Literal(column), Identifier(column), staging_table))
+
+    # Writes the whole table (and its indexes) to WAL once, instead of row by row during the load
+    cursor.execute(SQL("ALTER TABLE {} SET LOGGED").format(staging_table))
+    conn.commit()
+    cursor.close()
+
+
+def swap_staging_table(conn, schema_name: str, table_name: str) -> list[str]:
+    """
+    Replaces a table with its prepared staging table in one transaction: foreign keys that
+    reference the table are dropped, sequences owned by its columns are handed to the staging
+    table, the old table is dropped and the staging table and its indexes and constraints take
+    the original names. The referencing foreign keys are then recreated (NOT VALID, then
+    validated) against the new table.
+
+    Returns:
+        Descriptions of referencing foreign keys that could not be recreated.
+    """
+    staging = staging_name(table_name)
+    target = _qualified(schema_name, table_name)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET LOCAL lock_timeout = %s", (SWAP_LOCK_TIMEOUT,))
+        cursor.execute(SQL("LOCK TABLE {} IN ACCESS EXCLUSIVE MODE").format(target))
+        target_oid = _table_oid(cursor, schema_name, table_name)
+        staging_oid = _table_oid(cursor, schema_name, staging)
+
+        referencing = _referencing_foreign_keys(cursor, target_oid)
+        for name, child, _ in referencing:
+            # child is regclass text, already quoted and schema-qualified where needed
+            cursor.execute(SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(SQL(child), Identifier(name)))
+
+        # Serial columns: the staging table's defaults still use the target's sequences
+        cursor.execute(
+            """
+            SELECT d.objid::regclass::text, a.attname
+            FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.refobjid = %s AND d.deptype = 'a'
+            """,
+            (target_oid,)
+        )
+        for sequence, column in cursor.fetchall():
+            cursor.execute(SQL("ALTER SEQUENCE {} OWNED BY {}.{}").format(
+                SQL(sequence), _qualified(schema_name, staging), Identifier(column)
+            ))
+
+        # Staging names of long names cannot be turned back into the originals, so map them from the target's names
+        originals = {staging_name(name): name for name, _, _ in _key_constraints(cursor, target_oid)}
+        originals.update((staging_name(name), name) for name, _, _ in _plain_indexes(cursor, target_oid))
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s", (staging_oid,))
+        staged_constraints = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s", (staging_oid,))
+        staged_indexes = {row[0] for row in cursor.fetchall()}
+
+        cursor.execute(SQL("DROP TABLE {}").format(target))
+        cursor.execute(SQL("ALTER TABLE {} RENAME TO {}").format(_qualified(schema_name, staging), Identifier(table_name)))
+        for name in staged_constraints:
+            if name in originals:
+                cursor.execute(SQL("ALTER TABLE {} RENAME CONSTRAINT {} TO {}").format(target, Identifier(name), Identifier(originals[name])))
+                # Renaming a key constraint renames its index too
+                staged_indexes.discard(name)
+        for name in staged_indexes:
+            if name in originals:
+                cursor.execute(SQL("ALTER INDEX {} RENAME TO {}").format(
+                    _qualified(schema_name, name), Identifier(originals[name])
+                ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info(f"Swapped {schema_name}.{staging} into {schema_name}.{table_name}.")
+
+    failed = []
+    cursor = conn.cursor()
+    for name, child, definition in referencing:
+        try:
+            cursor.execute(SQL("ALTER TABLE {} ADD CONSTRAINT {} ").format(SQL(child), Identifier(name)) + SQL(definition) + SQL(" NOT VALID"))
+            conn.commit()
+            cursor.execute(SQL("ALTER TABLE {} VALIDATE CONSTRAINT {}").format(SQL(child), Identifier(name)))
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.error(f"Could not recreate foreign key {name} on {child} after the swap: {e}")
+            failed.append(f"{child}.{name}: {e}")
+    cursor.close()
+    return failed
@@ -0,0 +1,357 @@
+import os
+import math
+import queue
+import logging
+import threading
+import oracledb
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from . import models
+from . import oracle_helper
+from . import type_mapping
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTION_CONCURRENCY = int(os.getenv("DATA_MIGRATION_EXTRACTION_CONCURRENCY", "4"))
+# Fetch batches each parallel reader may queue ahead of the loader
+CHUNK_QUEUE_BATCHES = int(os.getenv("DATA_MIGRATION_CHUNK_QUEUE_BATCHES", "8"))
+# Upper bound on a chunk's share of the table segment, so stale or missing row statistics cannot
+# produce a handful of huge chunks
+CHUNK_MAX_MB = int(os.getenv("DATA_MIGRATION_CHUNK_MAX_MB", "256"))
+
+_QUEUE_POLL_INTERVAL = 0.5
+
+SPLIT_METHODS = ('auto', 'partition', 'rowid', 'pk', 'none')
+_PK_SPLIT_TYPES = ('NUMBER', 'INTEGER', 'VARCHAR2', 'NVARCHAR2', 'CHAR', 'NCHAR')
+
+# Groups the table's extents into :chunk_count runs of roughly equal block counts and turns
+# every run into a ROWID range (first block of the first extent to last block of the last one).
+_ROWID_RANGES_QUERY = """
+    SELECT ROWIDTOCHAR(DBMS_ROWID.ROWID_CREATE(1, o.data_object_id, g.lo_fno, g.lo_block, 0)) AS min_rid,
+           ROWIDTOCHAR(DBMS_ROWID.ROWID_CREATE(1, o.data_object_id, g.hi_fno, g.hi_block, 32767)) AS max_rid
+    FROM (
+        SELECT grp,
+               MIN(relative_fno) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id) AS lo_fno,
+               MIN(block_id) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id) AS lo_block,
+               MAX(relative_fno) KEEP (DENSE_RANK LAST ORDER BY relative_fno, block_id) AS hi_fno,
+               MAX(block_id + blocks - 1) KEEP (DENSE_RANK LAST ORDER BY relative_fno, block_id) AS hi_block
+        FROM (
+            SELECT relative_fno, block_id, blocks,
+                   TRUNC((SUM(blocks) OVER (ORDER BY relative_fno, block_id) - 0.01)
+                         / (SUM(blocks) OVER () / :chunk_count)) AS grp
+            FROM dba_extents
+            WHERE owner = :owner AND segment_name = :table_name AND segment_type = 'TABLE'
+        )
+        GROUP BY grp
+    ) g,
+    (SELECT data_object_id FROM dba_objects
+     WHERE owner = :owner AND object_name = :table_name AND object_type = 'TABLE') o
+    ORDER BY g.grp
+"""
+
+
+def _chunk(chunk_id: int, method: str, predicate: Optional[str] = None, binds: Optional[dict] = None,
+           partition: Optional[str] = None, key_range: Optional[list] = None) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "method": method,
+        "predicate": predicate,
+        "binds": binds or {},
+        "partition": partition,
+        "key_range": key_range,
+    }
+
+
+def chunk_from_checkpoint(row: dict) -> dict:
+    """Rebuilds a chunk dict from its migration_jobs.data_migration_chunks row."""
+    return _chunk(row["chunk_id"], row["split_method"] or 'none', row["predicate"], row["binds"],
+                  row["partition_name"], row["key_range"])
+
+
+def _segment_bytes(cursor, owner: str, table_name: str) -> dict:
+    """
+    Allocated bytes of the table's segments by partition name (None for a non-partitioned table).
+    Empty when dba_segments cannot be read.
+    """
+    try:
+        cursor.execute("""
+            SELECT partition_name, SUM(bytes) FROM dba_segments
+            WHERE owner = :owner AND segment_name = :table_name AND segment_type LIKE 'TABLE%'
+            GROUP BY partition_name
+            """, owner=owner, table_name=table_name)
+        return {partition: size or 0 for partition, size in cursor}
+    except oracledb.Error as e:
+        logger.warning(f"Could not read the segment size of {owner}.{table_name}: {e}")
+        return {}
+
+
+def _partition_chunks(cursor, owner: str, table_name: str, chunk_rows: int, segment_bytes: dict, chunk_max_bytes: int) -> list[dict]:
+    cursor.execute("""
+        SELECT partition_name, num_rows FROM all_tab_partitions
+        WHERE table_owner = :owner AND table_name = :table_name
+        ORDER BY partition_position
+        """, owner=owner, table_name=table_name)
+    partitions = cursor.fetchall()
+    # A chunk is loaded and checkpointed in one piece, so partitions that are oversized by statistics
+    # or by segment size are split by ROWID instead
+    if any((num_rows or 0) > 2 * chunk_rows or segment_bytes.get(name, 0) > 2 * chunk_max_bytes
+           for name, num_rows in partitions):
+        return []
+    return [_chunk(i + 1, 'partition', partition=name, key_range=[name, name]) for i, (name, _) in enumerate(partitions)]
+
+
+def _rowid_chunks(cursor, owner: str, table_name: str, chunk_count: int) -> list[dict]:
+    cursor.execute(_ROWID_RANGES_QUERY, owner=owner, table_name=table_name, chunk_count=chunk_count)
+    return [
+        _chunk(i + 1, 'rowid', "ROWID BETWEEN CHARTOROWID(:min_rid) AND CHARTOROWID(:max_rid)",
+               {"min_rid": min_rid, "max_rid": max_rid}, key_range=[min_rid, max_rid])
+        for i, (min_rid, max_rid) in enumerate(cursor)
+    ]
+
+
+def get_single_column_primary_key(cursor, owner: str, table_name: str) -> Optional[str]:
+    """Returns the table's primary key column if the key has exactly one column."""
+    cursor.execute("""
+        SELECT cc.column_name
+        FROM all_constraints c
+        JOIN all_cons_columns cc ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name
+        WHERE c.owner = :owner AND c.table_name = :table_name AND c.constraint_type = 'P'
+        """, owner=owner, table_name=table_name)
+    columns = [row[0] for row in cursor]
+    return columns[0] if len(columns) == 1 else None
+
+
+def _pk_chunks(cursor, owner: str, table_name: str, chunk_count: int) -> list[dict]:
+    pk_column = get_single_column_primary_key(cursor, owner, table_name)
+    if not pk_column:
+        return []
+    cursor.execute("""
+        SELECT data_type FROM all_tab_columns
+        WHERE owner = :owner AND table_name = :table_name AND column_name = :column_name
+        """, owner=owner, table_name=table_name, column_name=pk_column)
+    row = cursor.fetchone()
+    # Range bounds are stored as JSON in the chunk plan, so only keys that round-trip as JSON are used
+    if not row or row[0] not in _PK_SPLIT_TYPES:
+        return []
+    # NTILE over the primary key index gives ranges with equal row counts even for skewed keys
+    cursor.execute(f"""
+        SELECT MIN(pk), MAX(pk) FROM (
+            SELECT "{pk_column}" AS pk, NTILE(:chunk_count) OVER (ORDER BY "{pk_column}") AS nt
+            FROM {owner}.{table_name}
+        )
+        GROUP BY nt
+        ORDER BY nt
+        """, chunk_count=chunk_count)
+    return [
+        _chunk(i + 1, 'pk', f'"{pk_column}" BETWEEN :lo AND :hi', {"lo": lo, "hi": hi}, key_range=[lo, hi])
+        for i, (lo, hi) in enumerate(cursor)
+    ]
+
+
+def split_table(
+    details: models.OracleConnectionDetails,
+    schema_name: str,
+    table_name: str,
+    chunk_rows: int,
+    min_chunks: int = 1,
+    method: str = 'auto'
+) -> list[dict]:
+    """
+    Divides an Oracle table into chunks that can be read independently by separate sessions.
+
+    Args:
+        details: The Oracle connection details.
+        schema_name: The name of the schema the table belongs to.
+        table_name: The name of the table.
+        chunk_rows: Target number of rows per chunk (based on optimizer statistics). Chunks are
+            also kept under DATA_MIGRATION_CHUNK_MAX_MB of the table segment.
+        min_chunks: Minimum number of chunks, usually the extraction concurrency.
+        method: 'partition', 'rowid' (dba_extents), 'pk' (primary key NTILE ranges), 'none',
+            or 'auto' to try them in that order.
+
+    Returns:
+        A list of chunk dicts (chunk_id, method, predicate, binds, partition, key_range) accepted
+        by oracle_helper.stream_oracle_table_batches. A table that cannot be split is one chunk.
+    """
+    if method not in SPLIT_METHODS:
+        raise ValueError(f"Unsupported split method: {method}")
+    owner = schema_name.upper()
+    table = table_name.upper()
+    if method == 'none':
+        return [_chunk(1, 'none')]
+
+    with oracle_helper.get_oracle_connection(details.user, details.password, details.host, details.port, details.service_name, details.sid) as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT num_rows FROM all_tables WHERE owner = :owner AND table_name = :table_name", owner=owner, table_name=table)
+        row = cursor.fetchone()
+        num_rows = row[0] if row and row[0] else 0
+        # Statistics can be stale or missing, so the segment size also bounds the chunk size
+        segment_bytes = _segment_bytes(cursor, owner, table)
+        chunk_max_bytes = CHUNK_MAX_MB * 1024 * 1024
+        chunk_count = max(min_chunks, math.ceil(num_rows / chunk_rows) if chunk_rows else 1,
+                          math.ceil(sum(segment_bytes.values()) / chunk_max_bytes) if chunk_max_bytes else 1)
+
+        chunks = []
+        for candidate in (['partition', 'rowid', 'pk'] if method == 'auto' else [method]):
+            try:
+                if candidate == 'partition':
+                    chunks = _partition_chunks(cursor, owner, table, chunk_rows, segment_bytes, chunk_max_bytes)
+                elif candidate == 'rowid' and chunk_count > 1:
+                    chunks = _rowid_chunks(cursor, owner, table, chunk_count)
+                elif candidate == 'pk' and chunk_count > 1:
+                    chunks = _pk_chunks(cursor, owner, table, chunk_count)
+            except oracledb.Error as e:
+                # e.g. no SELECT privilege on dba_extents; fall through to the next method
+                logger.warning(f"Could not split {owner}.{table} by {candidate}: {e}")
+                chunks = []
+            if chunks:
+                break
+
+    if not chunks:
+        chunks = [_chunk(1, 'none')]
+    logger.info(f"Split {owner}.{table} (~{num_rows} rows, {sum(segment_bytes.values()) // (1024 * 1024)} MB) into {len(chunks)} chunks by {chunks[0]['method']}.")
+    return chunks
+
+
+class _ChunkReader:
+    """One chunk being read on a worker thread into a bounded queue of fetch batches."""
+
+    def __init__(self, chunk: dict, queue_batches: int, ready: threading.Condition):
+        self.chunk = chunk
+        self.batches = queue.Queue(maxsize=queue_batches)
+        self.description = None
+        self.done = False
+        self.error = None
+        self.cancelled = False
+        self._ready = ready
+
+    def is_ready(self) -> bool:
+        # Worth handing to the consumer: finished, failed, or blocked on a full queue
+        return self.done or self.batches.full()
+
+    def read(self, details, schema_name: str, table_name: str, batch_size: int, throttle=None):
+        try:
+            with closing(oracle_helper.stream_oracle_table_batches(
+                    details, schema_name, table_name, batch_size, chunk=self.chunk, throttle=throttle)) as batches:
+                self.description = next(batches)
+                for batch in batches:
+                    # LOB locators die with this chunk's session, so large LOBs are read before it closes
+                    batch = type_mapping.materialize_lobs(batch, self.description)
+                    while not self.cancelled:
+                        try:
+                            self.batches.put(batch, timeout=_QUEUE_POLL_INTERVAL)
+                            break
+                        except queue.Full:
+                            self._notify()
+                    if self.cancelled:
+                        return
+                    if self.batches.full():
+                        self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self):
+        with self._ready:
+            self._ready.notify_all()
+
+    def drain(self) -> Iterator[list]:
+        """Yields the chunk's batches as they are read."""
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                yield self.batches.get(timeout=_QUEUE_POLL_INTERVAL)
+            except queue.Empty:
+                if self.done and self.batches.empty():
+                    if self.error is not None:
+                        raise self.error
+                    return
+
+
+def read_chunks_parallel(
+    details: models.OracleConnectionDetails,
+    schema_name: str,
+    table_name: str,
+    chunks: list[dict],
+    concurrency: int = DEFAULT_EXTRACTION_CONCURRENCY,
+    batch_size: int = oracle_helper.DEFAULT_FETCH_BATCH_SIZE,
+    throttle=None,
+    queue_batches: int = CHUNK_QUEUE_BATCHES
+) -> Iterator[tuple[dict, list, Iterator[list]]]:
+    """
+    Reads chunks with up to `concurrency` Oracle sessions at once. Each session fills a queue of at
+    most `queue_batches` fetch batches and waits while it is full, so memory stays bounded by
+    concurrency x queue_batches x batch_size rows however large the chunks are. Chunks are handed
+    out one at a time, first those that finished or filled their queue; a new chunk starts once a
+    handed-out chunk has been consumed.
+
+    With a throttle (extraction_throttle.AdaptiveThrottle), a new chunk only starts while fewer
+    than throttle.concurrency chunks are being read, and fetch sizes follow throttle.batch_size.
+
+    Yields:
+        (chunk, column metadata, batches) tuples; batches must be consumed before the next tuple
+        is requested.
+    """
+    pending_chunks = iter(chunks)
+    ready = threading.Condition()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"extract-{table_name}") as executor:
+        in_flight = []
+
+        def fill():
+            # The throttle's reader count changes while chunks are being read
+            limit = concurrency if throttle is None else min(concurrency, throttle.concurrency)
+            while len(in_flight) < limit:
+                chunk = next(pending_chunks, None)
+                if chunk is None:
+                    return
+                reader = _ChunkReader(chunk, queue_batches, ready)
+                executor.submit(reader.read, details, schema_name, table_name, batch_size, throttle)
+                in_flight.append(reader)
+
+        fill()
+        try:
+            while in_flight:
+                with ready:
+                    while not any(reader.is_ready() for reader in in_flight):
+                        ready.wait(_QUEUE_POLL_INTERVAL)
+                reader = next(reader for reader in in_flight if reader.is_ready())
+                if reader.description is None:
+                    raise reader.error or RuntimeError(f"Chunk {reader.chunk['chunk_id']} returned no column metadata.")
+                yield reader.chunk, reader.description, reader.drain()
+                in_flight.remove(reader)
+                fill()
+        finally:
+            for reader in in_flight:
+                reader.cancelled = True
+
+
+def stream_table_batches_parallel(
+    details: models.OracleConnectionDetails,
+    schema_name: str,
+    table_name: str,
+    chunk_rows: int,
+    concurrency: int = DEFAULT_EXTRACTION_CONCURRENCY,
+    throttle=None
+) -> Iterator[list]:
+    """
+    Drop-in replacement for oracle_helper.stream_oracle_table_batches that reads the table with
+    `concurrency` sessions. Yields the column metadata first, then one list of rows per fetch batch.
+    Falls back to a single streaming cursor when the table cannot be split. A throttle
+    (extraction_throttle.AdaptiveThrottle) adapts readers and fetch sizes to the source's latency.
+    """
+    chunks = split_table(details, schema_name, table_name, chunk_rows, concurrency) if concurrency > 1 else []
+    if len(chunks) <= 1:
+        yield from oracle_helper.stream_oracle_table_batches(details, schema_name, table_name, throttle=throttle)
+        return
+
+    description_sent = False
+    for _, description, batches in read_chunks_parallel(details, schema_name, table_name, chunks, concurrency, throttle=throttle):
+        if not description_sent:
+            yield description
+            description_sent = True
+        yield from batches
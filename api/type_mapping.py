@@ -0,0 +1,201 @@
+import uuid
+import decimal
+from typing import Callable, Iterable, Optional
+
+import oracledb
+
+# Converters are chosen once per table from the Oracle column metadata (cursor.description) and
+# the target column's PostgreSQL data_type, then applied to every row without inspecting values.
+# Columns that psycopg2/COPY already handle natively (int, Decimal, float, str, datetime, bytes)
+# get no converter at all.
+
+_TRUE_FLAGS = frozenset(('Y', 'YES', 'T', 'TRUE', '1'))
+
+# Alias prefix of the extra select-list columns that carry large LOBs as locators (see oracle_helper)
+LOB_LOCATOR_PREFIX = "LOB#"
+_LOB_TYPES = (oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB, oracledb.DB_TYPE_BLOB)
+_INLINE_LOB_TYPES = {
+    oracledb.DB_TYPE_CLOB: oracledb.DB_TYPE_LONG,
+    oracledb.DB_TYPE_NCLOB: oracledb.DB_TYPE_LONG_NVARCHAR,
+    oracledb.DB_TYPE_BLOB: oracledb.DB_TYPE_LONG_RAW,
+}
+
+
+def output_type_handler(cursor, metadata):
+    """
+    Fetches NUMBER columns that are not plain integers as Decimal instead of float, so values
+    such as NUMBER(12,2) reach PostgreSQL numeric columns without binary rounding, and LOB
+    columns as str/bytes in the same round trip as the row. Only the "LOB#n" columns,
+    which hold LOBs above the inline threshold, are left as locators.
+    """
+    if metadata.type_code is oracledb.DB_TYPE_NUMBER and not (metadata.scale == 0 and metadata.precision):
+        return cursor.var(decimal.Decimal, arraysize=cursor.arraysize)
+    if metadata.type_code in _INLINE_LOB_TYPES and not metadata.name.startswith(LOB_LOCATOR_PREFIX):
+        return cursor.var(_INLINE_LOB_TYPES[metadata.type_code], arraysize=cursor.arraysize)
+
+
+def _date_part(value):
+    return value.date()
+
+
+def _time_part(value):
+    return value.time()
+
+
+def _raw_to_uuid(value) -> str:
+    return str(uuid.UUID(bytes=value))
+
+
+def _number_to_bool(value) -> bool:
+    return value != 0
+
+
+def _flag_to_bool(value) -> bool:
+    return value.strip().upper() in _TRUE_FLAGS
+
+
+def _rstrip_padding(value: str) -> str:
+    return value.rstrip(' ')
+
+
+def _interval_ym_to_text(value) -> str:
+    return f"{value.years} years {value.months} months"
+
+
+def _read_lob(value):
+    # Inline LOBs are already str/bytes; only values above the inline threshold are locators
+    return value.read() if isinstance(value, oracledb.LOB) else value
+
+
+def _null_safe(converter: Callable) -> Callable:
+    def convert(value):
+        return None if value is None else converter(value)
+    return convert
+
+
+# (Oracle type, PostgreSQL data_type) -> converter; a None PostgreSQL type matches any target
+_CONVERTERS = {
+    (oracledb.DB_TYPE_DATE, 'date'): _date_part,
+    (oracledb.DB_TYPE_TIMESTAMP, 'date'): _date_part,
+    (oracledb.DB_TYPE_DATE, 'time without time zone'): _time_part,
+    (oracledb.DB_TYPE_TIMESTAMP, 'time without time zone'): _time_part,
+    (oracledb.DB_TYPE_RAW, 'uuid'): _raw_to_uuid,
+    (oracledb.DB_TYPE_NUMBER, 'boolean'): _number_to_bool,
+    (oracledb.DB_TYPE_CHAR, 'boolean'): _flag_to_bool,
+    (oracledb.DB_TYPE_VARCHAR, 'boolean'): _flag_to_bool,
+    # CHAR(n) is blank-padded in Oracle; the padding is not part of the value in text columns
+    (oracledb.DB_TYPE_CHAR, 'text'): _rstrip_padding,
+    (oracledb.DB_TYPE_CHAR, 'character varying'): _rstrip_padding,
+    (oracledb.DB_TYPE_NCHAR, 'text'): _rstrip_padding,
+    (oracledb.DB_TYPE_NCHAR, 'character varying'): _rstrip_padding,
+    (oracledb.DB_TYPE_ROWID, None): str,
+    (oracledb.DB_TYPE_UROWID, None): str,
+    (oracledb.DB_TYPE_INTERVAL_YM, None): _interval_ym_to_text,
+    (oracledb.DB_TYPE_CLOB, None): _read_lob,
+    (oracledb.DB_TYPE_NCLOB, None): _read_lob,
+    (oracledb.DB_TYPE_BLOB, None): _read_lob,
+}
+
+
+def build_column_converters(description: list, target_types: Optional[list[Optional[str]]] = None,
+                            stream_lobs: bool = False) -> list[Optional[Callable]]:
+    """
+    Builds one converter per source column.
+
+    Args:
+        description: The Oracle cursor.description of the source query.
+        target_types: PostgreSQL data_type (information_schema) of the target column for each
+            source column, or None where the column is not loaded or the type is unknown.
+        stream_lobs: Leave large LOB locators unread for a consumer that streams them (COPY);
+            otherwise they are read into str/bytes.
+
+    Returns:
+        A list aligned with description holding a None-safe converter, or None where the
+        fetched value can be bound as is.
+    """
+    target_types = target_types or [None] * len(description)
+    converters = []
+    for column, target_type in zip(description, target_types):
+        oracle_type = column[1]
+        if stream_lobs and oracle_type in _LOB_TYPES:
+            converters.append(None)
+            continue
+        converter = _CONVERTERS.get((oracle_type, target_type)) or _CONVERTERS.get((oracle_type, None))
+        converters.append(_null_safe(converter) if converter else None)
+    return converters
+
+
+def build_mapped_converters(description: list, column_mapping: list[tuple[str, int]],
+                            pg_column_types: dict[str, str], stream_lobs: bool = False) -> list[Optional[Callable]]:
+    """
+    Builds the converters for a source-to-target column mapping (as returned by
+    postgres_utils.map_source_columns_to_target), aligned with the mapping.
+    """
+    target_types = [None] * len(description)
+    for target_col, index in column_mapping:
+        target_types[index] = pg_column_types.get(target_col)
+    converters = build_column_converters(description, target_types, stream_lobs)
+    return [converters[index] for _, index in column_mapping]
+
+
+def compile_row_converter(source_indexes: list[int], converters: list[Optional[Callable]]) -> Callable:
+    """
+    Compiles a function that picks the source columns at source_indexes from a row and applies
+    the matching converters (aligned with source_indexes).
+    """
+    steps = list(zip(source_indexes, converters))
+    if all(converter is None for converter in converters):
+        def convert_row(row):
+            return [row[index] for index in source_indexes]
+    else:
+        def convert_row(row):
+            return [row[index] if converter is None else converter(row[index]) for index, converter in steps]
+    return convert_row
+
+
+def convert_rows(rows: Iterable, row_converter: Callable) -> list[list]:
+    """Applies a compiled row converter to a batch of rows."""
+    return [row_converter(row) for row in rows]
+
+
+def materialize_lobs(rows: list, description: list) -> list:
+    """
+    Reads the LOB locators in a batch from oracle_helper.stream_oracle_table_batches into
+    str/bytes in place, for rows that outlive the Oracle session they were fetched on.
+    """
+    positions = [index for index, column in enumerate(description) if column[1] in _LOB_TYPES]
+    if positions:
+        for row in rows:
+            for position in positions:
+                row[position] = _read_lob(row[position])
+    return rows
+
+
+def copy_value_kinds(description: list, source_indexes: list[int], converters: list[Optional[Callable]]) -> list[str]:
+    """
+    Returns the COPY text formatter kind (see postgres_utils.COPY_TEXT_FORMATTERS) for each loaded
+    column: 'plain' for values whose str() never needs escaping, 'text' for character data, 'bytes'
+    for RAW, 'clob'/'blob' for LOBs (streamed when still a locator), and 'any' for converted or
+    other columns.
+    """
+    kinds = []
+    for index, converter in zip(source_indexes, converters):
+        oracle_type = description[index][1]
+        if converter is None and oracle_type in (oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB):
+            kinds.append('clob')
+        elif converter is None and oracle_type is oracledb.DB_TYPE_BLOB:
+            kinds.append('blob')
+        elif converter is not None:
+            kinds.append('any')
+        elif oracle_type in (oracledb.DB_TYPE_NUMBER, oracledb.DB_TYPE_BINARY_FLOAT, oracledb.DB_TYPE_BINARY_DOUBLE,
+                             oracledb.DB_TYPE_BINARY_INTEGER, oracledb.DB_TYPE_DATE, oracledb.DB_TYPE_TIMESTAMP,
+                             oracledb.DB_TYPE_TIMESTAMP_TZ, oracledb.DB_TYPE_TIMESTAMP_LTZ):
+            kinds.append('plain')
+        elif oracle_type in (oracledb.DB_TYPE_VARCHAR, oracledb.DB_TYPE_NVARCHAR, oracledb.DB_TYPE_CHAR,
+                             oracledb.DB_TYPE_NCHAR, oracledb.DB_TYPE_LONG):
+            kinds.append('text')
+        elif oracle_type in (oracledb.DB_TYPE_RAW, oracledb.DB_TYPE_LONG_RAW):
+            kinds.append('bytes')
+        else:
+            kinds.append('any')
+    return kinds
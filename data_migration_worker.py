@@ -0,0 +1,308 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+
+import pika
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry import trace
+from opentelemetry.context import attach, detach
+from opentelemetry.instrumentation.logging import LoggingInstrumentor
+from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+LoggingInstrumentor().instrument()
+Psycopg2Instrumentor().instrument()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(processName)s - %(otelTraceID)s - %(otelSpanID)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from api import database, queues, models, bulk_loader, row_batches, migration_progress, table_splitter, delta_sync, migration_scheduler, data_validation, extraction_throttle, batch_spool, oracle_helper
+
+# Data migration service: table loads, delta syncs, validations and multi-table schedules run here,
+# in a pool of consumer processes of their own, so a long table load never holds up DDL execution
+# or conversions in worker.py. Each process runs one job at a time on a background thread while its
+# connection keeps serving broker heartbeats.
+PROCESSES = int(os.getenv("DATA_MIGRATION_WORKER_PROCESSES", "2"))
+HEARTBEAT = int(os.getenv("DATA_MIGRATION_WORKER_HEARTBEAT", "60"))
+RESTART_DELAY = 5
+# A redelivered job whose lock is still held by a worker that died is requeued after this delay
+# until the lock expires (DATA_MIGRATION_JOB_LOCK_TTL)
+LOCKED_RETRY_DELAY = 30
+
+tracer = trace.get_tracer(__name__)
+
+
+def _setup_tracing(process_index: int):
+    resource = Resource.create(attributes={
+        "service.name": "spf-converter-data-migration-worker",
+        "service.instance.id": f"data-migration-worker-{os.getpid()}-{process_index}"
+    })
+    provider = TracerProvider(resource=resource)
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))))
+    trace.set_tracer_provider(provider)
+
+
+def _migrate_table(data: dict):
+    """Runs the initial load of a table whose DDL was just executed (the job row already exists)."""
+    job_id = data['job_id']
+    source_details = models.OracleConnectionDetails(**data['source_connection'])
+    source_schema = data['source_schema']
+    table_name = data['object_name']
+    target_table = data.get('target_table') or table_name
+    extraction_concurrency = data.get('extraction_concurrency') or table_splitter.DEFAULT_EXTRACTION_CONCURRENCY
+    delta_column = data.get('delta_column')
+
+    if bulk_loader.DEFAULT_LOAD_MODE == 'copy':
+        # Stream the table straight into PostgreSQL with COPY, one transaction per chunk
+        return bulk_loader.migrate_table_data(
+            job_id,
+            source_details,
+            source_schema,
+            table_name,
+            data['pg_creds'],
+            data['target_schema'],
+            target_table,
+            concurrency=extraction_concurrency,
+            delta_column=delta_column,
+            lob_threshold=data.get('lob_inline_threshold'),
+            load_strategy=data.get('load_strategy', 'in_place')
+        )
+
+    # Stream data from Oracle and publish row batches to data_migration_row_inserts queue
+    rabbitmq_connection = None
+    # Extracted batches wait on disk rather than in the Oracle sessions while the loaders are behind
+    spool = batch_spool.BatchSpool(job_id)
+    try:
+        delta_sync.record_baseline_watermark(job_id, source_details, source_schema, table_name, delta_column)
+        batches = table_splitter.stream_table_batches_parallel(
+            source_details,
+            source_schema,
+            table_name,
+            bulk_loader.DEFAULT_CHUNK_SIZE,
+            extraction_concurrency,
+            throttle=extraction_throttle.for_source(
+                job_id, source_details, extraction_concurrency, oracle_helper.DEFAULT_FETCH_BATCH_SIZE
+            )
+        )
+        oracle_column_names = [col[0] for col in next(batches)]
+
+        rabbitmq_connection = queues.get_rabbitmq_connection()
+        if not rabbitmq_connection:
+            raise RuntimeError("Failed to connect to RabbitMQ.")
+        published_rows = row_batches.publish_row_batches(
+            rabbitmq_connection.channel(),
+            queues.QUEUE_CONFIG['DATA_MIGRATION_ROW_INSERTS']['queue'],
+            job_id,
+            oracle_column_names,
+            spool.buffer(batches),
+            window=migration_progress.InFlightWindow(job_id, data.get('in_flight_window'), rabbitmq_connection.sleep)
+        )
+
+        migration_progress.set_total_rows(job_id, published_rows)
+        logger.info(f"Published {published_rows} rows to RabbitMQ for data migration job {job_id}.")
+        return published_rows
+    except Exception as e:
+        database.update_data_migration_job_status(job_id, "FAILED", error_details=str(e))
+        raise
+    finally:
+        spool.close()
+        if rabbitmq_connection and rabbitmq_connection.is_open:
+            rabbitmq_connection.close()
+
+
+# --- Callback for data_migration_table_jobs queue: initial loads, checkpointed (re)loads, delta syncs and validations ---
+def data_migration_table_callback(ch, method, properties, body):
+    database.initialize_db_pool()
+    data = json.loads(body)
+    job_id = data['job_id']
+
+    # Extract trace context from message properties
+    carrier = properties.headers if properties.headers else {}
+    ctx = TraceContextTextMapPropagator().extract(carrier)
+    token = attach(ctx)
+
+    # Acked only once the job returns or fails (the broker's consumer_timeout must allow for long loads), so a
+    # worker that dies mid-load gets the message redelivered and the job resumes from its chunk checkpoints
+    requeue = False
+    try:
+        with tracer.start_as_current_span("data_migration_table_job", context=ctx) as span:
+            span.set_attribute("job.id", job_id)
+            span.set_attribute("job.type", "data_migration_table")
+            if data.get('action') == 'validate':
+                logger.info(f" [x] Received data validation for job {job_id}")
+                result = data_validation.validate_data_migration_job(job_id)
+                span.set_attribute("validation.status", result["status"])
+                span.set_status(trace.Status(trace.StatusCode.OK))
+                return
+            if data.get('action') == 'migrate':
+                logger.info(f" [x] Received initial load of table {data['object_name']} for data migration job {job_id}")
+                if method.redelivered and bulk_loader.DEFAULT_LOAD_MODE == 'copy':
+                    migrated_rows = bulk_loader.resume_table_data(job_id)
+                elif method.redelivered:
+                    # Row batches already published cannot be told apart from a new run's; publishing again would duplicate rows
+                    database.update_data_migration_job_status(
+                        job_id, "FAILED", error_details="The worker stopped while publishing row batches; start a new job.")
+                    span.set_status(trace.Status(trace.StatusCode.ERROR, "Row batch publishing was interrupted"))
+                    return
+                else:
+                    migrated_rows = _migrate_table(data)
+                span.set_attribute("rows.migrated", migrated_rows)
+                span.set_status(trace.Status(trace.StatusCode.OK))
+                return
+            sync_mode = data.get('sync_mode', 'full')
+            span.set_attribute("sync.mode", sync_mode)
+            logger.info(f" [x] Received data migration table job {job_id} ({sync_mode})")
+            if sync_mode == 'delta':
+                migrated_rows = delta_sync.sync_table_delta(job_id)
+            else:
+                migrated_rows = bulk_loader.resume_table_data(job_id)
+            span.set_attribute("rows.migrated", migrated_rows)
+            span.set_status(trace.Status(trace.StatusCode.OK))
+    except bulk_loader.JobLockedError as e:
+        if method.redelivered:
+            # Most likely the lock of the worker that died with this message; retry once it has expired
+            logger.warning(f" [!] Data migration table job {job_id} is still locked; requeueing in {LOCKED_RETRY_DELAY}s.")
+            time.sleep(LOCKED_RETRY_DELAY)
+            requeue = True
+        else:
+            logger.error(f" [!] Data migration table job {job_id} skipped: {e}")
+    except Exception as e:
+        # The failure is recorded on the job; it can be re-queued from the API
+        logger.error(f" [!] Data migration table job {job_id} failed: {e}", exc_info=True)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, f"Data migration table job failed: {e}"))
+    finally:
+        if requeue:
+            ch.basic_reject(delivery_tag=method.delivery_tag, requeue=True)
+        else:
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+        detach(token)
+
+
+# --- Callback for data_migration_schedule_jobs queue: loads the tables of a parent job concurrently ---
+def data_migration_schedule_callback(ch, method, properties, body):
+    database.initialize_db_pool()
+    data = json.loads(body)
+    parent_job_id = data['parent_job_id']
+
+    carrier = properties.headers if properties.headers else {}
+    ctx = TraceContextTextMapPropagator().extract(carrier)
+    token = attach(ctx)
+
+    # Acked once the schedule finishes, like table jobs; a redelivered schedule reuses the per-table jobs and their checkpoints
+    try:
+        with tracer.start_as_current_span("data_migration_schedule_job", context=ctx) as span:
+            span.set_attribute("job.id", parent_job_id)
+            span.set_attribute("job.type", "data_migration_schedule")
+            span.set_attribute("tables.count", len(data['tables']))
+            logger.info(f" [x] Received data migration schedule {parent_job_id} for {len(data['tables'])} tables")
+            progress = migration_scheduler.run_parent_migration(
+                parent_job_id,
+                data['tables'],
+                extraction_concurrency=data.get('extraction_concurrency'),
+                respect_foreign_keys=data.get('respect_foreign_keys', True),
+                maintenance_work_mem=data.get('maintenance_work_mem'),
+                load_strategy=data.get('load_strategy', 'in_place')
+            )
+            span.set_attribute("rows.migrated", progress["migrated_rows"])
+            span.set_attribute("tables.failed", progress["tables_failed"])
+            span.set_status(trace.Status(trace.StatusCode.OK))
+    except Exception as e:
+        logger.error(f" [!] Data migration schedule {parent_job_id} failed: {e}", exc_info=True)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, f"Data migration schedule failed: {e}"))
+    finally:
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        detach(token)
+
+
+CALLBACKS = {
+    'DATA_MIGRATION_TABLE': data_migration_table_callback,
+    'DATA_MIGRATION_SCHEDULE': data_migration_schedule_callback,
+}
+
+
+def _on_background_thread(connection, callback):
+    """
+    Wraps a callback so it runs on its own thread while this one keeps processing connection
+    events (heartbeats and the callback's acks). BlockingConnection does not dispatch consumer
+    callbacks re-entrantly, so the process still handles one message at a time.
+    """
+    def on_message(ch, method, properties, body):
+        job = threading.Thread(target=callback, args=(queues.ThreadsafeChannel(connection, ch), method, properties, body))
+        job.start()
+        while job.is_alive():
+            connection.process_data_events(time_limit=1)
+        # Deliver an ack scheduled just before the thread finished
+        connection.process_data_events(time_limit=0)
+    return on_message
+
+
+def _consume(process_index: int):
+    _setup_tracing(process_index)
+    connection = pika.BlockingConnection(
+        pika.ConnectionParameters(os.getenv('RABBITMQ_HOST', 'localhost'), heartbeat=HEARTBEAT)
+    )
+    channel = connection.channel()
+    channel.basic_qos(prefetch_count=1)
+    for queue_key, callback in CALLBACKS.items():
+        channel.basic_consume(queue=queues.QUEUE_CONFIG[queue_key]['queue'], on_message_callback=_on_background_thread(connection, callback))
+    logger.info(f"[*] Data migration worker process {process_index} listening on {', '.join(queues.QUEUE_CONFIG[key]['queue'] for key in CALLBACKS)}.")
+    try:
+        channel.start_consuming()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    # Declare the service's queues once before the consumers start
+    connection = queues.get_rabbitmq_connection()
+    if not connection:
+        raise RuntimeError("Failed to connect to RabbitMQ.")
+    channel = connection.channel()
+    for queue_key in CALLBACKS:
+        queues.declare_quorum_queue(channel, queues.QUEUE_CONFIG[queue_key]['queue'], queues.QUEUE_CONFIG[queue_key]['dlx'])
+    connection.close()
+
+    processes = {}
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f' [*] Starting {PROCESSES} data migration worker processes. To exit press CTRL+C')
+    try:
+        while True:
+            # Start the pool and replace any process that died, e.g. after losing its connection
+            for index in range(PROCESSES):
+                process = processes.get(index)
+                if process is not None and process.is_alive():
+                    continue
+                if process is not None:
+                    logger.warning(f"Data migration worker process {index} exited with code {process.exitcode}; restarting.")
+                process = multiprocessing.Process(target=_consume, args=(index,), name=f"data-migration-{index}")
+                process.start()
+                processes[index] = process
+            time.sleep(RESTART_DELAY)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('Interrupted')
+        sys.exit(0)
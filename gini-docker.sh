@@ -223,6 +223,8 @@ sleep 3
 echo "-------------------------------------------------------------------"
 echo "IMPORTANT: Please open a NEW TERMINAL and run the worker manually:"
 echo "cd $(pwd) && source .venv/bin/activate && python worker.py"
+echo "and, in another terminal, the data migration worker:"
+echo "cd $(pwd) && source .venv/bin/activate && python data_migration_worker.py"
 echo "-------------------------------------------------------------------"
 sleep 5 # Give user time to read the message
 
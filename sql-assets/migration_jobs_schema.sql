@@ -38,6 +38,9 @@ CREATE TABLE IF NOT EXISTS migration_jobs.jobs (
     FOREIGN KEY (parent_job_id) REFERENCES migration_jobs.jobs(job_id) ON DELETE CASCADE
 );
 
+-- Ollama tokens and timings of a conversion job, e.g. {"model": ..., "prompt_tokens": ..., "output_tokens": ..., "eval_ms": ...}
+ALTER TABLE migration_jobs.jobs ADD COLUMN IF NOT EXISTS llm_usage JSONB;
+
 CREATE TABLE IF NOT EXISTS migration_jobs.data_migration_jobs (
     job_id UUID PRIMARY KEY,
     status TEXT NOT NULL,
@@ -55,6 +58,79 @@ CREATE TABLE IF NOT EXISTS migration_jobs.data_migration_jobs (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
 
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS failed_rows INTEGER DEFAULT 0;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS failed_row_details JSONB DEFAULT '[]'::jsonb;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS extraction_concurrency INTEGER;
+-- Delta sync: 'full' or 'delta', the change-tracking column (NULL = ORA_ROWSCN) and the last synced watermark
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS sync_mode TEXT DEFAULT 'full';
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS delta_column TEXT;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS sync_watermark JSONB;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS last_synced_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS last_sync_rows INTEGER;
+-- CLOB/BLOB values above this size are streamed in chunks instead of fetched inline (NULL = default)
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS lob_inline_threshold INTEGER;
+-- Multi-table loads: the scheduling parent job (migration_jobs.jobs), the optimizer row estimate
+-- used for ordering and ETA, and when the load started
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS parent_job_id UUID;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS estimated_rows BIGINT;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS started_at TIMESTAMP WITH TIME ZONE;
+CREATE INDEX IF NOT EXISTS data_migration_jobs_parent_job_id_idx ON migration_jobs.data_migration_jobs (parent_job_id);
+-- Row batches published to the row insert queue but not yet loaded, per job (NULL = default)
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS in_flight_window INTEGER;
+-- COPY loads: 'in_place' or 'staging_swap' (UNLOGGED staging table swapped in after the load, see api/staging_swap.py)
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS load_strategy TEXT DEFAULT 'in_place';
+-- Source/target data validation: MATCH, MISMATCH, IN_PROGRESS or FAILED, with chunk counts and mismatching keys
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS validation_status TEXT;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS validation_result JSONB;
+ALTER TABLE migration_jobs.data_migration_jobs ADD COLUMN IF NOT EXISTS validated_at TIMESTAMP WITH TIME ZONE;
+
+CREATE TABLE IF NOT EXISTS migration_jobs.data_migration_chunks (
+    job_id UUID NOT NULL REFERENCES migration_jobs.data_migration_jobs(job_id) ON DELETE CASCADE,
+    chunk_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    row_count INTEGER DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (job_id, chunk_id)
+);
+
+-- Chunk plan for resumable table loads: how each chunk selects its rows from the source table
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS split_method TEXT;
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS predicate TEXT;
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS binds JSONB DEFAULT '{}'::jsonb;
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS partition_name TEXT;
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS key_range JSONB;
+-- Target transaction committing the chunk (or, for an unsplit table, its next row_count rows); resume asks
+-- the target whether it committed, so a crash between the target commit and the checkpoint never copies twice
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS target_xid BIGINT;
+ALTER TABLE migration_jobs.data_migration_chunks ADD COLUMN IF NOT EXISTS pending_row_count INTEGER;
+
+-- Indexes and constraints of a multi-table load, built after the data is in (see api/ddl_phases.py)
+CREATE TABLE IF NOT EXISTS migration_jobs.deferred_ddl (
+    parent_job_id UUID NOT NULL REFERENCES migration_jobs.jobs(job_id) ON DELETE CASCADE,
+    statement_id INTEGER NOT NULL,
+    table_name TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error_message TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (parent_job_id, statement_id)
+);
+
+-- Verified LLM conversions keyed by a hash of the normalized Oracle SQL, model and prompt version (see api/conversion_cache.py)
+CREATE TABLE IF NOT EXISTS migration_jobs.conversion_cache (
+    cache_key TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    normalized_sql TEXT NOT NULL,
+    converted_sql TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    hit_count INTEGER DEFAULT 0,
+    last_hit_at TIMESTAMP WITH TIME ZONE
+);
+
 CREATE TABLE IF NOT EXISTS migration_jobs.sql_execution_jobs (
     job_id UUID PRIMARY KEY,
     status TEXT NOT NULL,
@@ -17,6 +17,28 @@ def start_migration(oracle_credentials, postgres_credentials, source_schema, sou
     except requests.exceptions.HTTPError as e:
         return {"status": "error", "detail": e.response.json()}
 
+def split_ddl_phases(sql):
+    response = requests.post(f"{API_URL}/ddl/phases", json={"sql": sql})
+    response.raise_for_status()
+    return response.json()
+
+def start_table_migrations(oracle_credentials, postgres_credentials, source_schema, destination_schema, tables, respect_foreign_keys=True, post_load_sql=None):
+    payload = {
+        "oracle_credentials": oracle_credentials,
+        "postgres_credentials": postgres_credentials,
+        "source_schema": source_schema,
+        "destination_schema": destination_schema,
+        "tables": tables,
+        "respect_foreign_keys": respect_foreign_keys,
+        "post_load_sql": post_load_sql,
+    }
+    try:
+        response = requests.post(f"{API_URL}/migrate/tables", json=payload)
+        response.raise_for_status()
+        return {"status": "success", "job_id": response.json()["job_id"]}
+    except requests.exceptions.HTTPError as e:
+        return {"status": "error", "detail": e.response.json()}
+
 def check_migration_status(task_id):
     response = requests.get(f"{API_URL}/migrate/status/{task_id}")
     response.raise_for_status()
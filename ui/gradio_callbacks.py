@@ -744,9 +744,12 @@ def gini_full_workflow(
         # Step 4: Execute Converted SQLs on New PostgreSQL Database
         yield "Step 4/5: Executing converted SQLs on PostgreSQL...", converted_sql_content, "", 0.7
 
-        # Write converted_sql_content to a temporary file for submit_sql_file
+        # Tables are created without indexes and key constraints; those are built after the data load
+        ddl_phases = api_client.split_ddl_phases(converted_sql_content)
+
+        # Write the create phase to a temporary file for submit_sql_file
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".sql") as temp_sql_file:
-            temp_sql_file.write(converted_sql_content)
+            temp_sql_file.write(ddl_phases["create_sql"])
             temp_sql_file_path = temp_sql_file.name
 
         # Create a mock file object that submit_sql_file can use
@@ -783,20 +786,17 @@ def gini_full_workflow(
         if not ora_object_names:
             raise Exception("No Oracle objects selected for data migration.")
 
-        migration_job_ids = []
-        for table_name in ora_object_names:
-            # Assuming destination schema and table name are the same as source for simplicity
-            migration_result = dm_start_migration(
-                ora_user, ora_password, ora_host, ora_port, ora_service_name, ora_schemas[0], # Assuming single schema selection
-                pg_user, pg_password, pg_host, pg_port, pg_db_name, ora_schemas[0], # Assuming single schema selection
-                table_name, table_name
-            )
-            if migration_result["status"] == "success":
-                migration_job_ids.append(migration_result["job_id"])
-            else:
-                raise Exception(f"Failed to start migration for table {table_name}: {migration_result['detail']}")
+        # All tables go to one parent job; the scheduler loads them concurrently, biggest and referenced tables first
+        migration_result = api_client.start_table_migrations(
+            oracle_credentials, pg_credentials, ora_schemas[0], ora_schemas[0], # Assuming single schema selection
+            list(ora_object_names),
+            post_load_sql=ddl_phases["post_load_sql"] or None
+        )
+        if migration_result["status"] != "success":
+            raise Exception(f"Failed to start data migration: {migration_result['detail']}")
+        migration_job_id = migration_result["job_id"]
 
-        yield f"Step 5/5: Data migration jobs submitted: {migration_job_ids}. Polling status...", converted_sql_content, "Data migration initiated.", 0.95
+        yield f"Step 5/5: Data migration job {migration_job_id} submitted for {len(ora_object_names)} tables. Progress and ETA: /api/migration/status/{migration_job_id}", converted_sql_content, "Data migration initiated.", 0.95
 
         # Poll for overall migration status (this part might need a new aggregate polling function)
         # For now, just report submission
@@ -40,14 +40,14 @@ logger = logging.getLogger(__name__)
 # Initialize Valkey client
 valkey_client = redis.Redis(host='localhost', port=6379, db=0)
 
-# --- FIX 2: Import ThreadPoolExecutor for parallel processing ---
-# No longer needed as we are moving to a dedicated consumer for DDL jobs
-# from concurrent.futures import ThreadPoolExecutor
+# Conversions run on a thread pool of their own; the model-side limit is OLLAMA_MODEL_CONCURRENCY in ai_converter
+from concurrent.futures import ThreadPoolExecutor
+CONVERSION_CONCURRENCY = int(os.getenv("CONVERSION_CONCURRENCY", "4"))
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
 WORKER_ID = str(uuid.uuid4())[:8]
-from api import database, queues, ai_converter, migration_db, schema_comparer, verification, oracle_helper, job_repository, models
+from api import database, queues, ai_converter, migration_db, schema_comparer, verification, oracle_helper, job_repository, models, row_batches, table_splitter, conversion_cache, rule_converter, prompt_batcher, llm_metrics
 from api.database import get_db_connection, get_verification_db_connection # Import new context managers
 from api.verification import verify_procedure, verify_procedure_with_creds
 
@@ -75,6 +75,21 @@ SQL_CONVERSION_QUEUE = 'conversion_jobs'
 
 
 
+def _record_llm_usage(job_id, span, llm_usage):
+    """Stores the Ollama usage of a conversion job on the job row and its span."""
+    if not llm_usage['requests']:
+        return
+    usage = {field: round(value, 1) if isinstance(value, float) else value for field, value in llm_usage.items()}
+    if usage['eval_ms']:
+        usage['output_tokens_per_second'] = round(usage['output_tokens'] / (usage['eval_ms'] / 1000), 1)
+    for field, value in usage.items():
+        span.set_attribute(f"llm.{field}", value)
+    try:
+        job_repository.save_job_llm_usage(job_id, usage)
+    except Exception as e:
+        logger.warning(f" [!] Job {job_id}: Could not store LLM usage: {e}")
+
+
 def sql_conversion_callback(ch, method, properties, body):
     database.initialize_db_pool()
     database.initialize_verification_db_pool()
@@ -90,6 +105,7 @@ def sql_conversion_callback(ch, method, properties, body):
     target_schema = data.get('target_schema')
     object_name = data.get('object_name')
     data_migration_enabled = data.get('data_migration_enabled')
+    bypass_cache = data.get('bypass_cache', False)
 
     # Extract trace context from message properties
     carrier = properties.headers if properties.headers else {}
@@ -97,10 +113,10 @@ def sql_conversion_callback(ch, method, properties, body):
     token = attach(ctx)
 
     try:
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-        logger.info(f" [x] Received {job_type} conversion job {job_id}. Message acknowledged.")
+        # Acked only once the conversion is finished, so the prefetch limit bounds the generations in flight
+        logger.info(f" [x] Received {job_type} conversion job {job_id}.")
 
-        with tracer.start_as_current_span(f"{job_type}_conversion_job", context=ctx) as span:
+        with tracer.start_as_current_span(f"{job_type}_conversion_job", context=ctx) as span, ai_converter.track_usage() as llm_usage:
             span.set_attribute("job.id", job_id)
             span.set_attribute("parent.job.id", parent_job_id)
             span.set_attribute("job.type", job_type)
@@ -108,8 +124,25 @@ def sql_conversion_callback(ch, method, properties, body):
 
             database.update_job_status(job_id, 'processing')
 
-            converted_sql_chunks = ai_converter.convert_oracle_to_postgres(original_sql)
-            converted_sql = "".join(converted_sql_chunks)
+            # A verified conversion of the same normalized SQL, or plain DDL the rules can translate, skips the LLM call
+            cached_sql = None
+            rule_sql = None
+            if bypass_cache:
+                conversion_cache.record_bypass()
+            else:
+                cached_sql = conversion_cache.lookup(original_sql, source_schema)
+                if cached_sql is None:
+                    rule_sql = rule_converter.convert(original_sql)
+            if cached_sql is not None:
+                logger.info(f" [x] Job {job_id}: Using cached conversion.")
+                converted_sql, conversion_source = cached_sql, 'cache'
+            elif rule_sql is not None:
+                logger.info(f" [x] Job {job_id}: Converted with the rule-based converter.")
+                converted_sql, conversion_source = rule_sql, 'rules'
+            else:
+                # Small statements converted at the same time share one packed request
+                converted_sql, conversion_source = prompt_batcher.convert(original_sql), 'model'
+            span.set_attribute("conversion.source", conversion_source)
 
             # Verification using target connection details
             if target_connection_details:
@@ -133,18 +166,23 @@ def sql_conversion_callback(ch, method, properties, body):
                     target_connection_details
                 )
                 if success:
-                    converted_sql = corrected_sql
+                    converted_sql, conversion_source = corrected_sql, 'model'
 
             if success and not error_message:
                 final_status = 'verified_by_worker'
                 logger.info(f" [x] {job_type.upper()} Job {job_id}: Verification by worker successful.")
                 span.set_status(trace.Status(trace.StatusCode.OK))
                 job_repository.update_job_status(job_id, final_status, original_sql=original_sql, converted_sql=converted_sql)
+                # Only model conversions verified against a target are cached; rules are cheaper than a lookup
+                if target_connection_details and conversion_source == 'model':
+                    conversion_cache.store(original_sql, converted_sql, source_schema)
             else:
                 final_status = 'failed'
                 logger.error(f" [!] {job_type.upper()} Job {job_id}: Verification failed: {error_message}")
                 span.set_status(trace.Status(trace.StatusCode.ERROR, f"Verification failed: {error_message}"))
                 job_repository.update_job_status(job_id, final_status, original_sql=original_sql, converted_sql=converted_sql, error_message=error_message)
+            _record_llm_usage(job_id, span, llm_usage)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
 
     except Exception as e: # Critical error in callback
         error_message = f"Critical error in sql_conversion_callback for job {job_id}: {e}"
@@ -154,10 +192,30 @@ def sql_conversion_callback(ch, method, properties, body):
         current_original_sql = existing_job.get('original_sql') if existing_job else None
         job_repository.update_job_status(job_id, 'failed', original_sql=current_original_sql, error_message=error_message)
         span.set_status(trace.Status(trace.StatusCode.ERROR, f"Critical failure: {error_message}"))
-        ch.basic_reject(delivery_tag=method.delivery_tag, requeue=True) # Requeue for retry
+        # The job is marked failed and can be reconverted from the API; dead-letter the message rather than loop on it
+        ch.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
     finally:
         detach(token)
 
+
+def _submit_conversion(connection, executor):
+    """
+    Consumer callback for the conversion queue: hands each message to the conversion pool and returns
+    straight away, so up to CONVERSION_CONCURRENCY conversions run while the connection keeps serving
+    the other queues. Acks and rejects are passed back to the connection's thread.
+    """
+    def run(ch, method, properties, body):
+        try:
+            sql_conversion_callback(ch, method, properties, body)
+        except Exception as e:
+            # Failed before the job could be marked, e.g. a malformed message
+            logger.error(f" [!] Conversion message {method.delivery_tag} could not be processed: {e}", exc_info=True)
+            ch.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+
+    def on_message(ch, method, properties, body):
+        executor.submit(run, queues.ThreadsafeChannel(connection, ch), method, properties, body)
+    return on_message
+
 # def callback(ch, method, properties, body):
 def sql_execution_callback(ch, method, properties, body):
     database.initialize_db_pool()
@@ -173,6 +231,12 @@ def sql_execution_callback(ch, method, properties, body):
     source_schema = data.get('source_schema')
     target_schema = data.get('target_schema')
     data_migration_enabled = data.get('data_migration_enabled', False)
+    extraction_concurrency = data.get('extraction_concurrency') or table_splitter.DEFAULT_EXTRACTION_CONCURRENCY
+    data_sync_mode = data.get('data_sync_mode', 'full')
+    delta_column = data.get('delta_column')
+    lob_inline_threshold = data.get('lob_inline_threshold')
+    in_flight_window = data.get('in_flight_window')
+    load_strategy = data.get('load_strategy', 'in_place')
 
     print(f"[Worker] Received SQL Statements (first 5): {sanitized_sql_statements[:5]}")
 
@@ -214,8 +278,18 @@ def sql_execution_callback(ch, method, properties, body):
             overall_error_message = None
             statement_results = []
 
+            previous_sync_job = None
+            if object_type == 'TABLE' and data_migration_enabled and data_sync_mode == 'delta' and not is_verification:
+                previous_sync_job = database.find_latest_data_migration_job(source_schema, object_name, target_schema, object_name)
+                if not previous_sync_job:
+                    logger.info(f" [x] No completed load found for table {object_name}; running a full load before delta syncs.")
+
             # Determine which connection to use
-            if is_verification:
+            if previous_sync_job:
+                # The completed load created the table, so re-running its DDL would fail; only the rows are caught up
+                print(f" [x] Job {job_id}: Table {object_name} was already loaded by data migration job {previous_sync_job['job_id']}; skipping its DDL.")
+                statement_results = [{'statement': statement, 'status': 'skipped', 'error': None} for statement in sanitized_sql_statements]
+            elif is_verification:
                 print(f" [x] Job {job_id}: Using verification database for execution.")
                 with get_verification_db_connection() as conn:
                     overall_success, overall_error_message, statement_results = verification.verify_procedure(sanitized_sql_statements)
@@ -234,7 +308,14 @@ def sql_execution_callback(ch, method, properties, body):
                 span.set_status(trace.Status(trace.StatusCode.OK))
 
                 # --- Conditional Data Migration --- #
-                if object_type == 'TABLE' and data_migration_enabled:
+                if previous_sync_job:
+                    # Catch the target up from the last completed load's watermark instead of re-copying the table
+                    queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({
+                        'job_id': previous_sync_job['job_id'],
+                        'sync_mode': 'delta'
+                    }))
+                    logger.info(f" [x] Queued delta sync of table {object_name} (data migration job {previous_sync_job['job_id']}).")
+                elif object_type == 'TABLE' and data_migration_enabled:
                     logger.info(f" [x] DDL for table {object_name} executed successfully. Initiating data migration for job {job_id}.")
                     # Create a data migration job
                     data_mig_job_id = database.create_data_migration_job(
@@ -245,34 +326,32 @@ def sql_execution_callback(ch, method, properties, body):
                         target_db_type="PostgreSQL",
                         target_connection_string=json.dumps(pg_creds),
                         target_schema_name=target_schema,
-                        target_table_name=object_name # Assuming target table name is same as source
+                        target_table_name=object_name, # Assuming target table name is same as source
+                        extraction_concurrency=extraction_concurrency,
+                        sync_mode=data_sync_mode,
+                        delta_column=delta_column,
+                        lob_inline_threshold=lob_inline_threshold,
+                        parent_job_id=parent_job_id,
+                        in_flight_window=in_flight_window,
+                        load_strategy=load_strategy
                     )
                     logger.info(f" [x] Data migration job {data_mig_job_id} created for table {object_name}.")
 
-                    # Fetch data from Oracle and publish to data_migration_row_inserts queue
-                    try:
-                        oracle_column_names, oracle_rows = oracle_helper.fetch_oracle_table_data_batched(
-                            data['source_connection'],
-                            source_schema,
-                            object_name
-                        )
-                        logger.info(f"Extracted {len(oracle_rows)} rows from Oracle table {source_schema}.{object_name}")
-
-                        for i, row_data in enumerate(oracle_rows):
-                            message = {
-                                "job_id": str(data_mig_job_id),
-                                "row_number": i + 1,
-                                "row_data": list(row_data), # Convert tuple to list for JSON serialization
-                                "column_names": oracle_column_names
-                            }
-                            queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_ROW_INSERTS']['queue'], json.dumps(message))
-                        
-                        database.update_data_migration_job_status(data_mig_job_id, "IN_PROGRESS", total_rows=len(oracle_rows))
-                        logger.info(f"Published {len(oracle_rows)} raw row messages to RabbitMQ for data migration job {data_mig_job_id}.")
-
-                    except Exception as e:
-                        logger.error(f"Error during data extraction or publishing for job {data_mig_job_id}: {e}", exc_info=True)
-                        database.update_data_migration_job_status(data_mig_job_id, "FAILED", error_details=str(e))
+                    # The load itself runs in data_migration_worker.py so this consumer is free for the next DDL
+                    queues.publish_message(queues.QUEUE_CONFIG['DATA_MIGRATION_TABLE']['queue'], json.dumps({
+                        'job_id': data_mig_job_id,
+                        'action': 'migrate',
+                        'source_connection': data['source_connection'],
+                        'source_schema': source_schema,
+                        'object_name': object_name,
+                        'pg_creds': pg_creds,
+                        'target_schema': target_schema,
+                        'extraction_concurrency': extraction_concurrency,
+                        'delta_column': delta_column,
+                        'lob_inline_threshold': lob_inline_threshold,
+                        'in_flight_window': in_flight_window,
+                        'load_strategy': load_strategy
+                    }))
 
             else:
                 print(f" [!] Job {job_id} failed execution: {overall_error_message}. Re-queueing for retry.")
@@ -379,11 +458,11 @@ def data_migration_row_callback(ch, method, properties, body):
 # --- New: Callback for data_migration_row_inserts queue ---
 def data_migration_row_inserts_callback(ch, method, properties, body):
     database.initialize_db_pool()
-    data = json.loads(body)
-    job_id = data['job_id']
-    row_number = data['row_number']
-    row_data = data['row_data']
-    column_names = data['column_names']
+    batch = row_batches.decode_row_batch(body, properties.content_type)
+    job_id = batch['job_id']
+    batch_number = batch['batch_number']
+    rows = batch['rows']
+    column_names = batch['column_names']
 
     # Extract trace context from message properties
     carrier = properties.headers if properties.headers else {}
@@ -393,16 +472,25 @@ def data_migration_row_inserts_callback(ch, method, properties, body):
     try:
         with tracer.start_as_current_span("data_migration_row_inserts_job", context=ctx) as span:
             span.set_attribute("job.id", job_id)
-            span.set_attribute("row.number", row_number)
+            span.set_attribute("batch.number", batch_number)
+            span.set_attribute("batch.rows", len(rows))
+            span.set_attribute("batch.format_version", batch['format_version'])
             span.set_attribute("job.type", "data_migration_row_inserts")
-            print(f" [x] Received data_migration_row_inserts job for job_id: {job_id}, row_number: {row_number}")
-            migration_db.process_row_for_insertion(job_id, row_data, column_names)
+            print(f" [x] Received data_migration_row_inserts batch {batch_number} ({len(rows)} rows) for job_id: {job_id}")
+            migration_db.process_row_batch_for_insertion(job_id, rows, column_names, batch['first_row_number'])
             ch.basic_ack(delivery_tag=method.delivery_tag)
             span.set_status(trace.Status(trace.StatusCode.OK))
     except Exception as e:
-        print(f" [!] Error processing data_migration_row_inserts job for job_id {job_id}, row_number {row_number}: {e}")
+        print(f" [!] Error processing data_migration_row_inserts batch {batch_number} for job_id {job_id}: {e}")
         span.set_status(trace.Status(trace.StatusCode.ERROR, f"Data migration row inserts failed: {e}"))
-        ch.basic_reject(delivery_tag=method.delivery_tag, requeue=True) # Requeue for retry
+        # Quorum queues count earlier deliveries of a requeued message in x-delivery-count
+        attempts = int((properties.headers or {}).get('x-delivery-count', 0)) + 1
+        if attempts >= migration_db.ROW_BATCH_MAX_ATTEMPTS:
+            print(f" [!] Dead-lettering data_migration_row_inserts batch {batch_number} for job_id {job_id} after {attempts} attempts.")
+            migration_db.abandon_row_batch(job_id, len(rows), batch['first_row_number'], str(e))
+            ch.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+        else:
+            ch.basic_reject(delivery_tag=method.delivery_tag, requeue=True) # Requeue for retry
     finally:
         detach(token)
 
@@ -510,7 +598,14 @@ def extraction_callback(ch, method, properties, body):
                     'source_schema': source_schema,
                     'target_schema': target_schema,
                     'object_name': object_name,
-                    'data_migration_enabled': data_migration_enabled
+                    'data_migration_enabled': data_migration_enabled,
+                    'extraction_concurrency': data.get('extraction_concurrency'),
+                    'data_sync_mode': data.get('data_sync_mode', 'full'),
+                    'delta_column': data.get('delta_column'),
+                    'lob_inline_threshold': data.get('lob_inline_threshold'),
+                    'in_flight_window': data.get('in_flight_window'),
+                    'load_strategy': data.get('load_strategy', 'in_place'),
+                    'bypass_cache': data.get('bypass_cache', False)
                 }
                 queues.publish_message(queues.QUEUE_CONFIG['SQL_CONVERSION']['queue'], json.dumps(conversion_message))
                 span.set_status(trace.Status(trace.StatusCode.OK))
@@ -538,15 +633,20 @@ def main():
     connection = pika.BlockingConnection(pika.ConnectionParameters(os.getenv('RABBITMQ_HOST', 'localhost')))
     channel = connection.channel()
     channel.basic_qos(prefetch_count=1)
+    # Conversions get their own channel so they can be prefetched CONVERSION_CONCURRENCY at a time
+    conversion_channel = connection.channel()
+    conversion_channel.basic_qos(prefetch_count=CONVERSION_CONCURRENCY)
+    conversion_executor = ThreadPoolExecutor(max_workers=CONVERSION_CONCURRENCY, thread_name_prefix="conversion")
 
     # Map queue keys to their respective callback functions
     callback_map = {
-        'SQL_CONVERSION': sql_conversion_callback,
+        # SQL_CONVERSION is consumed on conversion_channel through the conversion pool
         'DATA_MIGRATION_ROW': data_migration_row_callback,
         'SQL_EXECUTION': sql_execution_callback,
         'PDF_PROCESSING': pdf_processing_callback,
         'DATA_MIGRATION_ROW_INSERTS': data_migration_row_inserts_callback,
         'DATA_MIGRATION_ROW_INSERTS_DDL': data_migration_row_inserts_ddl_callback,
+        # DATA_MIGRATION_TABLE and DATA_MIGRATION_SCHEDULE are consumed by data_migration_worker.py
     }
 
     # Add extraction callbacks dynamically
@@ -562,14 +662,21 @@ def main():
         queues.declare_quorum_queue(channel, queue_name, dlx_name)
 
         # Set up consumer if a callback is defined for this queue
-        if queue_key in callback_map:
+        if queue_key == 'SQL_CONVERSION':
+            conversion_channel.basic_consume(queue=queue_name, on_message_callback=_submit_conversion(connection, conversion_executor))
+            print(f"[*] Listening for messages on '{queue_name}' ({CONVERSION_CONCURRENCY} concurrent conversions).")
+        elif queue_key in callback_map:
             channel.basic_consume(queue=queue_name, on_message_callback=callback_map[queue_key])
             print(f"[*] Listening for messages on '{queue_name}'.")
         else:
             print(f"[!] No callback defined for queue: {queue_name}. Skipping consumer setup.")
 
+    llm_metrics.start_metrics_server()
     print(' [*] Waiting for messages. To exit press CTRL+C')
-    channel.start_consuming()
+    try:
+        channel.start_consuming()
+    finally:
+        conversion_executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == '__main__':
     try: